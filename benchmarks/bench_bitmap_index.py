@@ -0,0 +1,99 @@
+"""Categorical filtering in pandas: column masks vs the bitmap index
+
+Applies Region/Product/Category filter combinations to a synthetic
+multi-million-row frame, comparing:
+
+- successive masks: sales_data.copy() then df[df[column] == value] per
+  filter, as the dashboards did originally
+- FilterSpec mask: one vectorized isin() mask per predicate, AND-ed
+- bitmap index: BitmapIndex.apply(), bitwise AND/OR over packed bitmaps
+  with rows materialized once (the index build is reported separately)
+
+Also times BitmapIndex.count(), which never materializes rows.
+
+Run with: python -m benchmarks.bench_bitmap_index [--rows N] [--rounds R]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.filters import BitmapIndex, FilterSpec
+
+REGIONS = ['North', 'South', 'East', 'West', 'Central']
+PRODUCTS = [f"Product {i}" for i in range(50)]
+CATEGORIES = ['Electronics', 'Clothing', 'Food', 'Books', 'Sports', 'Home', 'Toys']
+
+# (label, {column: selected values})
+FILTERS = [
+    ("region", {'Region': ['North']}),
+    ("region+category", {'Region': ['North'], 'Category': ['Food']}),
+    ("all three", {'Region': ['North'], 'Category': ['Food'], 'Product': ['Product 7']}),
+    ("multi-value", {'Region': ['North', 'South'], 'Category': ['Food', 'Books', 'Toys']}),
+]
+
+
+def make_data(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Sales': rng.normal(1000, 200, rows),
+        'Region': rng.choice(REGIONS, rows),
+        'Product': rng.choice(PRODUCTS, rows),
+        'Category': rng.choice(CATEGORIES, rows),
+    })
+
+
+def successive_masks(df, selections):
+    filtered = df.copy()
+    for column, values in selections.items():
+        filtered = filtered[filtered[column].isin(values)] if len(values) > 1 else filtered[filtered[column] == values[0]]
+    return filtered
+
+
+def spec_for(selections):
+    spec = FilterSpec()
+    for column, values in selections.items():
+        spec = spec.isin(column, values)
+    return spec
+
+
+def median_ms(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def run(rows, rounds):
+    df = make_data(rows)
+
+    start = time.perf_counter()
+    index = BitmapIndex(df, ['Region', 'Product', 'Category'])
+    build = time.perf_counter() - start
+
+    print(f"{rows:,} rows, {rounds} rounds; index build (once): {build * 1000:.0f} ms")
+    print(f"{'filter':<18}{'rows':>11}{'masks ms':>11}{'spec ms':>10}{'bitmap ms':>11}{'count ms':>10}")
+    for label, selections in FILTERS:
+        spec = spec_for(selections)
+        masks_ms, expected = median_ms(lambda: successive_masks(df, selections), rounds)
+        spec_ms, by_spec = median_ms(lambda: spec.apply(df), rounds)
+        bitmap_ms, by_bitmap = median_ms(lambda: index.apply(spec), rounds)
+        count_ms, count = median_ms(lambda: index.count(spec), rounds)
+        assert len(expected) == len(by_spec) == len(by_bitmap) == count, label
+        print(f"{label:<18}{count:>11,}{masks_ms:>11.1f}{spec_ms:>10.1f}{bitmap_ms:>11.1f}{count_ms:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Rerun time of the comprehensive dashboard with and without the aggregate cache
+
+Changes the data table's region filter once per round and times:
+
+- data: the dataset and aggregate work alone, rebuilt (uncached, as the
+  page did before) or read from the cache layer
+- rerun: a full script run of comprehensive_dashboard.py through
+  Streamlit's AppTest, with the caches cleared before every run
+  (uncached) or left warm (cached)
+- fragment: the same filter change as a fragment rerun. AppTest always
+  runs the whole script, so this runs a script holding only what
+  Streamlit executes when a widget inside the data_table fragment
+  changes: the page's data_table function, with the page's imports and
+  the globals it reads
+
+Run with: python -m benchmarks.bench_comprehensive [--rounds R]
+"""
+import argparse
+import ast
+import os
+import statistics
+import tempfile
+import time
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from utils.comprehensive_data import REGIONS, compute_aggregates, generate, load_aggregates, load_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE = os.path.join(ROOT, "comprehensive_dashboard.py")
+
+# Fragment of the page timed by time_fragment_reruns() and the globals it reads
+FRAGMENT = "data_table"
+FRAGMENT_GLOBALS = {"dataset", "sales_data", "regions", "categories"}
+
+
+def clear_caches():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def time_data(rounds, cached):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        if cached:
+            load_dataset()
+            load_aggregates()
+        else:
+            compute_aggregates(generate().sales)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def fragment_script():
+    """Source running just the page's FRAGMENT function, as a fragment rerun does
+
+    The project root goes first on sys.path, so the page's utils imports
+    resolve wherever the script is written.
+    """
+    with open(PAGE) as f:
+        tree = ast.parse(f.read())
+    body = [
+        node for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+        or (isinstance(node, ast.Assign) and {getattr(t, "id", None) for t in node.targets} & FRAGMENT_GLOBALS)
+        or (isinstance(node, ast.FunctionDef) and node.name == FRAGMENT)
+    ]
+    path = f"import sys\nsys.path.insert(0, {ROOT!r})\n"
+    return path + ast.unparse(ast.Module(body=body, type_ignores=[])) + f"\n{FRAGMENT}()\n"
+
+
+def time_reruns(rounds, cached, script=PAGE):
+    at = AppTest.from_file(script, default_timeout=120)
+    at.run()
+    samples = []
+    for i in range(rounds):
+        if not cached:
+            clear_caches()
+        at.selectbox(key="table_region_filter").set_value(REGIONS[i % len(REGIONS)])
+        start = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return samples
+
+
+def time_fragment_reruns(rounds, cached):
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, f"{FRAGMENT}.py")
+        with open(script, "w") as f:
+            f.write(fragment_script())
+        return time_reruns(rounds, cached, script)
+
+
+def run(rounds):
+    clear_caches()
+    load_aggregates()
+
+    print(f"{rounds} rounds, filter change per round")
+    print(f"{'measure':<10}{'uncached ms':>14}{'cached ms':>12}")
+    for label, timer in (("data", time_data), ("rerun", time_reruns), ("fragment", time_fragment_reruns)):
+        cells = [statistics.median(timer(rounds, cached)) * 1000 for cached in (False, True)]
+        print(f"{label:<10}{cells[0]:>14.1f}{cells[1]:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    run(args.rounds)
+
+
+if __name__ == "__main__":
+    main()
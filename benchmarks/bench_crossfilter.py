@@ -0,0 +1,152 @@
+"""Click-to-update latency of cross-filtering on the DuckDB dashboard
+
+Replays a sequence of chart clicks against a synthetic sales table and
+times the queries each click triggers, comparing:
+
+- requery: every chart re-runs its aggregate on each click
+- crossfilter: charts skip their own selection and go through the shared
+  result cache, so only charts whose effective filter changed hit DuckDB
+
+and then times the same clicks end to end on duckdb_dashboard.py:
+
+- app: the full script rerun a click triggers, queries plus building and
+  rendering every figure, through Streamlit's AppTest on the dashboard's
+  own data. The click is replayed by setting the cross-filter state, as
+  sync_selection() does before its rerun
+
+Run with: python -m benchmarks.bench_crossfilter [--rows N] [--rounds R]
+"""
+import argparse
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from utils.crossfilter import STATE_KEY, with_cross_filters
+from utils.db import connect, get_duckdb_connection
+from utils.filters import FilterSpec
+from utils.profiling import ProfiledConnection, clear_result_cache
+
+PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "duckdb_dashboard.py")
+
+# Chart name -> (aggregate query, column the chart selects on)
+VIEWS = {
+    "count": ("SELECT COUNT(*) FROM sales WHERE {where}", None),
+    "kpis": ("SELECT COUNT(*), SUM(sales_amount), AVG(sales_amount), SUM(quantity) FROM sales WHERE {where}", None),
+    "trend": ("SELECT DATE_TRUNC('month', date) AS m, SUM(sales_amount) FROM sales WHERE {where} GROUP BY m ORDER BY m", None),
+    "region": ("SELECT region, SUM(sales_amount) AS s FROM sales WHERE {where} GROUP BY region ORDER BY s DESC", "region"),
+    "category": ("SELECT category, SUM(sales_amount) AS s FROM sales WHERE {where} GROUP BY category ORDER BY s DESC", "category"),
+    "products": ("SELECT product, SUM(sales_amount) AS s FROM sales WHERE {where} GROUP BY product ORDER BY s DESC LIMIT 10", "product"),
+    "distribution": ("SELECT FLOOR(sales_amount / 100) AS b, COUNT(*) FROM sales WHERE {where} GROUP BY b", None),
+}
+
+# Cross-filter state after each click
+CLICKS = [
+    ("click region", {"region": ("North",)}),
+    ("click category", {"region": ("North",), "category": ("Electronics",)}),
+    ("click product", {"region": ("North",), "category": ("Electronics",), "product": ("Product 7",)}),
+    ("change region", {"region": ("South",), "category": ("Electronics",), "product": ("Product 7",)}),
+    ("clear", {}),
+]
+
+
+def load_sales(conn, rows):
+    """Synthetic sales table with the dashboard's filterable columns"""
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE sales AS
+        SELECT
+            TIMESTAMP '2024-01-01' + INTERVAL (i % 730) DAY AS date,
+            ['North', 'South', 'East', 'West', 'Central'][1 + i % 5] AS region,
+            ['Electronics', 'Clothing', 'Food', 'Books', 'Sports'][1 + (i // 5) % 5] AS category,
+            'Product ' || ((i * 7919) % 200) AS product,
+            1 + (i * 31) % 20 AS quantity,
+            ROUND(((i * 2654435761) % 100000) / 100.0, 2) AS sales_amount
+        FROM range({rows}) t(i)
+    """)
+
+
+def render(conn, base_spec, cross_filters, cache):
+    """Run every chart's query for one page state; returns queries sent to DuckDB"""
+    conn.entries = []
+    for sql, selects in VIEWS.values():
+        where, params = with_cross_filters(base_spec, cross_filters, exclude=selects).to_sql()
+        conn.execute(sql.format(where=where), params, cache=cache).fetchall()
+    return sum(not entry.cache_hit for entry in conn.entries)
+
+
+def app_clicks(conn):
+    """CLICKS with values taken from the dashboard's own sales table"""
+    first, second = [r[0] for r in conn.execute("SELECT DISTINCT region FROM sales ORDER BY 1 LIMIT 2").fetchall()]
+    category, product = conn.execute(
+        "SELECT category, product FROM sales WHERE region = ? ORDER BY 1, 2 LIMIT 1", [first]
+    ).fetchone()
+    return [
+        ("click region", {"region": (first,)}),
+        ("click category", {"region": (first,), "category": (category,)}),
+        ("click product", {"region": (first,), "category": (category,), "product": (product,)}),
+        ("change region", {"region": (second,), "category": (category,), "product": (product,)}),
+        ("clear", {}),
+    ]
+
+
+def time_app(rounds):
+    """Median full-rerun time per click label on the dashboard"""
+    at = AppTest.from_file(PAGE, default_timeout=120)
+    at.run()
+    clicks = app_clicks(get_duckdb_connection())
+
+    samples = {}
+    for _ in range(rounds):
+        clear_result_cache()
+        at.session_state[STATE_KEY] = {}
+        at.run()
+        for label, cross_filters in clicks:
+            at.session_state[STATE_KEY] = dict(cross_filters)
+            start = time.perf_counter()
+            at.run()
+            samples.setdefault(label, []).append(time.perf_counter() - start)
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+    return {label: statistics.median(values) for label, values in samples.items()}
+
+
+def run(rows, rounds):
+    conn = ProfiledConnection(connect(), measure=False)
+    load_sales(conn, rows)
+    base_spec = FilterSpec()
+
+    results = {}
+    for strategy, cache in (("requery", False), ("crossfilter", True)):
+        for _ in range(rounds):
+            clear_result_cache()
+            render(conn, base_spec, {}, cache)
+            for label, cross_filters in CLICKS:
+                start = time.perf_counter()
+                queries = render(conn, base_spec, cross_filters, cache)
+                elapsed = time.perf_counter() - start
+                results.setdefault((strategy, label), []).append((elapsed, queries))
+
+    app = time_app(rounds)
+
+    print(f"{rows:,} rows, {rounds} rounds, {len(VIEWS)} charts; app on the dashboard's own data")
+    print(f"{'click':<16}{'requery ms':>12}{'queries':>9}{'crossfilter ms':>16}{'queries':>9}{'app ms':>10}")
+    for label, _ in CLICKS:
+        cells = []
+        for strategy in ("requery", "crossfilter"):
+            samples = results[(strategy, label)]
+            cells.append(statistics.median(s[0] for s in samples) * 1000)
+            cells.append(samples[0][1])
+        print(f"{label:<16}{cells[0]:>12.1f}{cells[1]:>9}{cells[2]:>16.1f}{cells[3]:>9}{app[label] * 1000:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
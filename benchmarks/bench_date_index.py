@@ -0,0 +1,91 @@
+"""Date-range filtering in pandas: full-column masks vs the sorted-date index
+
+Filters a synthetic table of timestamped rows by calendar-date ranges
+of different widths, comparing:
+
+- dt.date mask: comparisons on df['date'].dt.date (Python date objects)
+- datetime mask: FilterSpec.between().apply(), vectorized comparisons
+- date index: DateIndex.slice(), two numpy.searchsorted calls on the
+  rows sorted once up front (the sort is reported separately)
+
+Run with: python -m benchmarks.bench_date_index [--rows N] [--rounds R]
+"""
+import argparse
+import datetime
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.filters import DateIndex, FilterSpec
+
+START = datetime.date(2024, 1, 1)
+DAYS = 730
+
+# (label, first day offset, number of days)
+RANGES = [
+    ("1 day", 200, 1),
+    ("1 week", 200, 7),
+    ("1 month", 200, 30),
+    ("1 year", 100, 365),
+]
+
+
+def make_data(rows, seed=42):
+    """Unsorted rows with second-resolution timestamps over DAYS days"""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, DAYS * 86400, rows)
+    return pd.DataFrame({
+        'date': pd.Timestamp(START) + pd.to_timedelta(seconds, unit='s'),
+        'sales_amount': rng.random(rows) * 1000,
+    })
+
+
+def dt_date_mask(df, low, high):
+    return df[(df['date'].dt.date >= low) & (df['date'].dt.date <= high)]
+
+
+def run(rows, rounds):
+    df = make_data(rows)
+
+    start = time.perf_counter()
+    index = DateIndex(df, 'date')
+    build = time.perf_counter() - start
+
+    strategies = {
+        "dt.date mask": lambda low, high: dt_date_mask(df, low, high),
+        "datetime mask": lambda low, high: FilterSpec().between('date', low, high).apply(df),
+        "date index": lambda low, high: index.slice(low, high),
+    }
+
+    print(f"{rows:,} rows, {rounds} rounds; index sort (once): {build * 1000:.0f} ms")
+    print(f"{'range':<10}{'rows':>12}" + "".join(f"{name + ' ms':>18}" for name in strategies))
+    for label, offset, days in RANGES:
+        low = START + datetime.timedelta(days=offset)
+        high = low + datetime.timedelta(days=days - 1)
+        cells = []
+        counts = set()
+        for name, strategy in strategies.items():
+            samples = []
+            # The dt.date mask takes seconds at 10M rows; one round is enough
+            for _ in range(1 if name == "dt.date mask" else rounds):
+                start = time.perf_counter()
+                result = strategy(low, high)
+                samples.append(time.perf_counter() - start)
+            counts.add(len(result))
+            cells.append(statistics.median(samples) * 1000)
+        assert len(counts) == 1, f"strategies disagree for {label}: {counts}"
+        print(f"{label:<10}{counts.pop():>12,}" + "".join(f"{cell:>18.3f}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
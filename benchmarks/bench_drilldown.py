@@ -0,0 +1,105 @@
+"""Click-to-render latency of drilldown level switches
+
+Replays region -> category -> products navigation over a synthetic
+Region/Category/Product table and times the data work each page render
+does, comparing:
+
+- groupby: the page filters the rows and aggregates on every render
+- hierarchy: one GROUP BY ROLLUP builds every level up front, and each
+  render is a dictionary lookup (the build is reported separately)
+
+Run with: python -m benchmarks.bench_drilldown [--rows N] [--rounds R]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.drilldown_data import build_hierarchy
+
+REGIONS = ['North', 'South', 'East', 'West', 'Central']
+CATEGORIES = ['Electronics', 'Clothing', 'Food', 'Books', 'Sports', 'Home', 'Toys']
+PRODUCTS = 200
+
+
+def make_data(rows, seed=42):
+    """Synthetic rows shaped like the drilldown dataset"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Region': rng.choice(REGIONS, rows),
+        'Category': rng.choice(CATEGORIES, rows),
+        'Product': np.char.add('Product ', rng.integers(0, PRODUCTS, rows).astype(str)),
+        'Sales': rng.integers(1000, 50000, rows),
+        'Quantity': rng.integers(10, 500, rows),
+        'Profit': rng.integers(100, 10000, rows),
+    })
+
+
+def render_groupby(df, level, region, category):
+    # What the pages did before: filter, then aggregate, on every render
+    if level == "regions":
+        return df.groupby('Region').agg({'Sales': 'sum', 'Quantity': 'sum', 'Profit': 'sum', 'Category': 'count'}), df['Sales'].sum()
+    region_data = df[df['Region'] == region]
+    if level == "categories":
+        return region_data.groupby('Category').agg({'Sales': 'sum', 'Quantity': 'sum', 'Profit': 'sum', 'Product': 'count'}), region_data['Sales'].sum()
+    products = region_data[region_data['Category'] == category]
+    return products.groupby('Product').agg({'Sales': 'sum', 'Quantity': 'sum', 'Profit': 'sum'}), products['Sales'].sum()
+
+
+def render_hierarchy(hierarchy, level, region, category):
+    path = {"regions": (), "categories": (region,), "products": (region, category)}[level]
+    node = hierarchy[path]
+    return node.children, node.totals['Sales']
+
+
+# (label, page level, selected region, selected category) per click
+CLICKS = [
+    ("open regions", "regions", None, None),
+    ("click region", "categories", "North", None),
+    ("click category", "products", "North", "Electronics"),
+    ("back to region", "categories", "North", None),
+    ("other region", "categories", "West", None),
+    ("other category", "products", "West", "Books"),
+]
+
+
+def run(rows, rounds):
+    df = make_data(rows)
+
+    build_times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hierarchy = build_hierarchy(df)
+        build_times.append(time.perf_counter() - start)
+
+    results = {}
+    for _ in range(rounds):
+        for label, level, region, category in CLICKS:
+            start = time.perf_counter()
+            render_groupby(df, level, region, category)
+            results.setdefault(("groupby", label), []).append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            render_hierarchy(hierarchy, level, region, category)
+            results.setdefault(("hierarchy", label), []).append(time.perf_counter() - start)
+
+    print(f"{rows:,} rows, {rounds} rounds, {len(hierarchy)} hierarchy nodes")
+    print(f"hierarchy build (once per dataset version): {statistics.median(build_times) * 1000:.1f} ms")
+    print(f"{'click':<16}{'groupby ms':>12}{'hierarchy ms':>14}")
+    for label, *_ in CLICKS:
+        cells = [statistics.median(results[(strategy, label)]) * 1000 for strategy in ("groupby", "hierarchy")]
+        print(f"{label:<16}{cells[0]:>12.2f}{cells[1]:>14.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
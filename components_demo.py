@@ -1,4 +1,7 @@
 import streamlit as st
+import time
+
+from utils.jobs import get_job_runner, show_job_progress
 
 st.set_page_config(layout="wide")
 
@@ -133,15 +136,27 @@ with col8:
 
 # Progress & Status
 st.header("⏳ Progress & Status")
-progress_bar = st.progress(25)
-status_text = st.empty()
 
-# Simulate progress
-import time
-for i in range(25, 101, 25):
-    time.sleep(0.5)
-    progress_bar.progress(i)
-    status_text.text(f'Progress: {i}%')
+def simulate_progress(job):
+    """Simulated work on the job pool, reporting 25% steps"""
+    for i in range(25, 101, 25):
+        time.sleep(0.5)
+        job.report(i / 100, f"Progress: {i}%")
+
+if st.button("▶️ Run task", key="components_job_start"):
+    st.session_state.components_job = get_job_runner().submit(simulate_progress, label="Working")
+
+job = st.session_state.get("components_job")
+if job is None:
+    st.progress(0)
+    st.text("Click Run task to start")
+elif not job.done:
+    show_job_progress(job)
+elif job.error is not None:
+    st.error(f"Task failed: {job.error}")
+else:
+    st.progress(100)
+    st.text("Progress: 100%")
 
 # Forms
 st.header("📝 Forms")
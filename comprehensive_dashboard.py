@@ -1,51 +1,43 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from utils.comprehensive_data import CATEGORIES, REGIONS, load_aggregates, load_dataset
+from utils.filters import FilterSpec
+from utils.schema import show_memory_report
+
 st.set_page_config(layout="wide")
 
 st.title("📊 Comprehensive Analytics Dashboard")
 
-# Generate sample data
-np.random.seed(42)
-dates = pd.date_range('2024-01-01', periods=365, freq='D')
-regions = ['North', 'South', 'East', 'West', 'Central']
-categories = ['Electronics', 'Clothing', 'Food', 'Books', 'Sports']
-
-# Sales data
-sales_data = pd.DataFrame({
-    'Date': dates,
-    'Sales': np.random.normal(1000, 200, 365),
-    'Region': np.random.choice(regions, 365),
-    'Category': np.random.choice(categories, 365),
-    'Profit': np.random.normal(150, 50, 365),
-    'Customers': np.random.randint(50, 200, 365)
-})
+# Sample data and every chart's aggregate, built once per dataset version
+# and shared across reruns and sessions
+dataset = load_dataset()
+show_memory_report("comprehensive.")
+sales_data = dataset.sales
+aggregates = load_aggregates()
+regions = REGIONS
+categories = CATEGORIES
 
 # Top KPIs
+kpis = aggregates['kpis']
 col1, col2, col3, col4, col5 = st.columns(5)
 
 with col1:
-    total_sales = sales_data['Sales'].sum()
-    st.metric("Total Sales", f"${total_sales:,.0f}", "+12.5%")
+    st.metric("Total Sales", f"${kpis['total_sales']:,.0f}", "+12.5%")
 
 with col2:
-    total_profit = sales_data['Profit'].sum()
-    st.metric("Total Profit", f"${total_profit:,.0f}", "+8.3%")
+    st.metric("Total Profit", f"${kpis['total_profit']:,.0f}", "+8.3%")
 
 with col3:
-    total_customers = sales_data['Customers'].sum()
-    st.metric("Total Customers", f"{total_customers:,}", "+15.2%")
+    st.metric("Total Customers", f"{kpis['total_customers']:,}", "+15.2%")
 
 with col4:
-    avg_order_value = sales_data['Sales'].mean()
-    st.metric("Avg Order Value", f"${avg_order_value:.0f}", "+3.7%")
+    st.metric("Avg Order Value", f"${kpis['avg_order_value']:.0f}", "+3.7%")
 
 with col5:
-    conversion_rate = len(sales_data) / 365
+    conversion_rate = kpis['rows'] / 365
     st.metric("Conversion Rate", f"{conversion_rate:.1%}", "+0.8%")
 
 # KPIs Code Section
@@ -83,11 +75,7 @@ col1, col2 = st.columns([2, 1])
 with col1:
     # Sales trend chart
     st.subheader("📈 Sales Trend")
-    monthly_sales = sales_data.groupby(sales_data['Date'].dt.to_period('M')).agg({
-        'Sales': 'sum',
-        'Profit': 'sum'
-    }).reset_index()
-    monthly_sales['Date'] = monthly_sales['Date'].dt.to_timestamp()
+    monthly_sales = aggregates['monthly']
     
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=monthly_sales['Date'], y=monthly_sales['Sales'], 
@@ -103,7 +91,7 @@ with col1:
 with col2:
     # Regional distribution
     st.subheader("🌍 Sales by Region")
-    region_sales = sales_data.groupby('Region')['Sales'].sum().reset_index()
+    region_sales = aggregates['region']
     
     fig = px.pie(region_sales, values='Sales', names='Region', 
                  title="Regional Distribution",
@@ -149,11 +137,7 @@ col1, col2 = st.columns([1, 1])
 with col1:
     # Category performance
     st.subheader("📦 Category Performance")
-    category_sales = sales_data.groupby('Category').agg({
-        'Sales': 'sum',
-        'Profit': 'sum',
-        'Customers': 'sum'
-    }).reset_index()
+    category_sales = aggregates['category']
     
     fig = px.bar(category_sales, x='Category', y='Sales', 
                 title="Sales by Category",
@@ -165,13 +149,7 @@ with col1:
 with col2:
     # Customer segments
     st.subheader("👥 Customer Segments")
-    customer_segments = pd.DataFrame({
-        'Segment': ['New', 'Returning', 'VIP', 'Inactive'],
-        'Count': [np.random.randint(100, 500), np.random.randint(200, 600), 
-                   np.random.randint(50, 200), np.random.randint(80, 300)],
-        'Revenue': [np.random.randint(10000, 50000), np.random.randint(20000, 80000),
-                   np.random.randint(5000, 30000), np.random.randint(8000, 25000)]
-    })
+    customer_segments = dataset.segments
     
     fig = px.scatter(customer_segments, x='Count', y='Revenue', 
                     size='Revenue', color='Segment',
@@ -217,14 +195,8 @@ st.plotly_chart(fig, width='stretch')
 # Third row - Map visualization
 st.subheader("🗺️ Geographic Distribution")
 
-# Generate sample geographic data
-geo_data = pd.DataFrame({
-    'Region': regions,
-    'Latitude': [40.7128, 34.0522, 41.8781, 37.7749, 39.9526],
-    'Longitude': [-74.0060, -118.2437, -87.6298, -122.4194, -75.1652],
-    'Sales': np.random.randint(50000, 200000, len(regions)),
-    'Customers': np.random.randint(500, 2000, len(regions))
-})
+# Sample geographic data
+geo_data = dataset.geo
 
 col1, col2 = st.columns([2, 1])
 
@@ -243,13 +215,8 @@ with col1:
 with col2:
     # Regional summary table
     st.subheader("📊 Regional Summary")
-    regional_summary = sales_data.groupby('Region').agg({
-        'Sales': 'sum',
-        'Profit': 'sum',
-        'Customers': 'sum'
-    }).reset_index()
-    regional_summary['Profit Margin'] = (regional_summary['Profit'] / regional_summary['Sales'] * 100).round(1)
-    
+    regional_summary = aggregates['regional']
+
     # Format for display
     display_summary = regional_summary.copy()
     display_summary['Sales'] = display_summary['Sales'].apply(lambda x: f"${x:,.0f}")
@@ -304,8 +271,7 @@ col1, col2 = st.columns([1, 1])
 
 with col1:
     # Daily sales pattern
-    daily_pattern = sales_data.groupby(sales_data['Date'].dt.dayofweek)['Sales'].mean().reset_index()
-    daily_pattern['Day'] = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    daily_pattern = aggregates['daily']
     
     fig = px.bar(daily_pattern, x='Day', y='Sales', 
                 title="Average Sales by Day of Week",
@@ -350,12 +316,7 @@ st.plotly_chart(fig, width='stretch')
 
 with col2:
     # Monthly comparison
-    monthly_comparison = sales_data.groupby(sales_data['Date'].dt.month).agg({
-        'Sales': 'sum',
-        'Profit': 'sum'
-    }).reset_index()
-    monthly_comparison['Month'] = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    monthly_comparison = aggregates['month_of_year']
     
     fig = go.Figure()
     fig.add_trace(go.Bar(x=monthly_comparison['Month'], y=monthly_comparison['Sales'], 
@@ -386,24 +347,33 @@ with col3:
 # Data table at bottom
 st.subheader("📋 Detailed Data Table")
 
-# Filters
-col1, col2, col3 = st.columns(3)
-with col1:
-    selected_region = st.selectbox("Filter by Region:", ['All'] + regions, key="table_region_filter")
-with col2:
-    selected_category = st.selectbox("Filter by Category:", ['All'] + categories, key="table_category_filter")
-with col3:
-    date_range = st.date_input("Date Range:", value=[sales_data['Date'].min(), sales_data['Date'].max()], key="table_date_filter")
 
-# Apply filters
-filtered_data = sales_data.copy()
-if selected_region != 'All':
-    filtered_data = filtered_data[filtered_data['Region'] == selected_region]
-if selected_category != 'All':
-    filtered_data = filtered_data[filtered_data['Category'] == selected_category]
+@st.fragment
+def data_table():
+    """Filterable table; changing a filter reruns only this fragment"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        selected_region = st.selectbox("Filter by Region:", ['All'] + regions, key="table_region_filter")
+    with col2:
+        selected_category = st.selectbox("Filter by Category:", ['All'] + categories, key="table_category_filter")
+    with col3:
+        date_range = st.date_input("Date Range:", value=[sales_data['Date'].min(), sales_data['Date'].max()], key="table_date_filter")
 
-# Display filtered data
-st.dataframe(filtered_data.sort_values('Date', ascending=False).head(100), width='stretch')
+    # Apply filters: the date range is a binary search on the date-sorted
+    # rows, Region/Category a bitwise AND of precomputed bitmaps
+    filter_spec = (
+        FilterSpec()
+        .eq('Region', selected_region)
+        .eq('Category', selected_category)
+        .date_range('Date', date_range)
+    )
+    filtered_data = dataset.date_index.apply(filter_spec, dataset.filter_index)
+
+    # Display filtered data
+    st.dataframe(filtered_data.sort_values('Date', ascending=False).head(100), width='stretch')
+
+
+data_table()
 
 # Insights & Data Table Code Section
 with st.expander("💻 Insights & Data Table Code", expanded=False):
@@ -432,12 +402,17 @@ with col2:
 with col3:
     date_range = st.date_input("Date Range:", value=[sales_data['Date'].min(), sales_data['Date'].max()], key="table_date_filter")
 
-# Apply filters
-filtered_data = sales_data.copy()
-if selected_region != 'All':
-    filtered_data = filtered_data[filtered_data['Region'] == selected_region]
-if selected_category != 'All':
-    filtered_data = filtered_data[filtered_data['Category'] == selected_category]
+# Apply filters ("All" adds no predicate): the date range is a binary
+# search on the date-sorted rows, Region/Category a bitwise AND of bitmaps
+date_index = DateIndex(sales_data, 'Date')  # built once, with the cached data
+filter_index = BitmapIndex(date_index.frame, ['Region', 'Category'])
+filter_spec = (
+    FilterSpec()
+    .eq('Region', selected_region)
+    .eq('Category', selected_category)
+    .date_range('Date', date_range)
+)
+filtered_data = date_index.apply(filter_spec, filter_index)
 
 # Display filtered data
 st.dataframe(filtered_data.sort_values('Date', ascending=False).head(100), width='stretch')
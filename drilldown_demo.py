@@ -1,9 +1,12 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+from utils.drilldown_data import dimension_values, load_chart_hierarchy, load_drilldown_data, source_picker
+from utils.filters import FilterSpec
+from utils.schema import show_memory_report
+
 st.set_page_config(layout="wide")
 
 # Custom CSS
@@ -44,26 +47,11 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Generate sample data
-np.random.seed(42)
-regions = ['North', 'South', 'East', 'West']
-categories = ['Electronics', 'Clothing', 'Food', 'Books']
-products = ['Laptop', 'Phone', 'Tablet', 'Shirt', 'Pants', 'Dress', 'Pizza', 'Burger', 'Novel', 'Textbook']
-
-data = []
-for region in regions:
-    for category in categories:
-        for product in np.random.choice(products, 3):
-            data.append({
-                'Region': region,
-                'Category': category,
-                'Product': product,
-                'Sales': np.random.randint(1000, 50000),
-                'Quantity': np.random.randint(10, 500),
-                'Profit': np.random.randint(100, 10000)
-            })
-
-df = pd.DataFrame(data)
+# Shared drilldown dataset, cached per source and version
+source = source_picker()
+df = load_drilldown_data(source)
+show_memory_report("drilldown.")
+regions, categories, products = dimension_values(df)
 
 # Method 1: Filter-Based Approach (Most Streamlit-Friendly)
 st.header("🎯 Method 1: Filter-Based Exploration")
@@ -96,13 +84,13 @@ with col3:
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Apply filters
-filtered_df = df.copy()
-if selected_region != 'All':
-    filtered_df = filtered_df[filtered_df['Region'] == selected_region]
-if selected_category != 'All':
-    filtered_df = filtered_df[filtered_df['Category'] == selected_category]
-if selected_product != 'All':
-    filtered_df = filtered_df[filtered_df['Product'] == selected_product]
+filter_spec = (
+    FilterSpec()
+    .eq('Region', selected_region)
+    .eq('Category', selected_category)
+    .eq('Product', selected_product)
+)
+filtered_df = filter_spec.apply(df)
 
 # Display results
 st.markdown('<div class="drilldown-card">', unsafe_allow_html=True)
@@ -139,17 +127,17 @@ col1, col2 = st.columns(2)
 with col1:
     if selected_product != 'All':
         # Product detail view
-        product_data = filtered_df.groupby('Product')[['Sales', 'Quantity', 'Profit']].sum().reset_index()
+        product_data = filtered_df.groupby('Product', observed=True)[['Sales', 'Quantity', 'Profit']].sum().reset_index()
         fig = px.bar(product_data, x='Product', y='Sales', title=f"Sales by {selected_category}")
         st.plotly_chart(fig, use_container_width=True, key="product_detail_chart")
     elif selected_category != 'All':
         # Category view
-        category_data = filtered_df.groupby('Product')[['Sales', 'Quantity', 'Profit']].sum().reset_index()
+        category_data = filtered_df.groupby('Product', observed=True)[['Sales', 'Quantity', 'Profit']].sum().reset_index()
         fig = px.bar(category_data, x='Product', y='Sales', title=f"Products in {selected_category}")
         st.plotly_chart(fig, use_container_width=True, key="category_chart")
     else:
         # Region view
-        region_data = filtered_df.groupby('Region')[['Sales', 'Quantity', 'Profit']].sum().reset_index()
+        region_data = filtered_df.groupby('Region', observed=True)[['Sales', 'Quantity', 'Profit']].sum().reset_index()
         fig = px.pie(region_data, values='Sales', names='Region', title="Sales by Region")
         st.plotly_chart(fig, use_container_width=True, key="region_pie_chart")
 
@@ -189,14 +177,14 @@ with col3:
     else:
         product = 'All'
 
-# Apply filters
-filtered_df = df.copy()
-if region != 'All':
-    filtered_df = filtered_df[filtered_df['Region'] == region]
-if category != 'All':
-    filtered_df = filtered_df[filtered_df['Category'] == category]
-if product != 'All':
-    filtered_df = filtered_df[filtered_df['Product'] == product]
+# Apply filters ("All" adds no predicate)
+filter_spec = (
+    FilterSpec()
+    .eq('Region', region)
+    .eq('Category', category)
+    .eq('Product', product)
+)
+filtered_df = filter_spec.apply(df)
 
 # Display results
 st.dataframe(filtered_df)
@@ -214,7 +202,7 @@ with tab1:
     st.markdown('<div class="drilldown-card">', unsafe_allow_html=True)
     st.subheader("Regional Overview")
     
-    region_summary = df.groupby('Region')[['Sales', 'Quantity', 'Profit']].sum().reset_index()
+    region_summary = df.groupby('Region', observed=True)[['Sales', 'Quantity', 'Profit']].sum().reset_index()
     
     col1, col2 = st.columns(2)
     with col1:
@@ -232,7 +220,7 @@ with tab2:
     st.markdown('<div class="drilldown-card">', unsafe_allow_html=True)
     st.subheader("Category Analysis")
     
-    category_summary = df.groupby('Category')[['Sales', 'Quantity', 'Profit']].sum().reset_index()
+    category_summary = df.groupby('Category', observed=True)[['Sales', 'Quantity', 'Profit']].sum().reset_index()
     
     col1, col2 = st.columns(2)
     with col1:
@@ -240,7 +228,10 @@ with tab2:
         st.plotly_chart(fig, use_container_width=True, key="tab_category_bar")
     
     with col2:
-        fig = px.sunburst(df, path=['Region', 'Category'], values='Sales', title="Category Distribution")
+        # Pre-aggregated nodes (top 10 per parent, the rest as "Other") from DuckDB
+        sunburst = load_chart_hierarchy(source, ['Region', 'Category'])
+        fig = go.Figure(go.Sunburst(**sunburst, branchvalues="total"))
+        fig.update_layout(title="Category Distribution")
         st.plotly_chart(fig, use_container_width=True, key="tab_category_sunburst")
     
     st.dataframe(category_summary, use_container_width=True)
@@ -250,11 +241,13 @@ with tab3:
     st.markdown('<div class="drilldown-card">', unsafe_allow_html=True)
     st.subheader("Product Details")
     
-    product_summary = df.groupby(['Category', 'Product'])[['Sales', 'Quantity', 'Profit']].sum().reset_index()
+    product_summary = df.groupby(['Category', 'Product'], observed=True)[['Sales', 'Quantity', 'Profit']].sum().reset_index()
     
     col1, col2 = st.columns(2)
     with col1:
-        fig = px.treemap(product_summary, path=['Category', 'Product'], values='Sales', title="Product Sales Hierarchy")
+        treemap = load_chart_hierarchy(source, ['Category', 'Product'])
+        fig = go.Figure(go.Treemap(**treemap, branchvalues="total"))
+        fig.update_layout(title="Product Sales Hierarchy")
         st.plotly_chart(fig, use_container_width=True, key="tab_product_treemap")
     
     with col2:
@@ -307,34 +300,53 @@ st.markdown("---")
 
 # Method 3: Expandable Sections
 st.header("📂 Method 3: Expandable Sections")
-st.markdown("*Use nested expanders for hierarchical data*")
+st.markdown("*Use nested sections for hierarchical data*")
 
 st.markdown('<div class="drilldown-card">', unsafe_allow_html=True)
 
-for region in regions:
-    with st.expander(f"🌍 {region} Region"):
-        region_data = df[df['Region'] == region]
-        region_summary = region_data.groupby('Category')[['Sales', 'Quantity', 'Profit']].sum()
-        
-        col1, col2 = st.columns([2, 1])
-        with col1:
-            st.write(f"**Total Sales:** ${region_data['Sales'].sum():,}")
-            st.write(f"**Total Products:** {len(region_data)}")
-        
-        with col2:
-            fig = px.pie(region_summary.reset_index(), values='Sales', names='Category', title=f"{region} Categories")
-            st.plotly_chart(fig, use_container_width=True, key=f"pie_{region}")
-        
-        for category in region_data['Category'].unique():
-            with st.expander(f"📂 {category} in {region}"):
-                category_data = region_data[region_data['Category'] == category]
-                
-                st.dataframe(category_data[['Product', 'Sales', 'Quantity', 'Profit']], use_container_width=True)
-                
-                # Product chart
-                product_summary = category_data.groupby('Product')[['Sales', 'Quantity']].sum().reset_index()
-                fig = px.bar(product_summary, x='Product', y='Sales', title=f"Products in {category}")
-                st.plotly_chart(fig, use_container_width=True, key=f"bar_{region}_{category}")
+
+@st.fragment
+def expandable_sections():
+    """Nested sections whose content is only built once they are opened
+
+    A plain st.expander runs its body even while collapsed, and its open
+    state is not readable in every supported Streamlit version. Each
+    section is a toggle instead: closed sections skip their queries and
+    figures, and inside a fragment opening one reruns only this method.
+    """
+    for region in regions:
+        if not st.toggle(f"🌍 {region} Region", key=f"expand_{region}"):
+            continue
+
+        with st.container(border=True):
+            region_data = df[df['Region'] == region]
+            region_summary = region_data.groupby('Category', observed=True)[['Sales', 'Quantity', 'Profit']].sum()
+
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                st.write(f"**Total Sales:** ${region_data['Sales'].sum():,}")
+                st.write(f"**Total Products:** {len(region_data)}")
+
+            with col2:
+                fig = px.pie(region_summary.reset_index(), values='Sales', names='Category', title=f"{region} Categories")
+                st.plotly_chart(fig, use_container_width=True, key=f"pie_{region}")
+
+            for category in region_summary.index:
+                if not st.toggle(f"📂 {category} in {region}", key=f"expand_{region}_{category}"):
+                    continue
+
+                with st.container(border=True):
+                    category_data = region_data[region_data['Category'] == category]
+
+                    st.dataframe(category_data[['Product', 'Sales', 'Quantity', 'Profit']], use_container_width=True)
+
+                    # Product chart
+                    product_summary = category_data.groupby('Product', observed=True)[['Sales', 'Quantity']].sum().reset_index()
+                    fig = px.bar(product_summary, x='Product', y='Sales', title=f"Products in {category}")
+                    st.plotly_chart(fig, use_container_width=True, key=f"bar_{region}_{category}")
+
+
+expandable_sections()
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -342,17 +354,22 @@ st.markdown('</div>', unsafe_allow_html=True)
 st.markdown("---")
 st.markdown("### 💻 Code for Expandable Sections:")
 st.code('''
-# Expandable sections approach
-for region in regions:
-    with st.expander(f"🌍 {region} Region"):
-        region_data = df[df['Region'] == region]
-        
-        st.write(f"Total Sales: ${region_data['Sales'].sum():,}")
-        
-        for category in region_data['Category'].unique():
-            with st.expander(f"📂 {category}"):
-                category_data = region_data[region_data['Category'] == category]
-                st.dataframe(category_data)
+# Expandable sections approach: content is only built once opened
+@st.fragment
+def expandable_sections():
+    for region in regions:
+        if not st.toggle(f"🌍 {region} Region", key=f"expand_{region}"):
+            continue
+
+        with st.container(border=True):
+            region_data = df[df['Region'] == region]
+            st.write(f"Total Sales: ${region_data['Sales'].sum():,}")
+
+            for category in region_data['Category'].unique():
+                if st.toggle(f"📂 {category}", key=f"expand_{region}_{category}"):
+                    with st.container(border=True):
+                        category_data = region_data[region_data['Category'] == category]
+                        st.dataframe(category_data)
 ''', language='python')
 
 st.markdown("---")
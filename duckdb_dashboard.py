@@ -6,7 +6,34 @@ import duckdb
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import functools
 import os
+import time
+
+from utils.approx import approximate_kpis, ensure_sample_table, submit_exact_kpis
+from utils.chart_data import chart_data, get_kpi_executor
+from utils.crossfilter import (
+    active_cross_filters,
+    chart_key,
+    clear_cross_filters,
+    reset_on_filter_change,
+    sync_selection,
+    with_cross_filters,
+)
+from utils.db import get_duckdb_connection
+from utils.export import EXPORT_FORMATS, export_parts, export_size, read_part, start_export
+from utils.jobs import get_job_runner, show_job_progress
+from utils.filters import FilterSpec
+from utils.profiling import ProfiledConnection, clear_result_cache
+from utils.progressive import PREVIEW_RATE
+from utils.search import build_index, search
+from utils.trend import (
+    GRANULARITIES,
+    GRANULARITY_LABELS,
+    choose_granularity,
+    downsample,
+    max_points_for_width,
+)
 
 st.set_page_config(layout="wide")
 
@@ -47,15 +74,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize DuckDB connection
-@st.cache_resource
-def get_duckdb_connection():
-    """Initialize DuckDB connection with extensions"""
-    conn = duckdb.connect(":memory:")
-    conn.execute("INSTALL httpfs")
-    conn.execute("LOAD httpfs")
-    return conn
-
 # Generate and save sample data as Parquet
 @st.cache_data
 def generate_sample_data():
@@ -114,26 +132,641 @@ def generate_sample_data():
     
     return parquet_path, len(df)
 
+@st.cache_resource
+def get_product_index(_conn, version):
+    """Prefix index over every product, rebuilt when the dataset changes"""
+    return build_index(_conn, "sales", "product", group_column="category")
+
+@st.fragment
+def product_picker(conn, index, categories, applied, live):
+    """Products multiselect fed by search-as-you-type matches
+    
+    Typing reruns only this fragment, and only the matches plus the
+    products already picked are sent to the browser as options. The
+    selection is applied on Apply, or right away in live mode.
+    """
+    query = st.text_input(
+        "🔎 Search Products",
+        key="product_search",
+        placeholder="Type a product name..."
+    )
+    
+    category_clause, category_params = FilterSpec().isin("category", categories).to_sql()
+    matches = search(conn, index, "sales", "product", query, category_clause, category_params, groups=categories)
+    selected = st.session_state.get("product_filter", [])
+    
+    chosen = st.multiselect(
+        "🛍️ Products",
+        options=sorted(set(selected) | set(matches)),
+        key="product_filter",
+        help="Only products matching the search are listed"
+    )
+    
+    if live and tuple(chosen) != tuple(applied):
+        st.rerun()
+    elif not live and tuple(chosen) != tuple(applied):
+        st.caption("Product changes apply with the other filters")
+
+# Label, result key and display format for each KPI card
+KPI_CARDS = [
+    ("Transactions", "total_transactions", "{:,.0f}"),
+    ("Total Sales", "total_sales", "${:,.2f}"),
+    ("Avg Sale", "avg_sale", "${:,.2f}"),
+    ("Total Quantity", "total_quantity", "{:,.0f}"),
+    ("Avg Discount", "avg_discount_pct", "{:.1f}%"),
+]
+
+def show_kpi_row(values, approximate=False):
+    """Render the KPI cards, with a 95% interval caption for estimates"""
+    cols = st.columns(len(KPI_CARDS))
+    
+    for col, (label, key, fmt) in zip(cols, KPI_CARDS):
+        with col:
+            if approximate:
+                estimate, half_width = values[key]
+                st.metric(f"{label} (≈)", fmt.format(estimate) if estimate is not None else "–")
+                if half_width is not None and half_width == half_width:
+                    st.caption(f"95% CI ± {fmt.format(half_width)}")
+            else:
+                st.metric(label, fmt.format(values[key]))
+
+def render_approximate_kpis(conn, where_clause, params, rate, method, refine):
+    """Show sample-based KPIs, optionally swapping in exact values when ready"""
+    estimates = approximate_kpis(conn, where_clause, params, rate, method)
+    
+    if not refine:
+        show_kpi_row(estimates, approximate=True)
+        return
+    
+    # One background job per filter state; older jobs are dropped
+    job_key = (where_clause, tuple(params))
+    jobs = st.session_state.setdefault("exact_kpi_jobs", {})
+    if job_key not in jobs:
+        for stale in jobs.values():
+            stale.cancel()
+        jobs.clear()
+        jobs[job_key] = submit_exact_kpis(get_kpi_executor(), conn, where_clause, params)
+    future = jobs[job_key]
+    
+    if future.done():
+        if future.result() is None:
+            show_kpi_row(estimates, approximate=True)
+            st.caption(f"⚠️ Exact values failed; estimated from a {rate:.0%} sample")
+        else:
+            show_kpi_row(future.result())
+            st.caption("✅ Exact values")
+        return
+    
+    # Only this fragment polls, so the rest of the page is not rerun; once
+    # the exact values are in, one full rerun renders them without polling
+    @st.fragment(run_every="1s")
+    def kpi_row():
+        if future.done():
+            st.rerun()
+        show_kpi_row(estimates, approximate=True)
+        st.caption(f"⏳ Estimated from a {rate:.0%} sample, computing exact values...")
+    
+    kpi_row()
+
+def render_query_profile(container, conn):
+    """List every query of this run with timings, plus EXPLAIN ANALYZE on demand"""
+    entries = conn.entries
+    
+    with container:
+        with st.expander("⏱️ Query Profile", expanded=True):
+            st.caption(f"{len(entries)} queries, {conn.total_seconds * 1000:.1f} ms total in DuckDB")
+            
+            st.dataframe(
+                [
+                    {
+                        "#": i + 1,
+                        "Source": entry.source,
+                        "Query": entry.summary,
+                        "Wall Time (ms)": round(entry.seconds * 1000, 2),
+                        "Rows": entry.rows,
+                        "Raw Bytes": entry.raw_bytes,
+                        "Bytes": entry.bytes,
+                        "Cache": "✅ hit" if entry.cache_hit else "",
+                    }
+                    for i, entry in enumerate(entries)
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            explainable = [i for i, entry in enumerate(entries) if entry.explainable]
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                choice = st.selectbox(
+                    "Query plan",
+                    options=explainable,
+                    format_func=lambda i: f"#{i + 1} {entries[i].summary}",
+                    key="profile_explain_query"
+                )
+            with col2:
+                st.write("")
+                run_explain = st.button("🔎 EXPLAIN ANALYZE", key="profile_explain_run")
+            
+            if run_explain and choice is not None:
+                st.code(conn.explain_analyze(entries[choice]), language=None)
+
+# Every column the sidebar can filter on
+FILTER_COLUMNS = ("date", "region", "category", "product", "sales_amount", "quantity")
+
+def dashboard_section(name, depends_on, fragment=True, selects=None):
+    """Run a page section as its own st.fragment, scoped to the filters it uses
+    
+    The section only sees the predicates on depends_on, so its queries and
+    cache keys change only when one of those filters does; a change to any
+    other filter is served from the result cache. Every chart on this page
+    reads the whole sidebar filter. Chart selections (cross-filters) are
+    added on top, except the section's own selects column. Widgets inside a fragment rerun just that fragment instead of
+    the whole page. In profile mode each section shows how long it took
+    to render.
+    """
+    def decorate(render):
+        @functools.wraps(render)
+        def run(conn, filter_spec, *args, **kwargs):
+            start = time.perf_counter()
+            filter_spec = with_cross_filters(filter_spec, active_cross_filters(), exclude=selects)
+            render(conn, filter_spec.only(depends_on), *args, **kwargs)
+            elapsed = time.perf_counter() - start
+            
+            if st.session_state.get("profile_mode"):
+                st.caption(f"⏱️ {name}: {elapsed * 1000:.1f} ms")
+        
+        return st.fragment(run) if fragment else run
+    return decorate
+
+@st.fragment
+def code_section(title, code, key):
+    """Code sample that is only sent to the browser while toggled on"""
+    if st.toggle(title, value=False, key=key):
+        st.code(code, language='python')
+
+# The approximate path polls in its own fragment, so this one is not a fragment
+@dashboard_section("KPIs", depends_on=FILTER_COLUMNS, fragment=False)
+def kpi_section(conn, filter_spec, approx_settings):
+    """KPI cards, exact or sample-based"""
+    where_clause, params = filter_spec.to_sql()
+    
+    # KPIs using DuckDB aggregations
+    if approx_settings:
+        render_approximate_kpis(conn, where_clause, params, **approx_settings)
+        return
+    
+    kpi_query = f"""
+        SELECT 
+            COUNT(*) as total_transactions,
+            SUM(sales_amount) as total_sales,
+            AVG(sales_amount) as avg_sale,
+            SUM(quantity) as total_quantity,
+            AVG(discount) * 100 as avg_discount_pct
+        FROM sales
+        WHERE {where_clause}
+    """
+    
+    kpi_data = conn.execute(kpi_query, params, cache=True).fetchone()
+    
+    # Display KPIs
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    with col1:
+        st.metric("Transactions", f"{kpi_data[0]:,}")
+    
+    with col2:
+        st.metric("Total Sales", f"${kpi_data[1]:,.2f}")
+    
+    with col3:
+        st.metric("Avg Sale", f"${kpi_data[2]:,.2f}")
+    
+    with col4:
+        st.metric("Total Quantity", f"{kpi_data[3]:,}")
+    
+    with col5:
+        st.metric("Avg Discount", f"{kpi_data[4]:.1f}%")
+
+@dashboard_section("Sales Trend", depends_on=FILTER_COLUMNS)
+def trend_section(conn, filter_spec, trend_start, trend_end):
+    """Sales over time with adaptive buckets; its widgets rerun only this section"""
+    where_clause, params = filter_spec.to_sql()
+    
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.subheader("📈 Sales Trend")
+    
+    # Bucket size follows the selected date span so short ranges still
+    # show a curve and long ranges don't ship thousands of points
+    auto_granularity = choose_granularity(trend_start, trend_end)
+    
+    gcol1, gcol2 = st.columns([2, 1])
+    with gcol1:
+        granularity_choice = st.selectbox(
+            "Granularity",
+            options=['auto'] + list(GRANULARITIES),
+            format_func=lambda g: f"Auto ({GRANULARITY_LABELS[auto_granularity]})" if g == 'auto' else GRANULARITY_LABELS[g],
+            key="trend_granularity"
+        )
+    with gcol2:
+        downsample_trend = st.toggle("Downsample", value=True, key="trend_downsample")
+    
+    granularity = auto_granularity if granularity_choice == 'auto' else granularity_choice
+    
+    trend_query = f"""
+        SELECT 
+            DATE_TRUNC('{granularity}', date) as period,
+            SUM(sales_amount) as period_sales,
+            COUNT(*) as transactions
+        FROM sales
+        WHERE {where_clause}
+        GROUP BY DATE_TRUNC('{granularity}', date)
+        ORDER BY period
+    """
+    
+    trend_data = chart_data(conn, trend_query, params, "Sales Trend", scale=['period_sales', 'transactions'])
+    
+    if downsample_trend:
+        trend_data = downsample(trend_data, 'period', 'period_sales', max_points_for_width())
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=trend_data['period'],
+        y=trend_data['period_sales'],
+        mode='lines+markers',
+        name='Sales',
+        line=dict(color='#1f77b4', width=3)
+    ))
+    
+    fig.update_layout(
+        title=f"{GRANULARITY_LABELS[granularity]} Sales Trend",
+        xaxis_title=granularity.capitalize(),
+        yaxis_title="Sales Amount ($)",
+        height=400,
+        hovermode='x unified'
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@dashboard_section("Sales by Region", depends_on=FILTER_COLUMNS, selects="region")
+def region_section(conn, filter_spec):
+    """Regional share of sales"""
+    where_clause, params = filter_spec.to_sql()
+    
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.subheader("🥧 Sales by Region")
+    
+    region_query = f"""
+        SELECT 
+            region,
+            SUM(sales_amount) as total_sales
+        FROM sales
+        WHERE {where_clause}
+        GROUP BY region
+        ORDER BY total_sales DESC
+    """
+    
+    region_data = chart_data(conn, region_query, params, "Sales by Region", scale=['total_sales'])
+    
+    fig = px.pie(
+        region_data,
+        values='total_sales',
+        names='region',
+        title="Regional Distribution",
+        custom_data=['region']
+    )
+    
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(height=400)
+    
+    # Clicking a slice filters every other chart to that region
+    event = st.plotly_chart(
+        fig,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="points",
+        key=chart_key("region")
+    )
+    sync_selection("region", event)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@dashboard_section("Category Performance", depends_on=FILTER_COLUMNS, selects="category")
+def category_section(conn, filter_spec):
+    """Sales per category"""
+    where_clause, params = filter_spec.to_sql()
+    
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.subheader("📦 Category Performance")
+    
+    category_query = f"""
+        SELECT 
+            category,
+            SUM(sales_amount) as total_sales,
+            COUNT(*) as transactions,
+            AVG(sales_amount) as avg_sale
+        FROM sales
+        WHERE {where_clause}
+        GROUP BY category
+        ORDER BY total_sales DESC
+    """
+    
+    category_data = chart_data(conn, category_query, params, "Category Performance", scale=['total_sales', 'transactions'])
+    
+    fig = px.bar(
+        category_data,
+        x='category',
+        y='total_sales',
+        title="Sales by Category",
+        color='total_sales',
+        color_continuous_scale='Blues',
+        custom_data=['category']
+    )
+    
+    fig.update_layout(height=350, xaxis_title="", yaxis_title="Sales Amount ($)")
+    event = st.plotly_chart(
+        fig,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode=("points", "box"),
+        key=chart_key("category")
+    )
+    sync_selection("category", event)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@dashboard_section("Top Products", depends_on=FILTER_COLUMNS, selects="product")
+def top_products_section(conn, filter_spec):
+    """Ten best-selling products"""
+    where_clause, params = filter_spec.to_sql()
+    
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.subheader("🏆 Top Products")
+    
+    product_query = f"""
+        SELECT 
+            product,
+            SUM(sales_amount) as total_sales,
+            SUM(quantity) as total_quantity
+        FROM sales
+        WHERE {where_clause}
+        GROUP BY product
+        ORDER BY total_sales DESC
+        LIMIT 10
+    """
+    
+    product_data = chart_data(conn, product_query, params, "Top Products", scale=['total_sales', 'total_quantity'])
+    
+    fig = px.bar(
+        product_data,
+        x='total_sales',
+        y='product',
+        orientation='h',
+        title="Top 10 Products by Sales",
+        color='total_sales',
+        color_continuous_scale='Viridis',
+        custom_data=['product']
+    )
+    
+    fig.update_layout(height=350, xaxis_title="Sales Amount ($)", yaxis_title="")
+    event = st.plotly_chart(
+        fig,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode=("points", "box"),
+        key=chart_key("product")
+    )
+    sync_selection("product", event)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@dashboard_section("Price vs Quantity", depends_on=FILTER_COLUMNS)
+def scatter_section(conn, filter_spec):
+    """Sampled price/quantity scatter"""
+    where_clause, params = filter_spec.to_sql()
+    
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.subheader("💰 Price vs Quantity Analysis")
+    
+    scatter_query = f"""
+        SELECT 
+            unit_price,
+            quantity,
+            discount,
+            sales_amount
+        FROM sales
+        WHERE {where_clause}
+        LIMIT 5000
+    """
+    
+    scatter_data = conn.execute(scatter_query, params).fetchdf()
+    
+    fig = px.scatter(
+        scatter_data,
+        x='unit_price',
+        y='quantity',
+        size='sales_amount',
+        color='discount',
+        title="Unit Price vs Quantity",
+        hover_data=['sales_amount']
+    )
+    
+    fig.update_layout(height=350)
+    st.plotly_chart(fig, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@dashboard_section("Sales Distribution", depends_on=FILTER_COLUMNS)
+def distribution_section(conn, filter_spec):
+    """Transactions per sales-amount bucket"""
+    where_clause, params = filter_spec.to_sql()
+    
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.subheader("📊 Sales Distribution")
+    
+    dist_query = f"""
+        SELECT 
+            sales_bucket,
+            COUNT(*) as count
+        FROM (
+            SELECT 
+                CASE 
+                    WHEN sales_amount < 50 THEN '< $50'
+                    WHEN sales_amount < 100 THEN '$50-$100'
+                    WHEN sales_amount < 200 THEN '$100-$200'
+                    WHEN sales_amount < 500 THEN '$200-$500'
+                    ELSE '> $500'
+                END as sales_bucket
+            FROM sales
+            WHERE {where_clause}
+        ) subquery
+        GROUP BY sales_bucket
+        ORDER BY 
+            CASE sales_bucket
+                WHEN '< $50' THEN 1
+                WHEN '$50-$100' THEN 2
+                WHEN '$100-$200' THEN 3
+                WHEN '$200-$500' THEN 4
+                WHEN '> $500' THEN 5
+            END
+    """
+    
+    dist_data = chart_data(conn, dist_query, params, "Sales Distribution", scale=['count'])
+    
+    fig = px.bar(
+        dist_data,
+        x='sales_bucket',
+        y='count',
+        title="Sales Amount Distribution",
+        color='count',
+        color_continuous_scale='Reds'
+    )
+    
+    fig.update_layout(height=350, xaxis_title="Sales Amount", yaxis_title="Number of Transactions")
+    st.plotly_chart(fig, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# Rows per page of the Detailed Data table
+DETAIL_PAGE_SIZE = 1000
+
+def detail_rows_query(where_clause):
+    """Filtered rows shown in the data table and written by exports"""
+    return f"""
+        SELECT 
+            date,
+            region,
+            category,
+            product,
+            quantity,
+            unit_price,
+            discount,
+            sales_amount
+        FROM sales
+        WHERE {where_clause}
+        ORDER BY date DESC, sales_amount DESC
+    """
+
+@dashboard_section("Detailed Data", depends_on=FILTER_COLUMNS)
+def detail_table_section(conn, filter_spec, filtered_count, memory_mb):
+    """Filtered rows, newest and largest first, one page at a time"""
+    where_clause, params = filter_spec.to_sql()
+    
+    # Data info
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.write(f"Total: {filtered_count:,} filtered records")
+    
+    with col2:
+        st.write(f"Memory usage: {memory_mb:.2f} MB for this table")
+    
+    # Only one page is queried and sent to the browser; the export below
+    # writes every row
+    pages = max((filtered_count - 1) // DETAIL_PAGE_SIZE + 1, 1)
+    if st.session_state.get("detail_page", 1) > pages:
+        st.session_state["detail_page"] = 1
+    with col3:
+        page = st.number_input(
+            f"Page (of {pages:,}, {DETAIL_PAGE_SIZE:,} rows each)",
+            min_value=1, max_value=pages, value=1, key="detail_page"
+        )
+    
+    page_data = conn.execute(
+        detail_rows_query(where_clause) + " LIMIT ? OFFSET ?",
+        params + [DETAIL_PAGE_SIZE, (page - 1) * DETAIL_PAGE_SIZE]
+    ).fetchdf()
+    
+    # Format for display
+    display_data = page_data.copy()
+    display_data['unit_price'] = display_data['unit_price'].round(2)
+    display_data['discount'] = (display_data['discount'] * 100).round(1).astype(str) + '%'
+    display_data['sales_amount'] = display_data['sales_amount'].round(2)
+    
+    # Display dataframe with height limit for scrolling
+    st.dataframe(
+        display_data, 
+        use_container_width=True,
+        height=500
+    )
+
+@st.fragment
+def export_section(conn, filter_spec):
+    """Export the filtered rows to CSV or zstd Parquet without loading them in Python"""
+    where_clause, params = with_cross_filters(filter_spec, active_cross_filters()).to_sql()
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        export_format = st.radio(
+            "Format",
+            options=list(EXPORT_FORMATS),
+            format_func=lambda f: EXPORT_FORMATS[f]["label"],
+            horizontal=True,
+            key="export_format"
+        )
+    with col2:
+        if st.button("📤 Export filtered data", use_container_width=True, key="export_start"):
+            st.session_state["export_job"] = start_export(
+                get_job_runner(), conn, detail_rows_query(where_clause), params, export_format, name="sales"
+            )
+    
+    job = st.session_state.get("export_job")
+    if job is None:
+        return
+    if not job.done:
+        show_job_progress(job)
+    else:
+        show_export_result(job)
+
+def show_export_result(job):
+    """Download for a finished export, or its error"""
+    if job.error is not None:
+        st.error(f"Export failed: {job.error}")
+        return
+    
+    parts = export_parts(job)
+    st.success(f"✅ {job.info['name']} ready ({export_size(job) / 1024**2:,.1f} MB in {len(parts)} part(s))")
+    static = st.get_option("server.enableStaticServing")
+    for part in parts:
+        label = f"⬇️ {part['file_name']} ({part['size'] / 1024**2:,.1f} MB)"
+        if static and part["url"]:
+            # Streamed from disk by Streamlit's static file handler; the
+            # download attribute saves it instead of showing it as text
+            st.markdown(f'<a href="{part["url"]}" download="{part["file_name"]}">{label}</a>', unsafe_allow_html=True)
+        else:
+            # Read (and closed again) only when clicked, one part at a time
+            st.download_button(
+                label,
+                data=lambda part=part: read_part(part),
+                file_name=part["file_name"],
+                mime=job.info["mime"],
+                key=f"export_download_{part['file_name']}"
+            )
+
 # Main function
 def main():
     st.title("🦆 DuckDB Analytics Dashboard")
     st.markdown("*High-performance analytics with DuckDB and Parquet files*")
     
-    # Initialize connection and data
-    conn = get_duckdb_connection()
+    # Query profiling: ?profile=1 in the URL or the sidebar toggle
+    profile_enabled = st.session_state.get("profile_mode", st.query_params.get("profile") == "1")
+    
+    # Initialize connection and data; every query goes through the profiler
+    conn = ProfiledConnection(get_duckdb_connection(), measure=profile_enabled)
     
     # Generate or load data
     with st.spinner("Preparing data..."):
         parquet_path, total_records = generate_sample_data()
         
-        # Load data into DuckDB
-        conn.execute(f"""
-            CREATE OR REPLACE TABLE sales AS 
-            SELECT * FROM read_parquet('{parquet_path}')
-        """)
+        # Load data into DuckDB once per connection, not on every rerun
+        sales_loaded = conn.execute(
+            "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = 'sales'"
+        ).fetchone()[0]
+        if not sales_loaded:
+            conn.execute(f"""
+                CREATE OR REPLACE TABLE sales AS 
+                SELECT * FROM read_parquet('{parquet_path}')
+            """)
+            clear_result_cache()
+            # Build the preview sample up front so the first preview is fast
+            ensure_sample_table(conn, PREVIEW_RATE)
         
         # Get table memory usage - simplified approach
-        row_count = conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+        row_count = conn.execute("SELECT COUNT(*) FROM sales", cache=True).fetchone()[0]
         
         # Estimate memory usage based on data types
         # String columns: average length * count
@@ -162,7 +795,7 @@ def main():
                 MIN(date) as start_date,
                 MAX(date) as end_date
             FROM sales
-        """).fetchone()
+        """, cache=True).fetchone()
     
     # Data info banner
     with st.container():
@@ -178,6 +811,9 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
+    # Filled in at the end of the run, once every query has executed
+    profile_slot = st.container() if profile_enabled else None
+    
     # Sidebar for filters
     st.sidebar.markdown('<div class="sidebar-filter">', unsafe_allow_html=True)
     st.sidebar.markdown("### 🔍 Filters")
@@ -188,11 +824,11 @@ def main():
             st.markdown("""
             **🎯 Quick Guide:**
             
-            **1. Select Categories** → Products update automatically
+            **1. Select Categories** → Products update after Apply
             **2. Choose Date Range** → Filter by time period  
             **3. Pick Regions** → Geographic filtering
             **4. Set Amount/Quantity** → Value ranges
-            **5. Click Apply** → All charts update instantly
+            **5. Click Apply** → All charts update in one step
             
             **💡 Pro Tips:**
             - Start broad, then narrow down
@@ -200,17 +836,28 @@ def main():
             - Combine filters for precise insights
             
             **🔧 How It Works:**
-            - Streamlit reruns page automatically
+            - Filter edits are batched until you click Apply
+            - Turn on Live updates to rerun on every change
             - DuckDB executes optimized SQL queries
             - All visualizations update with your filters
             - Memory usage shows ~2.5MB for full dataset
             """)
     
+    # Filters are batched in a form so setting several of them costs one
+    # query batch; live mode reruns on every widget change instead
+    live_filters = st.sidebar.toggle(
+        "⚡ Live updates",
+        value=False,
+        key="live_filters",
+        help="Apply each filter change immediately instead of waiting for Apply"
+    )
+    filter_box = st.sidebar.container() if live_filters else st.sidebar.form("filter_form", border=False)
+    
     # Date range filter
     min_date = data_info[4].date()
     max_date = data_info[5].date()
     
-    date_range = st.sidebar.date_input(
+    date_range = filter_box.date_input(
         "📅 Date Range",
         value=[min_date, max_date],
         min_value=min_date,
@@ -219,8 +866,8 @@ def main():
     )
     
     # Region filter
-    regions = conn.execute("SELECT DISTINCT region FROM sales ORDER BY region").fetchall()
-    selected_regions = st.sidebar.multiselect(
+    regions = conn.execute("SELECT DISTINCT region FROM sales ORDER BY region", cache=True).fetchall()
+    selected_regions = filter_box.multiselect(
         "🌍 Regions",
         options=[r[0] for r in regions],
         default=[r[0] for r in regions],
@@ -228,35 +875,17 @@ def main():
     )
     
     # Category filter
-    categories = conn.execute("SELECT DISTINCT category FROM sales ORDER BY category").fetchall()
-    selected_categories = st.sidebar.multiselect(
+    categories = conn.execute("SELECT DISTINCT category FROM sales ORDER BY category", cache=True).fetchall()
+    selected_categories = filter_box.multiselect(
         "📦 Categories",
         options=[c[0] for c in categories],
         default=[c[0] for c in categories],
         key="category_filter"
     )
     
-    # Product filter (dependent on selected categories)
-    if selected_categories:
-        product_query = f"""
-            SELECT DISTINCT product 
-            FROM sales 
-            WHERE category IN ({','.join([f"'{cat}'" for cat in selected_categories])})
-            ORDER BY product
-        """
-        products = conn.execute(product_query).fetchall()
-        selected_products = st.sidebar.multiselect(
-            "🛍️ Products",
-            options=[p[0] for p in products],
-            default=[],
-            key="product_filter"
-        )
-    else:
-        selected_products = []
-    
     # Sales amount range
-    sales_range = conn.execute("SELECT MIN(sales_amount), MAX(sales_amount) FROM sales").fetchone()
-    min_sales, max_sales = st.sidebar.slider(
+    sales_range = conn.execute("SELECT MIN(sales_amount), MAX(sales_amount) FROM sales", cache=True).fetchone()
+    min_sales, max_sales = filter_box.slider(
         "💰 Sales Amount Range",
         min_value=0.0,
         max_value=float(sales_range[1]),
@@ -266,8 +895,8 @@ def main():
     )
     
     # Quantity range
-    qty_range = conn.execute("SELECT MIN(quantity), MAX(quantity) FROM sales").fetchone()
-    min_qty, max_qty = st.sidebar.slider(
+    qty_range = conn.execute("SELECT MIN(quantity), MAX(quantity) FROM sales", cache=True).fetchone()
+    min_qty, max_qty = filter_box.slider(
         "📦 Quantity Range",
         min_value=int(qty_range[0]),
         max_value=int(qty_range[1]),
@@ -275,98 +904,187 @@ def main():
         key="qty_filter"
     )
     
-    st.sidebar.markdown('</div>', unsafe_allow_html=True)
+    applied = live_filters or filter_box.form_submit_button("✅ Apply Filters", type="primary", use_container_width=True)
     
-    # Build WHERE clause for filters
-    where_conditions = []
-    params = []
+    # The product picker sits outside the form, so in form mode its
+    # selection only takes effect when Apply is clicked, not on any rerun
+    if applied:
+        st.session_state["applied_products"] = st.session_state.get("product_filter", [])
     
-    if len(date_range) == 2:
-        where_conditions.append("date BETWEEN ? AND ?")
-        params.extend([date_range[0], date_range[1]])
+    # Product filter (dependent on the applied categories). The catalog can
+    # be huge, so products are searched server-side instead of listed
+    if selected_categories:
+        selected_products = st.session_state.get("applied_products", [])
+        with st.sidebar:
+            product_picker(
+                conn,
+                get_product_index(conn, data_info[0]),
+                tuple(selected_categories),
+                selected_products,
+                live_filters
+            )
+    else:
+        selected_products = []
     
-    if selected_regions:
-        where_conditions.append(f"region IN ({','.join(['?' for _ in selected_regions])})")
-        params.extend(selected_regions)
+    st.sidebar.markdown('</div>', unsafe_allow_html=True)
     
-    if selected_categories:
-        where_conditions.append(f"category IN ({','.join(['?' for _ in selected_categories])})")
-        params.extend(selected_categories)
+    # Approximate mode trades exactness for speed on very large tables
+    st.sidebar.markdown("### ⚡ Performance")
+    approx_mode = st.sidebar.toggle("Approximate KPIs", value=False, key="approx_mode")
+    if approx_mode:
+        sample_method = st.sidebar.radio(
+            "Sampling",
+            options=["sample", "block"],
+            format_func=lambda m: "Sample table" if m == "sample" else "Block sampling",
+            horizontal=True,
+            key="approx_method"
+        )
+        sample_rate = st.sidebar.select_slider(
+            "Sample rate",
+            options=[0.01, 0.05, 0.1, 0.25],
+            value=0.1,
+            format_func=lambda r: f"{r:.0%}",
+            key="approx_rate"
+        )
+        refine_exact = st.sidebar.checkbox("Refine to exact in background", value=True, key="approx_refine")
     
-    if selected_products:
-        where_conditions.append(f"product IN ({','.join(['?' for _ in selected_products])})")
-        params.extend(selected_products)
+    # Progressive loading paints charts from the sample first and swaps in
+    # exact results as background queries finish
+    progressive_mode = st.sidebar.toggle(
+        "Progressive loading",
+        value=False,
+        key="progressive_mode",
+        help="Show sample-based previews first, then exact results in place"
+    )
     
-    where_conditions.append("sales_amount BETWEEN ? AND ?")
-    params.extend([min_sales, max_sales])
+    st.sidebar.toggle(
+        "⏱️ Query Profile",
+        value=profile_enabled,
+        key="profile_mode",
+        help="Time every query on this page (also enabled with ?profile=1)"
+    )
     
-    where_conditions.append("quantity BETWEEN ? AND ?")
-    params.extend([min_qty, max_qty])
+    # Build WHERE clause for filters
+    filter_spec = (
+        FilterSpec()
+        .date_range("date", date_range)
+        .isin("region", selected_regions)
+        .isin("category", selected_categories)
+        .isin("product", selected_products)
+        .between("sales_amount", min_sales, max_sales)
+        .between("quantity", min_qty, max_qty)
+    )
     
-    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+    # Drop predicates that cover the whole column (the sidebar defaults), so
+    # DuckDB doesn't evaluate them per row and equivalent states share a key
+    filter_catalog = {
+        "date": {"min": data_info[4], "max": data_info[5]},
+        "region": {"values": [r[0] for r in regions]},
+        "category": {"values": [c[0] for c in categories]},
+        "sales_amount": {"min": sales_range[0], "max": sales_range[1]},
+        "quantity": {"min": qty_range[0], "max": qty_range[1]},
+    }
+    filter_spec = filter_spec.normalize(filter_catalog)
     
-    # Execute filtered query
-    filtered_query = f"""
-        SELECT 
-            date,
-            region,
-            category,
-            product,
-            quantity,
-            unit_price,
-            discount,
-            sales_amount,
-            customer_id,
-            sales_rep,
-            store_id
-        FROM sales
-        WHERE {where_clause}
-    """
+    # Chart selections only hold under the sidebar filter they were made in
+    reset_on_filter_change(filter_spec)
+    cross_filters = active_cross_filters()
+    where_clause, params = with_cross_filters(filter_spec, cross_filters).to_sql()
     
-    filtered_data = conn.execute(filtered_query, params).fetchdf()
+    # Count matching rows; the rows themselves are only fetched by the
+    # sections that display them
+    filtered_count = conn.execute(f"SELECT COUNT(*) FROM sales WHERE {where_clause}", params, cache=True).fetchone()[0]
     
     # Display filtered record count
-    st.info(f"📊 Showing {len(filtered_data):,} records (filtered from {data_info[0]:,} total records)")
+    st.info(f"📊 Showing {filtered_count:,} records (filtered from {data_info[0]:,} total records)")
+    
+    # Selections made by clicking chart marks
+    if cross_filters:
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown("🎯 **Chart selections:** " + " | ".join(
+                f"{column.capitalize()}: {', '.join(map(str, values))}" for column, values in sorted(cross_filters.items())
+            ))
+        with col2:
+            st.button("✖ Clear selections", on_click=clear_cross_filters, use_container_width=True)
     
-    if len(filtered_data) == 0:
+    if filtered_count == 0:
         st.warning("No data matches the selected filters. Please adjust your filter criteria.")
+        if profile_enabled:
+            render_query_profile(profile_slot, conn)
         return
     
-    # KPIs using DuckDB aggregations
-    kpi_query = f"""
-        SELECT 
-            COUNT(*) as total_transactions,
-            SUM(sales_amount) as total_sales,
-            AVG(sales_amount) as avg_sale,
-            SUM(quantity) as total_quantity,
-            AVG(discount) * 100 as avg_discount_pct
-        FROM sales
-        WHERE {where_clause}
-    """
+    # Each section below is its own fragment working from the same spec
+    if approx_mode:
+        approx_settings = dict(rate=sample_rate, method=sample_method, refine=refine_exact)
+    elif progressive_mode:
+        # KPIs preview from the same sample and refine like the charts
+        approx_settings = dict(rate=PREVIEW_RATE, method="sample", refine=True)
+    else:
+        approx_settings = None
+    kpi_section(conn, filter_spec, approx_settings)
     
-    kpi_data = conn.execute(kpi_query, params).fetchone()
+    code_section("💻 KPIs Code", KPI_CODE, key="code_kpis")
     
-    # Display KPIs
-    col1, col2, col3, col4, col5 = st.columns(5)
+    # Charts section
+    st.markdown("---")
+    
+    # Sales trend over time
+    trend_start, trend_end = (date_range if len(date_range) == 2 else (min_date, max_date))
+    col1, col2 = st.columns([2, 1])
     
     with col1:
-        st.metric("Transactions", f"{kpi_data[0]:,}")
+        trend_section(conn, filter_spec, trend_start, trend_end)
     
     with col2:
-        st.metric("Total Sales", f"${kpi_data[1]:,.2f}")
+        region_section(conn, filter_spec)
+
+    code_section("💻 Charts Code", CHARTS_CODE, key="code_charts")
     
-    with col3:
-        st.metric("Avg Sale", f"${kpi_data[2]:,.2f}")
+    # Category performance
+    col1, col2 = st.columns(2)
     
-    with col4:
-        st.metric("Total Quantity", f"{kpi_data[3]:,}")
+    with col1:
+        category_section(conn, filter_spec)
     
-    with col5:
-        st.metric("Avg Discount", f"{kpi_data[4]:.1f}%")
+    with col2:
+        top_products_section(conn, filter_spec)
+
+    code_section("💻 Category & Product Code", CATEGORY_PRODUCT_CODE, key="code_category_product")
+    
+    # Advanced analytics section
+    st.markdown("---")
+    st.subheader("🔬 Advanced Analytics")
     
-    # KPIs Code Section
-    with st.expander("💻 KPIs Code", expanded=False):
-        st.code('''
+    # Correlation analysis
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        scatter_section(conn, filter_spec)
+    
+    with col2:
+        distribution_section(conn, filter_spec)
+
+    code_section("💻 Advanced Analytics Code", ADVANCED_ANALYTICS_CODE, key="code_advanced")
+    
+    # Data table with simple display
+    st.markdown("---")
+    st.subheader("📋 Detailed Data")
+    
+    detail_table_section(conn, filter_spec, filtered_count, memory_mb)
+    
+    # Export of the same rows, written by DuckDB in the background
+    st.markdown("#### 📤 Export")
+    export_section(conn, filter_spec)
+    
+    code_section("💻 Data Table & Performance Code", DATA_TABLE_CODE, key="code_data_table")
+    code_section("💻 DuckDB Code Examples", DUCKDB_EXAMPLES_CODE, key="code_duckdb_examples")
+    
+    if profile_enabled:
+        render_query_profile(profile_slot, conn)
+
+# Code samples shown by the "💻" toggles
+KPI_CODE = '''
 # KPIs using DuckDB aggregations
 kpi_query = f"""
     SELECT 
@@ -398,109 +1116,40 @@ with col4:
 
 with col5:
     st.metric("Avg Discount", f"{kpi_data[4]:.1f}%")
-        ''', language='python')
-    
-    # Charts section
-    st.markdown("---")
-    
-    # Sales trend over time
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.subheader("📈 Sales Trend")
-        
-        trend_query = f"""
-            SELECT 
-                DATE_TRUNC('month', date) as month,
-                SUM(sales_amount) as monthly_sales,
-                COUNT(*) as transactions
-            FROM sales
-            WHERE {where_clause}
-            GROUP BY DATE_TRUNC('month', date)
-            ORDER BY month
-        """
-        
-        trend_data = conn.execute(trend_query, params).fetchdf()
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=trend_data['month'],
-            y=trend_data['monthly_sales'],
-            mode='lines+markers',
-            name='Sales',
-            line=dict(color='#1f77b4', width=3)
-        ))
-        
-        fig.update_layout(
-            title="Monthly Sales Trend",
-            xaxis_title="Month",
-            yaxis_title="Sales Amount ($)",
-            height=400,
-            hovermode='x unified'
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.subheader("🥧 Sales by Region")
-        
-        region_query = f"""
-            SELECT 
-                region,
-                SUM(sales_amount) as total_sales
-            FROM sales
-            WHERE {where_clause}
-            GROUP BY region
-            ORDER BY total_sales DESC
-        """
-        
-        region_data = conn.execute(region_query, params).fetchdf()
-        
-        fig = px.pie(
-            region_data,
-            values='total_sales',
-            names='region',
-            title="Regional Distribution"
-        )
-        
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        fig.update_layout(height=400)
-        
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        '''
+
+CHARTS_CODE = '''
+# Sales Trend Chart - bucket size adapts to the selected date range
+granularity = choose_granularity(date_range[0], date_range[1])  # day/week/month/quarter
 
-    # Charts Code Section
-    with st.expander("💻 Charts Code", expanded=False):
-        st.code('''
-# Sales Trend Chart
 trend_query = f"""
     SELECT 
-        DATE_TRUNC('month', date) as month,
-        SUM(sales_amount) as monthly_sales,
+        DATE_TRUNC('{granularity}', date) as period,
+        SUM(sales_amount) as period_sales,
         COUNT(*) as transactions
     FROM sales
     WHERE {where_clause}
-    GROUP BY DATE_TRUNC('month', date)
-    ORDER BY month
+    GROUP BY DATE_TRUNC('{granularity}', date)
+    ORDER BY period
 """
 
 trend_data = conn.execute(trend_query, params).fetchdf()
 
+# Cap the points sent to the browser (LTTB keeps the shape and the extremes)
+trend_data = downsample(trend_data, 'period', 'period_sales', max_points_for_width())
+
 fig = go.Figure()
 fig.add_trace(go.Scatter(
-    x=trend_data['month'],
-    y=trend_data['monthly_sales'],
+    x=trend_data['period'],
+    y=trend_data['period_sales'],
     mode='lines+markers',
     name='Sales',
     line=dict(color='#1f77b4', width=3)
 ))
 
 fig.update_layout(
-    title="Monthly Sales Trend",
-    xaxis_title="Month",
+    title=f"{GRANULARITY_LABELS[granularity]} Sales Trend",
+    xaxis_title=granularity.capitalize(),
     yaxis_title="Sales Amount ($)",
     height=400
 )
@@ -531,77 +1180,9 @@ fig.update_traces(textposition='inside', textinfo='percent+label')
 fig.update_layout(height=400)
 
 st.plotly_chart(fig, use_container_width=True)
-        ''', language='python')
-    
-    # Category performance
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.subheader("📦 Category Performance")
-        
-        category_query = f"""
-            SELECT 
-                category,
-                SUM(sales_amount) as total_sales,
-                COUNT(*) as transactions,
-                AVG(sales_amount) as avg_sale
-            FROM sales
-            WHERE {where_clause}
-            GROUP BY category
-            ORDER BY total_sales DESC
-        """
-        
-        category_data = conn.execute(category_query, params).fetchdf()
-        
-        fig = px.bar(
-            category_data,
-            x='category',
-            y='total_sales',
-            title="Sales by Category",
-            color='total_sales',
-            color_continuous_scale='Blues'
-        )
-        
-        fig.update_layout(height=350, xaxis_title="", yaxis_title="Sales Amount ($)")
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.subheader("🏆 Top Products")
-        
-        product_query = f"""
-            SELECT 
-                product,
-                SUM(sales_amount) as total_sales,
-                SUM(quantity) as total_quantity
-            FROM sales
-            WHERE {where_clause}
-            GROUP BY product
-            ORDER BY total_sales DESC
-            LIMIT 10
-        """
-        
-        product_data = conn.execute(product_query, params).fetchdf()
-        
-        fig = px.bar(
-            product_data,
-            x='total_sales',
-            y='product',
-            orientation='h',
-            title="Top 10 Products by Sales",
-            color='total_sales',
-            color_continuous_scale='Viridis'
-        )
-        
-        fig.update_layout(height=350, xaxis_title="Sales Amount ($)", yaxis_title="")
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        '''
 
-    # Category & Product Charts Code Section
-    with st.expander("💻 Category & Product Code", expanded=False):
-        st.code('''
+CATEGORY_PRODUCT_CODE = '''
 # Category Performance Bar Chart
 category_query = f"""
     SELECT 
@@ -656,95 +1237,9 @@ fig = px.bar(
 
 fig.update_layout(height=350, xaxis_title="Sales Amount ($)", yaxis_title="")
 st.plotly_chart(fig, use_container_width=True)
-        ''', language='python')
-    
-    # Advanced analytics section
-    st.markdown("---")
-    st.subheader("🔬 Advanced Analytics")
-    
-    # Correlation analysis
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.subheader("💰 Price vs Quantity Analysis")
-        
-        scatter_query = f"""
-            SELECT 
-                unit_price,
-                quantity,
-                discount,
-                sales_amount
-            FROM sales
-            WHERE {where_clause}
-            LIMIT 5000
-        """
-        
-        scatter_data = conn.execute(scatter_query, params).fetchdf()
-        
-        fig = px.scatter(
-            scatter_data,
-            x='unit_price',
-            y='quantity',
-            size='sales_amount',
-            color='discount',
-            title="Unit Price vs Quantity",
-            hover_data=['sales_amount']
-        )
-        
-        fig.update_layout(height=350)
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.subheader("📊 Sales Distribution")
-        
-        dist_query = f"""
-            SELECT 
-                sales_bucket,
-                COUNT(*) as count
-            FROM (
-                SELECT 
-                    CASE 
-                        WHEN sales_amount < 50 THEN '< $50'
-                        WHEN sales_amount < 100 THEN '$50-$100'
-                        WHEN sales_amount < 200 THEN '$100-$200'
-                        WHEN sales_amount < 500 THEN '$200-$500'
-                        ELSE '> $500'
-                    END as sales_bucket
-                FROM sales
-                WHERE {where_clause}
-            ) subquery
-            GROUP BY sales_bucket
-            ORDER BY 
-                CASE sales_bucket
-                    WHEN '< $50' THEN 1
-                    WHEN '$50-$100' THEN 2
-                    WHEN '$100-$200' THEN 3
-                    WHEN '$200-$500' THEN 4
-                    WHEN '> $500' THEN 5
-                END
-        """
-        
-        dist_data = conn.execute(dist_query, params).fetchdf()
-        
-        fig = px.bar(
-            dist_data,
-            x='sales_bucket',
-            y='count',
-            title="Sales Amount Distribution",
-            color='count',
-            color_continuous_scale='Reds'
-        )
-        
-        fig.update_layout(height=350, xaxis_title="Sales Amount", yaxis_title="Number of Transactions")
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        '''
 
-    # Advanced Analytics Code Section
-    with st.expander("💻 Advanced Analytics Code", expanded=False):
-        st.code('''
+ADVANCED_ANALYTICS_CODE = '''
 # Price vs Quantity Scatter Plot
 scatter_query = f"""
     SELECT 
@@ -813,56 +1308,15 @@ fig = px.bar(
 
 fig.update_layout(height=350, xaxis_title="Sales Amount", yaxis_title="Number of Transactions")
 st.plotly_chart(fig, use_container_width=True)
-        ''', language='python')
-    # Data table with simple display
-    st.markdown("---")
-    st.subheader("📋 Detailed Data")
-    
-    # Data info
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.write(f"Total: {len(filtered_data):,} filtered records")
-    
-    with col2:
-        st.write(f"Memory usage: {memory_mb:.2f} MB for this table")
-    
-    # Get all data (Streamlit will handle scrolling)
-    full_data_query = f"""
-        SELECT 
-            date,
-            region,
-            category,
-            product,
-            quantity,
-            unit_price,
-            discount,
-            sales_amount
-        FROM sales
-        WHERE {where_clause}
-        ORDER BY date DESC, sales_amount DESC
-    """
-    
-    full_data = conn.execute(full_data_query, params).fetchdf()
-    
-    # Format for display
-    display_data = full_data.copy()
-    display_data['unit_price'] = display_data['unit_price'].round(2)
-    display_data['discount'] = (display_data['discount'] * 100).round(1).astype(str) + '%'
-    display_data['sales_amount'] = display_data['sales_amount'].round(2)
-    
-    # Display dataframe with height limit for scrolling
-    st.dataframe(
-        display_data, 
-        use_container_width=True,
-        height=500
-    )
-    
-    # Data Table & Performance Code Section
-    with st.expander("💻 Data Table & Performance Code", expanded=False):
-        st.code('''
-# Full Data Display (no artificial limits)
-full_data_query = f"""
+        '''
+
+DATA_TABLE_CODE = '''
+# Paged Data Display: one page is queried and sent to the browser
+page_size = 1000
+pages = max((filtered_count - 1) // page_size + 1, 1)
+page = st.number_input("Page", min_value=1, max_value=pages, value=1)
+
+page_query = f"""
     SELECT 
         date,
         region,
@@ -875,12 +1329,13 @@ full_data_query = f"""
     FROM sales
     WHERE {where_clause}
     ORDER BY date DESC, sales_amount DESC
+    LIMIT ? OFFSET ?
 """
 
-full_data = conn.execute(full_data_query, params).fetchdf()
+page_data = conn.execute(page_query, params + [page_size, (page - 1) * page_size]).fetchdf()
 
 # Format for display
-display_data = full_data.copy()
+display_data = page_data.copy()
 display_data['unit_price'] = display_data['unit_price'].round(2)
 display_data['discount'] = (display_data['discount'] * 100).round(1).astype(str) + '%'
 display_data['sales_amount'] = display_data['sales_amount'].round(2)
@@ -900,13 +1355,12 @@ with col1:
 
 with col2:
     st.metric("Total Rows", f"{memory_info[0]:,}")
-        ''', language='python')
-    
-    # Code section
-    with st.expander("💻 DuckDB Code Examples", expanded=False):
-        st.code('''
-# Initialize DuckDB connection
-conn = duckdb.connect(":memory:")
+        '''
+
+DUCKDB_EXAMPLES_CODE = '''
+# Initialize DuckDB connection with resource limits
+# (threads, memory_limit, temp_directory... from the [duckdb] section of config.toml)
+conn = duckdb.connect(":memory:", config={"threads": 4, "memory_limit": "2GB", "temp_directory": ".duckdb_tmp"})
 conn.execute("INSTALL httpfs")
 conn.execute("LOAD httpfs")
 
@@ -936,7 +1390,7 @@ correlation_query = """
         CORR(discount, sales_amount) as discount_sales_corr
     FROM sales
 """
-        ''', language='python')
+        '''
 
 if __name__ == "__main__":
     main()
@@ -319,17 +319,33 @@ st.markdown("""
 
 code = '''import plotly.express as px
 import plotly.graph_objects as go
+from utils.trend import (
+    GRANULARITY_LABELS,
+    choose_granularity,
+    downsample,
+    max_points_for_width,
+)
+
+# Pandas period code for each bucket size (weeks start on Monday)
+PERIOD_CODES = {'day': 'D', 'week': 'W', 'month': 'M', 'quarter': 'Q'}
 
 # Line chart for sales trend
 def create_sales_trend(df):
-    # Aggregate data by date
-    daily_sales = df.groupby(df['date'].dt.date)['sales_amount'].sum().reset_index()
+    # Pick day/week/month/quarter buckets from the date span so
+    # multi-year data doesn't plot thousands of daily points
+    granularity = choose_granularity(df['date'].min(), df['date'].max())
+    
+    period_start = df['date'].dt.to_period(PERIOD_CODES[granularity]).dt.start_time
+    trend = df.groupby(period_start.rename('date'))['sales_amount'].sum().reset_index()
+    
+    # Bound the points sent to the browser while keeping peaks and dips
+    trend = downsample(trend, 'date', 'sales_amount', max_points_for_width())
     
     fig = px.line(
-        daily_sales, 
+        trend, 
         x='date', 
         y='sales_amount',
-        title="Daily Sales Trend",
+        title=f"{GRANULARITY_LABELS[granularity]} Sales Trend",
         labels={'sales_amount': 'Sales Amount ($)', 'date': 'Date'}
     )
     
@@ -437,11 +453,11 @@ date_range = st.sidebar.date_input(
     max_value=max_date
 )
 
-# Filter data based on date selection
-filtered_df = df[
-    (df['date'].dt.date >= date_range[0]) & 
-    (df['date'].dt.date <= date_range[1])
-]'''
+# Filter data based on date selection: the cached get_date_index() (see
+# Performance Optimization) sorts once per dataset version, then each
+# rerun slices with two binary searches instead of comparing every row
+date_index = get_date_index(df, DATA_VERSION)
+filtered_df = date_index.apply(FilterSpec().date_range('date', date_range))'''
 
 st.code(code, language='python')
 
@@ -560,28 +576,15 @@ st.markdown("""
 """)
 
 code = '''# Advanced KPIs using DuckDB
+from utils.filters import FilterSpec
+
 @st.cache_data
-def calculate_kpis(conn, date_range, regions, categories):
+def calculate_kpis(_conn, filter_spec):
     """Calculate KPIs using DuckDB for performance"""
     
-    # Build WHERE clause
-    where_conditions = []
-    params = []
-    
-    where_conditions.append("date BETWEEN ? AND ?")
-    params.extend([date_range[0], date_range[1]])
-    
-    if regions:
-        placeholders = ','.join(['?' for _ in regions])
-        where_conditions.append(f"region IN ({placeholders})")
-        params.extend(regions)
-    
-    if categories:
-        placeholders = ','.join(['?' for _ in categories])
-        where_conditions.append(f"category IN ({placeholders})")
-        params.extend(categories)
-    
-    where_clause = " AND ".join(where_conditions)
+    # FilterSpec is hashable and canonical, so the same selection made in
+    # a different order reuses the cached result
+    where_clause, params = filter_spec.to_sql()
     
     # Execute KPI query
     kpi_query = f"""
@@ -597,10 +600,16 @@ def calculate_kpis(conn, date_range, regions, categories):
         WHERE {where_clause}
     """
     
-    return conn.execute(kpi_query, params).fetchone()
+    return _conn.execute(kpi_query, params).fetchone()
 
 # Display advanced KPIs
-kpis = calculate_kpis(conn, date_range, selected_regions, selected_categories)
+filter_spec = (
+    FilterSpec()
+    .date_range("date", date_range)
+    .isin("region", selected_regions)
+    .isin("category", selected_categories)
+)
+kpis = calculate_kpis(conn, filter_spec)
 
 col1, col2, col3 = st.columns(3)
 
@@ -630,9 +639,12 @@ st.markdown("""
 #### 📋 **Data Tables with Export:**
 """)
 
-code = '''# Data table with download option
+code = '''# Data table with export option
+from utils.export import EXPORT_FORMATS, export_parts, read_part, start_export
+from utils.jobs import get_job_runner, show_job_progress
+
 def create_data_table(df):
-    """Create interactive data table with export"""
+    """Create interactive data table"""
     
     # Format data for display
     display_df = df.copy()
@@ -641,19 +653,42 @@ def create_data_table(df):
     display_df['discount'] = (display_df['discount'] * 100).round(1).astype(str) + '%'
     display_df['sales_amount'] = display_df['sales_amount'].round(2)
     
-    # Download button
-    csv = display_df.to_csv(index=False)
-    st.download_button(
-        label="📥 Download CSV",
-        data=csv,
-        file_name='dashboard_data.csv',
-        mime='text/csv'
-    )
-    
     # Display table
     st.dataframe(display_df, use_container_width=True, height=400)
 
-create_data_table(filtered_df)'''
+def export_data(conn, filter_spec, fmt='csv'):
+    """Let DuckDB write the filtered rows to a file in the background
+    
+    COPY streams rows straight to disk, so even multi-GB exports never
+    become a DataFrame or an in-memory CSV string.
+    """
+    where_clause, params = filter_spec.to_sql()
+    query = f"SELECT * FROM sales WHERE {where_clause}"
+    
+    if st.button("📥 Export"):
+        # Shared job pool; the file goes to this session's own directory
+        st.session_state['export_job'] = start_export(get_job_runner(), conn, query, params, fmt)
+    
+    job = st.session_state.get('export_job')
+    if job is None:
+        return
+    if not job.done:
+        show_job_progress(job)  # fragment polling every 0.5s
+    elif job.error is not None:
+        st.error(f"Export failed: {job.error}")
+    else:
+        # Large exports come in parts of ~150 MB, each read only when clicked
+        for part in export_parts(job):
+            st.download_button(
+                label=f"⬇️ {EXPORT_FORMATS[fmt]['label']}: {part['file_name']}",
+                data=lambda part=part: read_part(part),
+                file_name=part['file_name'],
+                mime=job.info['mime'],
+                key=part['file_name']
+            )
+
+create_data_table(filtered_df)
+export_data(conn, filter_spec)'''
 
 st.code(code, language='python')
 
@@ -774,6 +809,8 @@ st.markdown("""
 code = '''import streamlit as st
 import time
 
+from utils.filters import DateIndex
+
 # Cache expensive operations
 @st.cache_data(ttl=3600)  # Cache for 1 hour
 def expensive_data_processing(data):
@@ -793,21 +830,21 @@ def get_database_connection():
     conn.execute("LOAD httpfs")
     return conn
 
+# Sorted-date index, built once per dataset. _df isn't hashed, so bump
+# DATA_VERSION whenever the data changes
+DATA_VERSION = 1
+
+@st.cache_resource
+def get_date_index(_df, version):
+    """Rows sorted by date for O(log n) date-range slicing"""
+    return DateIndex(_df, 'date')
+
 # Cache with dependencies
 @st.cache_data
-def filter_data(df, date_range, regions, categories):
+def filter_data(_date_index, version, filter_spec):
     """Cache filtered data"""
-    mask = (
-        (df['date'].dt.date >= date_range[0]) & 
-        (df['date'].dt.date <= date_range[1])
-    )
-    
-    if regions:
-        mask &= df['region'].isin(regions)
-    if categories:
-        mask &= df['category'].isin(categories)
-    
-    return df[mask]'''
+    # Date range by binary search, other predicates as one vectorized mask
+    return _date_index.apply(filter_spec)'''
 
 st.code(code, language='python')
 
@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import plotly.express as px
 
+from utils.drilldown_data import dimension_values, load_drilldown_data, navigate, select_row, source_picker
+from utils.schema import show_memory_report
+
 st.set_page_config(layout="wide")
 
 # Custom CSS
@@ -34,26 +35,10 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Generate sample data
-np.random.seed(42)
-regions = ['North', 'South', 'East', 'West']
-categories = ['Electronics', 'Clothing', 'Food', 'Books']
-products = ['Laptop', 'Phone', 'Tablet', 'Shirt', 'Pants', 'Dress', 'Pizza', 'Burger', 'Novel', 'Textbook']
-
-data = []
-for region in regions:
-    for category in categories:
-        for product in np.random.choice(products, 3):
-            data.append({
-                'Region': region,
-                'Category': category,
-                'Product': product,
-                'Sales': np.random.randint(1000, 50000),
-                'Quantity': np.random.randint(10, 500),
-                'Profit': np.random.randint(100, 10000)
-            })
-
-df = pd.DataFrame(data)
+# Shared drilldown dataset, cached per source and version
+df = load_drilldown_data(source_picker())
+show_memory_report("drilldown.")
+regions, categories, products = dimension_values(df)
 
 # Get region from session state
 region = st.session_state.get('selected_region', 'North')
@@ -83,7 +68,7 @@ with col3:
 region_data = df[df['Region'] == region]
 
 # Category summary
-category_summary = region_data.groupby('Category').agg({
+category_summary = region_data.groupby('Category', observed=True).agg({
     'Sales': 'sum',
     'Quantity': 'sum',
     'Profit': 'sum',
@@ -123,33 +108,12 @@ st.markdown('</div>', unsafe_allow_html=True)
 
 # Interactive category table with links
 st.markdown('<div class="link-table">', unsafe_allow_html=True)
-st.subheader("🔗 Click on any category to explore products")
-
-# Create clickable table using buttons
-for index, (category, row) in enumerate(category_summary.iterrows()):
-    col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 1])
-    
-    with col1:
-        st.markdown(f"### 📂 {category}")
-    
-    with col2:
-        st.metric("Sales", f"${row['Sales']:,}")
-    
-    with col3:
-        st.metric("Quantity", f"{row['Quantity']:,}")
-    
-    with col4:
-        st.metric("Products", f"{row['Products']:,}")
-    
-    with col5:
-        # Use session state to pass category to products page
-        if st.button("📦 Explore", key=f"explore_{category}"):
-            st.session_state.selected_region = region
-            st.session_state.selected_category = category
-            st.switch_page("drilldown_products.py")
-    
-    if index < len(category_summary) - 1:
-        st.markdown("---")
+st.subheader("🔗 Select a category to explore products")
+
+# One selectable table; the selection is passed on through session state
+picked = select_row(category_summary.reset_index(), "categories_table", ['Category', 'Sales', 'Quantity', 'Products'])
+if picked is not None:
+    navigate("drilldown_products.py", selected_region=region, selected_category=picked['Category'])
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -172,8 +136,8 @@ with col2:
 st.markdown("---")
 st.markdown("""
 ### 💡 How to Use:
-1. **Click on any category name** above to go to the products page
-2. **Or click the "Explore" button** for the same result
+1. **Select any category row** above to go to the products page
+2. **Sort or scroll the table** - it stays fast whatever the number of rows
 3. **Use the breadcrumb navigation** to go back to regions
 4. **Continue drilling down** to see individual products
 
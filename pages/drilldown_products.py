@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import plotly.express as px
 
+from utils.drilldown_data import dimension_values, load_drilldown_data, product_rows, select_row, source_picker
+from utils.schema import show_memory_report
+
 st.set_page_config(layout="wide")
 
 # Custom CSS
@@ -42,26 +43,10 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Generate sample data
-np.random.seed(42)
-regions = ['North', 'South', 'East', 'West']
-categories = ['Electronics', 'Clothing', 'Food', 'Books']
-products = ['Laptop', 'Phone', 'Tablet', 'Shirt', 'Pants', 'Dress', 'Pizza', 'Burger', 'Novel', 'Textbook']
-
-data = []
-for region in regions:
-    for category in categories:
-        for product in np.random.choice(products, 3):
-            data.append({
-                'Region': region,
-                'Category': category,
-                'Product': product,
-                'Sales': np.random.randint(1000, 50000),
-                'Quantity': np.random.randint(10, 500),
-                'Profit': np.random.randint(100, 10000)
-            })
-
-df = pd.DataFrame(data)
+# Shared drilldown dataset, cached per source and version
+df = load_drilldown_data(source_picker())
+show_memory_report("drilldown.")
+regions, categories, products = dimension_values(df)
 
 # Get parameters from session state
 region = st.session_state.get('selected_region', 'North')
@@ -134,47 +119,41 @@ st.markdown('</div>', unsafe_allow_html=True)
 st.markdown('<div class="link-table">', unsafe_allow_html=True)
 st.subheader("📋 Detailed Product Information")
 
-# Sort by sales for better presentation
-sorted_data = filtered_data.sort_values('Sales', ascending=False)
+# Sorted by sales, with margin and performance computed for all rows at once
+sorted_data = product_rows(filtered_data)
+row = select_row(sorted_data, "products_table", ['Product', 'Sales', 'Quantity', 'Profit', 'Margin %', 'Performance'])
 
-for index, (_, row) in enumerate(sorted_data.iterrows()):
+# Detail card for the selected product only
+if row is not None:
     st.markdown(f'<div class="product-detail">', unsafe_allow_html=True)
-    
+
     col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
-    
+
     with col1:
         st.markdown(f"### 📦 {row['Product']}")
         st.write(f"**Category:** {row['Category']}")
         st.write(f"**Region:** {row['Region']}")
-    
+
     with col2:
         st.metric("Sales", f"${row['Sales']:,}")
         st.metric("Quantity", f"{row['Quantity']:,}")
-    
+
     with col3:
         st.metric("Profit", f"${row['Profit']:,}")
-        profit_margin = (row['Profit'] / row['Sales']) * 100
-        st.metric("Margin", f"{profit_margin:.1f}%")
-    
+        st.metric("Margin", f"{row['Margin %']:.1f}%")
+
     with col4:
-        # Performance indicator
-        avg_sales = filtered_data['Sales'].mean()
-        if row['Sales'] > avg_sales:
-            st.success("🔥 Above Average")
-        else:
-            st.info("📊 Below Average")
-        
+        st.markdown(f"**{row['Performance']}**")
+
         # Profit indicator
-        avg_profit = filtered_data['Profit'].mean()
-        if row['Profit'] > avg_profit:
+        if row['Profit'] > filtered_data['Profit'].mean():
             st.success("💰 High Profit")
         else:
             st.info("📈 Standard Profit")
-    
+
     st.markdown('</div>', unsafe_allow_html=True)
-    
-    if index < len(sorted_data) - 1:
-        st.markdown("---")
+else:
+    st.caption("Select a product to see its details")
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -282,8 +261,10 @@ category = query_params.get('category', 'Electronics')
 # Filter data
 filtered_data = df[(df['Region'] == region) & (df['Category'] == category)]
 
-# Detailed product view
-for _, product in filtered_data.iterrows():
+# Detailed product view: one table whatever the number of products
+event = st.dataframe(filtered_data, on_select="rerun", selection_mode="single-row", hide_index=True)
+if event.selection.rows:
+    product = filtered_data.iloc[event.selection.rows[0]]
     st.metric("Sales", f"${product['Sales']:,}")
     st.metric("Profit", f"${product['Profit']:,}")
 
@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import plotly.express as px
 
+from utils.drilldown_data import dimension_values, load_drilldown_data, navigate, select_row, source_picker
+from utils.schema import show_memory_report
+
 st.set_page_config(layout="wide")
 
 # Custom CSS
@@ -36,26 +37,10 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Generate sample data
-np.random.seed(42)
-regions = ['North', 'South', 'East', 'West']
-categories = ['Electronics', 'Clothing', 'Food', 'Books']
-products = ['Laptop', 'Phone', 'Tablet', 'Shirt', 'Pants', 'Dress', 'Pizza', 'Burger', 'Novel', 'Textbook']
-
-data = []
-for region in regions:
-    for category in categories:
-        for product in np.random.choice(products, 3):
-            data.append({
-                'Region': region,
-                'Category': category,
-                'Product': product,
-                'Sales': np.random.randint(1000, 50000),
-                'Quantity': np.random.randint(10, 500),
-                'Profit': np.random.randint(100, 10000)
-            })
-
-df = pd.DataFrame(data)
+# Shared drilldown dataset, cached per source and version
+df = load_drilldown_data(source_picker())
+show_memory_report("drilldown.")
+regions, categories, products = dimension_values(df)
 
 # Header
 st.markdown("""
@@ -69,7 +54,7 @@ st.markdown("""
 st.markdown("### 📍 Navigation: Home → Regions")
 
 # Regional summary
-region_summary = df.groupby('Region').agg({
+region_summary = df.groupby('Region', observed=True).agg({
     'Sales': 'sum',
     'Quantity': 'sum',
     'Profit': 'sum',
@@ -104,33 +89,12 @@ st.markdown('</div>', unsafe_allow_html=True)
 
 # Interactive regional table with links
 st.markdown('<div class="link-table">', unsafe_allow_html=True)
-st.subheader("🔗 Click on any region to explore categories")
-
-# Create clickable table using buttons
-for index, (region, row) in enumerate(region_summary.iterrows()):
-    col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 1])
-    
-    with col1:
-        st.markdown(f"### 🌍 {region}")
-    
-    with col2:
-        st.metric("Sales", f"${row['Sales']:,}")
-    
-    with col3:
-        st.metric("Quantity", f"{row['Quantity']:,}")
-    
-    with col4:
-        st.metric("Profit", f"${row['Profit']:,}")
-    
-    with col5:
-        # Use session state to pass region to categories page
-        if st.button("📂 Explore", key=f"explore_{region}"):
-            st.session_state.selected_region = region
-            st.session_state.current_page = "categories"
-            st.rerun()
-    
-    if index < len(region_summary) - 1:
-        st.markdown("---")
+st.subheader("🔗 Select a region to explore categories")
+
+# One selectable table; the selection is passed on through session state
+picked = select_row(region_summary.reset_index(), "regions_table", ['Region', 'Sales', 'Quantity', 'Profit'])
+if picked is not None:
+    navigate(selected_region=picked['Region'], current_page="categories")
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -138,8 +102,8 @@ st.markdown('</div>', unsafe_allow_html=True)
 st.markdown("---")
 st.markdown("""
 ### 💡 How to Use:
-1. **Click on any region name** above to go to the categories page
-2. **Or click the "Explore" button** for the same result
+1. **Select any region row** above to go to the categories page
+2. **Sort or scroll the table** - it stays fast whatever the number of rows
 3. **Use the navigation bar** to return to this page
 4. **Continue drilling down** through categories → products
 
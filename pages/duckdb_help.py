@@ -1,5 +1,8 @@
+import duckdb
 import streamlit as st
 
+from utils.db import SETTINGS, connect, effective_settings, get_duckdb_connection, load_settings
+
 st.set_page_config(
     layout="wide",
     page_title="DuckDB Filtering Help",
@@ -50,12 +53,12 @@ The DuckDB Dashboard uses **dynamic SQL filtering** with **real-time updates** t
 - 📅 **Date Range** - Filter transactions by time period
 - 🌍 **Regions** - Select one or more geographic areas  
 - 📦 **Categories** - Choose product categories to analyze
-- 🛍️ **Products** - Filter by specific products (depends on categories)
+- 🛍️ **Products** - Search and pick specific products (depends on categories)
 - 💰 **Sales Amount** - Set minimum/maximum transaction values
 - 📦 **Quantity** - Filter by transaction volume
 
 ### ⚡ **How It Works:**
-1. **Select filters** in sidebar → **Page automatically refreshes**
+1. **Select filters** in sidebar → **Click ✅ Apply Filters** (or turn on ⚡ Live updates)
 2. **DuckDB executes** optimized SQL queries → **Results update instantly**
 3. **Charts and data** update to reflect your selections
 4. **All components** stay synchronized with your filter choices
@@ -87,15 +90,16 @@ selected_categories = st.sidebar.multiselect(
 
 #### 🔄 **What Happens When You Click:**
 
-1. **Streamlit detects** your selection change
-2. **Page automatically reruns** with new filter values
-3. **Product filter updates** to show only products from your selected categories
+1. **Your edits are collected** in the filter form
+2. **Clicking Apply reruns the page once** with all new filter values
+3. **Product filter updates** to show only products from your applied categories
 4. **All queries rebuild** with your new category selection
 
 #### 💡 **Smart Dependencies:**
 - **Product filter is hidden** when no categories selected
 - **Product options change** based on your category choices
-- **Real-time updates** - No manual refresh needed
+- **Products are searched, not listed** - Type in 🔎 Search Products; at most 50 matches are sent to the browser, prefix matches first, then substring matches from DuckDB
+- **Live updates** - Optional toggle to rerun on every change
 """, unsafe_allow_html=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -107,20 +111,24 @@ The dashboard builds SQL queries dynamically based on your selections:
 
 #### 📋 **Filter Combination Example:**
 ```python
-# Build WHERE conditions
-where_conditions = []
-params = []
+from utils.filters import FilterSpec
+
+# Every dashboard describes its filters with the same FilterSpec model
+filter_spec = (
+    FilterSpec()
+    .date_range("date", date_range)
+    .isin("region", selected_regions)        # empty selection = no filter
+    .isin("category", selected_categories)
+    .between("sales_amount", min_sales, max_sales)
+)
 
-if selected_categories:
-    where_conditions.append(f"category IN ({','.join(['?' for _ in selected_categories])})")
-    params.extend(selected_categories)
+# Compiled to a parameterized WHERE clause for DuckDB...
+where_clause, params = filter_spec.to_sql()
 
-if selected_regions:
-    where_conditions.append(f"region IN ({','.join(['?' for _ in selected_regions])})")
-    params.extend(selected_regions)
+# ...or to a vectorized boolean mask for pandas
+filtered_df = filter_spec.apply(df)
 
-# Final WHERE clause
-where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+# filter_spec.key is canonical and hashable, so it works as a cache key
 ```
 
 #### 🎯 **Generated SQL:**
@@ -138,6 +146,8 @@ WHERE date BETWEEN '2024-01-01' AND '2024-12-31'
 - **Single query execution** - All filters applied in one database call
 - **Parameterized queries** - Secure and efficient SQL
 - **Automatic optimization** - DuckDB processes only matching data
+- **No-op filters dropped** - Filters covering every value (all regions, full slider range) are removed before the query is built, so the default view runs `WHERE 1=1`
+- **Shared result cache** - Equivalent filter states compile to the same SQL and reuse each other's cached results
 """, unsafe_allow_html=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -145,8 +155,13 @@ st.markdown('<div class="help-section">', unsafe_allow_html=True)
 st.markdown("""
 ### 3️⃣ **Real-Time Updates and Performance**
 
-#### 🔄 **Automatic Page Refreshes:**
-- **Every filter change** triggers `st.rerun()`
+#### 🔄 **Batched Page Refreshes:**
+- **Filters live in an `st.form`** - Setting five filters triggers one query batch, not five
+- **⚡ Live updates** - Opt in to rerun on every widget change
+- **Fragment-scoped sections** - Each chart is an `st.fragment`; changing its own controls (e.g. trend granularity) reruns only that chart
+- **Per-section timings** - With ⏱️ Query Profile on, every section shows how long it took to render
+- **Cross-filtering** - Click a region slice, category bar or product bar to filter the other charts; the clicked chart keeps its own view and unchanged charts are served from the result cache. ✖ Clear selections (or applying new sidebar filters) resets them
+- **Progressive loading** - Optional toggle that paints charts and KPIs from a 1% sample first (marked 🔍 Preview), then swaps in exact results computed in the background
 - **Session state management** - Preserves filter values
 - **Instant visual feedback** - Charts update immediately
 
@@ -171,7 +186,8 @@ st.markdown('''
 ```python
 @st.cache_resource
 def get_duckdb_connection():
-    conn = duckdb.connect(":memory:")
+    # Resource limits come from [duckdb] in config.toml / DUCKDB_* env vars
+    conn = duckdb.connect(":memory:", config=load_settings())
     conn.execute("INSTALL httpfs")
     conn.execute("LOAD httpfs")
     return conn
@@ -188,18 +204,10 @@ conn.execute(f"""
 
 #### 🔍 **Dynamic Query Building:**
 ```python
-# Build parameterized WHERE clause
+# Build parameterized WHERE clause from the shared filter model
 def build_where_clause(filters):
-    conditions = []
-    params = []
-    
-    if filters['categories']:
-        conditions.append("category IN ({})".format(
-            ','.join(['?' for _ in filters['categories']])
-        ))
-        params.extend(filters['categories'])
-    
-    return " AND ".join(conditions), params
+    spec = FilterSpec().isin("category", filters['categories'])
+    return spec.to_sql()
 ```
 
 #### ⚡ **Query Execution:**
@@ -210,6 +218,40 @@ filtered_data = conn.execute(query, params).fetchdf()
 ''', unsafe_allow_html=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
+# Resource settings
+st.subheader("⚙️ DuckDB Resource Settings")
+
+st.markdown('<div class="help-section">', unsafe_allow_html=True)
+st.markdown("""
+The dashboard connection is opened with the limits from the `[duckdb]` section of `config.toml`.
+Each value can be overridden per worker with an environment variable, and anything left out
+falls back to DuckDB's default (all cores, 80% of RAM, no spill directory). The effective
+values are read from the running dashboard connection.
+""")
+
+configured = load_settings()
+# Read from the dashboard's own shared connection. Opening it installs
+# httpfs, which needs network access; without it fall back to a plain
+# connection with the same settings so this page still renders
+try:
+    effective = effective_settings(get_duckdb_connection())
+except duckdb.Error:
+    conn = connect(settings=configured)
+    effective = effective_settings(conn)
+    conn.close()
+
+settings_rows = [
+    {
+        "Setting": name,
+        "Environment Variable": env_var,
+        "Configured": str(configured[name]) if name in configured else "(DuckDB default)",
+        "Effective": effective[name],
+    }
+    for name, (env_var, _) in SETTINGS.items()
+]
+st.dataframe(settings_rows, use_container_width=True, hide_index=True)
+st.markdown('</div>', unsafe_allow_html=True)
+
 # Tips and Best Practices
 st.subheader("💡 Pro Tips")
 
@@ -4,6 +4,23 @@ import numpy as np
 import plotly.express as px
 import time
 
+from utils.chart_data import chart_data
+from utils.db import get_duckdb_connection
+from utils.filters import FilterSpec
+from utils.ingest import (
+    PAGE_SIZE,
+    TABLE_KEY,
+    drop_session_table,
+    new_session_table,
+    preview_page,
+    start_ingest,
+    table_columns,
+    table_exists,
+    table_summary,
+)
+from utils.jobs import get_job_runner, show_job_progress
+from utils.profiling import ProfiledConnection
+
 st.set_page_config(
     page_title="Streamlit Showcase",
     page_icon="✨",
@@ -166,9 +183,85 @@ st.markdown("---")
 st.subheader("📁 File Handling")
 st.markdown('<div class="feature-card">', unsafe_allow_html=True)
 
+def upload_chart(conn, table):
+    """Sum of a numeric column by a text column, filtered like the dashboards
+    
+    The filter is a FilterSpec compiled to SQL and the query goes through
+    chart_data(), the same path as the DuckDB dashboard's charts.
+    """
+    text_columns, numeric_columns = table_columns(conn, table)
+    if not text_columns or not numeric_columns:
+        st.caption("Charts need at least one text and one numeric column")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        group = st.selectbox("Group by", text_columns, key="upload_group")
+    with col2:
+        measure = st.selectbox("Sum of", numeric_columns, key="upload_measure")
+    with col3:
+        values = [row[0] for row in conn.execute(
+            f'SELECT DISTINCT "{group}" FROM {table} WHERE "{group}" IS NOT NULL ORDER BY 1 LIMIT 1000'
+        ).fetchall()]
+        chosen = st.multiselect(f"Filter {group}", values, key=f"upload_filter_{group}")
+    
+    where_clause, params = FilterSpec().isin(group, chosen).to_sql()
+    query = f"""
+        SELECT "{group}", SUM("{measure}") AS "{measure}"
+        FROM {table}
+        WHERE {where_clause}
+        GROUP BY 1
+        ORDER BY 2 DESC
+        LIMIT 25
+    """
+    data = chart_data(conn, query, params, "Upload chart", progressive=False)
+    fig = px.bar(data, x=group, y=measure, title=f"{measure} by {group} (top 25)")
+    st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def explore_upload(conn, table, total_rows):
+    """Column summary, paginated rows and a filtered chart of an uploaded table"""
+    with st.expander("📋 Column summary"):
+        st.dataframe(table_summary(conn, table), use_container_width=True)
+    
+    pages = max((total_rows - 1) // PAGE_SIZE + 1, 1)
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, key="upload_page")
+    st.dataframe(preview_page(conn, table, page - 1), use_container_width=True)
+    st.caption(f"Page {page} of {pages:,} ({PAGE_SIZE} rows per page)")
+    
+    upload_chart(conn, table)
+
 file_uploader = st.file_uploader("Upload File", type=['csv', 'txt'])
 if file_uploader:
     st.success(f"File uploaded: {file_uploader.name}")
+    
+    # Large files go to DuckDB instead of pandas: spooled to disk, parsed in
+    # parallel into this session's table on the shared connection and shown
+    # a page at a time
+    conn = ProfiledConnection(get_duckdb_connection(), measure=False)
+    if st.button("🦆 Load into DuckDB", key="upload_ingest"):
+        previous = st.session_state.get("upload_job")
+        if previous is not None:
+            previous.cancel()
+        # A re-upload replaces the previous table instead of adding one
+        st.session_state.upload_job = start_ingest(
+            get_job_runner(), conn, file_uploader, new_session_table(conn)
+        )
+    
+    job = st.session_state.get("upload_job")
+    if job is not None and not job.done:
+        show_job_progress(job)
+    elif job is not None and job.error is not None:
+        st.error(f"Could not load {job.info['name']}: {job.error}")
+    elif job is not None and not table_exists(conn, job.info["table"]):
+        st.info("This upload has expired; load it again to explore it")
+    elif job is not None:
+        st.write(f"**{job.info['name']}**: {job.result:,} rows loaded into `{job.info['table']}`")
+        explore_upload(conn, job.info["table"], job.result)
+elif TABLE_KEY in st.session_state:
+    # The upload was cleared: free its table
+    drop_session_table(get_duckdb_connection())
+    st.session_state.pop("upload_job", None)
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -182,9 +275,34 @@ uploaded_file = st.file_uploader("Choose file", type=['csv', 'txt'])
 
 if uploaded_file is not None:
     st.success(f"File uploaded: {uploaded_file.name}")
-    # Process file
-    df = pd.read_csv(uploaded_file)
-    st.dataframe(df)
+    # Small files: pandas is fine
+    # df = pd.read_csv(uploaded_file)
+    
+    # Large files: spool to disk and let DuckDB parse it in the background,
+    # into this session's table on the shared connection
+    conn = ProfiledConnection(get_duckdb_connection())
+    if st.button("🦆 Load into DuckDB"):
+        st.session_state.upload_job = start_ingest(
+            get_job_runner(), conn, uploaded_file, new_session_table(conn)
+        )
+    
+    job = st.session_state.get("upload_job")
+    if job and not job.done:
+        show_job_progress(job)
+    elif job:
+        table = job.info["table"]
+        page = st.number_input("Page", min_value=1, value=1)
+        # Only one page of rows is sent to the browser
+        st.dataframe(preview_page(conn, table, page - 1))
+        
+        # Charts use the dashboards' filter model and query path
+        regions = st.multiselect("Region", ["North", "South", "East", "West"])
+        where_clause, params = FilterSpec().isin("region", regions).to_sql()
+        data = chart_data(conn, f"""
+            SELECT region, SUM(sales) AS sales FROM {table}
+            WHERE {where_clause} GROUP BY 1
+        """, params, "Sales by region", progressive=False)
+        st.bar_chart(data, x="region", y="sales")
 ''', language='python')
 st.markdown("---")
 
@@ -362,22 +480,43 @@ st.markdown("---")
 st.subheader("⏳ Progress & Loading")
 st.markdown('<div class="feature-card">', unsafe_allow_html=True)
 
-# Progress bar
-progress_bar = st.progress(0)
-for i in range(101):
-    progress_bar.progress(i)
-    time.sleep(0.01)
+def load_data(job, steps=100):
+    """Stand-in for slow work; runs on the job pool, not the script thread"""
+    for i in range(steps):
+        if job.cancelled:
+            return "Cancelled"
+        time.sleep(0.02)
+        job.report((i + 1) / steps, f"step {i + 1}/{steps}")
+    return "Data loaded!"
 
-# Spinner
+# Progress bar driven by a background job
+col1, col2 = st.columns(2)
+with col1:
+    if st.button("▶️ Start loading", key="showcase_job_start"):
+        st.session_state.showcase_job = get_job_runner().submit(load_data, label="Loading data")
+with col2:
+    if st.button("⏹️ Cancel", key="showcase_job_cancel") and "showcase_job" in st.session_state:
+        st.session_state.showcase_job.cancel()
+
+job = st.session_state.get("showcase_job")
+if job is None:
+    st.progress(0, text="Click Start to run a task in the background")
+elif not job.done:
+    show_job_progress(job)
+elif job.cancelled:
+    st.warning(job.result or "Cancelled before it started")
+else:
+    st.progress(1.0, text=job.result)
+    st.success("Done!")
+
+# Spinner for short work that has to finish before the page continues
 with st.spinner("Loading..."):
-    time.sleep(1)
-st.success("Done!")
+    data = np.random.randn(1000).cumsum()
 
 # Empty placeholder
 placeholder = st.empty()
 placeholder.text("Loading data...")
-time.sleep(1)
-placeholder.text("Data loaded!")
+placeholder.text(f"Data loaded! ({len(data)} points)")
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -386,21 +525,34 @@ st.markdown("---")
 st.markdown("### 💻 COPY THIS CODE:")
 st.markdown("*Progress and loading components*")
 st.code('''
-# Progress bar
-progress_bar = st.progress(0)
-for i in range(101):
-    progress_bar.progress(i)
-    time.sleep(0.01)
-
-# Spinner
+from utils.jobs import get_job_runner, show_job_progress
+
+# Slow work runs on a background job pool and reports progress,
+# so the page never blocks while it runs
+def load_data(job, steps=100):
+    for i in range(steps):
+        if job.cancelled:
+            return "Cancelled"
+        do_step(i)
+        job.report((i + 1) / steps, f"step {i + 1}/{steps}")
+    return "Data loaded!"
+
+if st.button("▶️ Start loading"):
+    st.session_state.job = get_job_runner().submit(load_data, label="Loading data")
+
+job = st.session_state.get("job")
+if job and not job.done:
+    show_job_progress(job)  # fragment polling every 0.5s
+elif job:
+    st.success(job.result)
+
+# Spinner for short work the page has to wait for
 with st.spinner("Loading..."):
-    time.sleep(1)
-st.success("Done!")
+    data = load_small_table()
 
 # Empty placeholder
 placeholder = st.empty()
 placeholder.text("Loading...")
-time.sleep(1)
 placeholder.text("Complete!")
 ''', language='python')
 st.markdown("---")
@@ -5,6 +5,9 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from utils.filters import BitmapIndex, FilterSpec
+from utils.schema import optimize_frame, show_memory_report
+
 st.set_page_config(layout="wide")
 
 # Reduce vertical spacing
@@ -20,18 +23,30 @@ st.markdown("""
 
 st.title("📊 Tableau-Style Dashboard")
 
-# Generate sample data
-np.random.seed(42)
-dates = pd.date_range('2024-01-01', periods=365, freq='D')
+# Columns of the data table's filters, indexed with one bitmap per value
+FILTER_COLUMNS = ['Region', 'Product', 'Category']
+
+
+# Shared read-only objects rather than copies: the page must not mutate them
+@st.cache_resource
+def load_sales_data():
+    """Sample sales data and its filter index, built once for every session"""
+    rng = np.random.RandomState(42)
+    dates = pd.date_range('2024-01-01', periods=365, freq='D')
+
+    sales_data = pd.DataFrame({
+        'Date': dates,
+        'Sales': rng.normal(1000, 200, 365),
+        'Region': rng.choice(['North', 'South', 'East', 'West'], 365),
+        'Product': rng.choice(['Product A', 'Product B', 'Product C', 'Product D'], 365),
+        'Category': rng.choice(['Electronics', 'Clothing', 'Food', 'Books'], 365)
+    })
+    sales_data = optimize_frame(sales_data, "tableau.sales")
+    return sales_data, BitmapIndex(sales_data, FILTER_COLUMNS)
+
 
-# Sales data
-sales_data = pd.DataFrame({
-    'Date': dates,
-    'Sales': np.random.normal(1000, 200, 365),
-    'Region': np.random.choice(['North', 'South', 'East', 'West'], 365),
-    'Product': np.random.choice(['Product A', 'Product B', 'Product C', 'Product D'], 365),
-    'Category': np.random.choice(['Electronics', 'Clothing', 'Food', 'Books'], 365)
-})
+sales_data, filter_index = load_sales_data()
+show_memory_report("tableau.")
 
 # KPI Cards at the top
 col1, col2, col3, col4 = st.columns(4)
@@ -73,7 +88,7 @@ with col1:
 with col2:
     # Region breakdown
     st.subheader("🌍 Sales by Region")
-    region_sales = sales_data.groupby('Region')['Sales'].sum().reset_index()
+    region_sales = sales_data.groupby('Region', observed=True)['Sales'].sum().reset_index()
     
     fig = px.pie(region_sales, values='Sales', names='Region', 
                  title="Regional Distribution")
@@ -87,7 +102,7 @@ col1, col2 = st.columns([1, 2])
 with col1:
     # Product performance
     st.subheader("📦 Product Performance")
-    product_sales = sales_data.groupby('Product')['Sales'].sum().reset_index()
+    product_sales = sales_data.groupby('Product', observed=True)['Sales'].sum().reset_index()
     
     fig = px.bar(product_sales, x='Sales', y='Product', 
                 orientation='h',
@@ -100,7 +115,7 @@ with col1:
 with col2:
     # Category comparison
     st.subheader("📋 Category Analysis")
-    category_data = sales_data.groupby(['Category', 'Region'])['Sales'].sum().reset_index()
+    category_data = sales_data.groupby(['Category', 'Region'], observed=True)['Sales'].sum().reset_index()
     
     fig = px.bar(category_data, x='Region', y='Sales', color='Category',
                 title="Sales by Category and Region",
@@ -124,7 +139,7 @@ with col1:
 with col2:
     # Heatmap style visualization
     st.subheader("🌡️ Regional Heatmap")
-    heatmap_data = sales_data.groupby(['Region', sales_data['Date'].dt.month])['Sales'].mean().reset_index()
+    heatmap_data = sales_data.groupby(['Region', sales_data['Date'].dt.month], observed=True)['Sales'].mean().reset_index()
     heatmap_pivot = heatmap_data.pivot(index='Region', columns='Date', values='Sales')
     
     fig = px.imshow(heatmap_pivot, 
@@ -146,14 +161,15 @@ with col2:
 with col3:
     selected_category = st.selectbox("Filter by Category:", ['All'] + list(sales_data['Category'].unique()))
 
-# Apply filters
-filtered_data = sales_data.copy()
-if selected_region != 'All':
-    filtered_data = filtered_data[filtered_data['Region'] == selected_region]
-if selected_product != 'All':
-    filtered_data = filtered_data[filtered_data['Product'] == selected_product]
-if selected_category != 'All':
-    filtered_data = filtered_data[filtered_data['Category'] == selected_category]
+# Apply filters: bitwise AND/OR over the precomputed bitmaps, rows
+# materialized once at the end
+filter_spec = (
+    FilterSpec()
+    .eq('Region', selected_region)
+    .eq('Product', selected_product)
+    .eq('Category', selected_category)
+)
+filtered_data = filter_index.apply(filter_spec)
 
 # Display filtered data
 st.dataframe(filtered_data.sort_values('Date', ascending=False).head(100), width='stretch')
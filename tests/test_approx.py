@@ -0,0 +1,52 @@
+"""Per-rate sample tables behind the approximate KPIs"""
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+import pytest
+
+from utils.approx import approximate_kpis, ensure_sample_table, submit_exact_kpis
+
+
+@pytest.fixture
+def conn():
+    conn = duckdb.connect()
+    conn.execute("""
+        CREATE TABLE sales AS
+        SELECT i AS id, (i % 100)::DOUBLE AS sales_amount, 1 AS quantity, 0.1 AS discount
+        FROM range(100000) t(i)
+    """)
+    yield conn
+    conn.close()
+
+
+def test_each_rate_has_its_own_table(conn):
+    small = ensure_sample_table(conn, 0.01)
+    large = ensure_sample_table(conn, 0.25)
+    assert small != large
+
+    small_rows = conn.execute(f"SELECT COUNT(*) FROM {small}").fetchone()[0]
+    large_rows = conn.execute(f"SELECT COUNT(*) FROM {large}").fetchone()[0]
+    assert 0 < small_rows < large_rows
+
+
+def test_switching_rates_keeps_existing_tables(conn):
+    table = ensure_sample_table(conn, 0.1)
+    conn.execute(f"INSERT INTO {table} SELECT * FROM {table} LIMIT 1")
+    rows = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    ensure_sample_table(conn, 0.05)
+    # Asking for the first rate again must not rebuild its table
+    assert ensure_sample_table(conn, 0.1) == table
+    assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == rows
+
+
+def test_estimates_scale_by_the_realised_fraction(conn):
+    estimates = approximate_kpis(conn, "1=1", [], 0.1)
+    transactions, _ = estimates["total_transactions"]
+    assert transactions == pytest.approx(100000)
+
+
+def test_failed_background_kpis_return_none(conn):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert submit_exact_kpis(executor, conn, "1=1", []).result()["total_transactions"] == 100000
+        assert submit_exact_kpis(executor, conn, "no_such_column > 0", []).result() is None
@@ -0,0 +1,30 @@
+"""Chart selections layered on top of the sidebar filter"""
+import duckdb
+import pandas as pd
+
+from utils.crossfilter import with_cross_filters
+from utils.filters import FilterSpec
+
+
+def test_selection_narrows_the_sidebar_filter_on_its_column():
+    sidebar = FilterSpec().isin("region", ["North", "South"]).isin("category", ["Books"])
+
+    narrowed = with_cross_filters(sidebar, {"region": ("South", "West")})
+    assert narrowed.to_sql() == ('"category" IN (?) AND "region" IN (?)', ["Books", "South"])
+
+
+def test_selection_outside_the_sidebar_filter_matches_nothing():
+    df = pd.DataFrame({"region": ["North", "South", "South"]})
+    sidebar = FilterSpec().isin("region", ["North"])
+
+    narrowed = with_cross_filters(sidebar, {"region": ("South",)})
+    where_clause, params = narrowed.to_sql()
+    assert duckdb.sql(f"SELECT COUNT(*) FROM df WHERE {where_clause}", params=params).fetchone()[0] == 0
+    assert narrowed.apply(df).empty
+
+
+def test_selection_without_sidebar_filter_and_own_column_excluded():
+    cross_filters = {"region": ("South",), "category": ("Books",)}
+
+    assert with_cross_filters(FilterSpec(), cross_filters).to_sql()[1] == ["Books", "South"]
+    assert with_cross_filters(FilterSpec(), cross_filters, exclude="region").to_sql()[1] == ["Books"]
@@ -0,0 +1,67 @@
+"""Exports written by DuckDB to per-session directories"""
+import os
+import shutil
+import time
+
+import duckdb
+
+from utils import export
+from utils.export import EXPORT_DIR, cleanup_exports, export_parts, read_part, session_directory, start_export
+from utils.jobs import JobRunner
+
+
+def test_export_goes_to_a_random_session_directory(tmp_path):
+    conn = duckdb.connect()
+    directory = tmp_path / "session"
+    job = start_export(JobRunner(max_workers=1), conn, "SELECT 42 AS answer", [], "csv", directory=str(directory))
+    job._future.result()
+
+    assert os.path.dirname(job.info["path"]) == str(directory)
+    assert len(job.info["name"]) > len("export_") + 16
+    assert job.info["url"] is None
+
+    [part] = export_parts(job)
+    assert part["file_name"] == job.info["name"] + ".csv"
+    assert part["url"] is None
+    assert read_part(part) == b"answer\n42\n"
+
+
+def test_large_exports_are_split_into_statically_servable_parts(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "PART_SIZE", "100KB")
+    monkeypatch.setattr(export, "STATIC_MAX_BYTES", 150 * 1000)
+    conn = duckdb.connect()
+    job = start_export(JobRunner(max_workers=1), conn, "SELECT range AS i FROM range(100000)", [], "csv",
+                       directory=os.path.join(export.STATIC_DIR, "exports", "test"))
+    try:
+        job._future.result()
+        parts = export_parts(job)
+        assert len(parts) > 2
+        assert [p["file_name"] for p in parts[:2]] == [job.info["name"] + "_part1.csv", job.info["name"] + "_part2.csv"]
+        assert all(p["url"].startswith("app/static/exports/test/") for p in parts)
+        # Parts follow row order, each with its own header
+        rows = [line for p in parts for line in read_part(p).decode().splitlines() if line != "i"]
+        assert rows == [str(i) for i in range(100000)]
+        assert sum(p["size"] for p in parts) == export.export_size(job)
+    finally:
+        shutil.rmtree(os.path.join(export.STATIC_DIR, "exports", "test"))
+
+
+def test_session_directory_is_stable_and_unguessable():
+    directory = session_directory()
+    assert directory == session_directory()
+    assert os.path.dirname(directory) == EXPORT_DIR
+    assert len(os.path.basename(directory)) >= 16
+
+
+def test_cleanup_removes_old_files_and_empty_session_directories(tmp_path):
+    old = tmp_path / "a" / "old.csv"
+    new = tmp_path / "b" / "new.csv"
+    for path in (old, new):
+        path.parent.mkdir()
+        path.write_text("x")
+    past = time.time() - 7200
+    os.utime(old, (past, past))
+
+    cleanup_exports(str(tmp_path), max_age=3600)
+    assert not (tmp_path / "a").exists()
+    assert new.exists()
@@ -0,0 +1,201 @@
+"""The shared filter model: SQL and pandas agree, sidebar semantics, cache keys"""
+import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from utils.filters import BitmapIndex, DateIndex, FilterSpec
+
+REGIONS = ["North", "South", "East", "West"]
+
+
+def random_frame(rng, rows=2000):
+    start = pd.Timestamp("2024-01-01")
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "region": rng.choice(REGIONS, rows),
+        "sales": rng.uniform(0, 1000, rows).round(2),
+        # Timestamps at any time of day, so end days are really tested
+        "date": start + pd.to_timedelta(rng.integers(0, 90 * 24 * 3600, rows), unit="s"),
+    })
+
+
+def random_spec(rng, df):
+    spec = FilterSpec().isin("region", rng.choice(REGIONS, rng.integers(0, 4), replace=False))
+    if rng.random() < 0.7:
+        low, high = sorted(rng.choice(df["sales"], 2))
+        spec = spec.between("sales", low, high)
+    if rng.random() < 0.7:
+        low, high = sorted(rng.choice(df["date"].dt.date, 2))
+        spec = spec.date_range("date", (low, high))
+    return spec
+
+
+def sql_ids(df, spec):
+    where_clause, params = spec.to_sql()
+    return duckdb.sql(f"SELECT id FROM df WHERE {where_clause} ORDER BY id", params=params).fetchdf()["id"].tolist()
+
+
+def test_sql_and_mask_select_the_same_rows():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        df = random_frame(rng)
+        spec = random_spec(rng, df)
+        assert sql_ids(df, spec) == df["id"][spec.mask(df)].tolist()
+
+
+def test_calendar_date_range_includes_the_whole_end_day():
+    df = pd.DataFrame({
+        "id": [0, 1, 2, 3],
+        "date": pd.to_datetime(["2024-01-31 23:59:59", "2024-02-01 00:00:00", "2024-02-29 23:59:59", "2024-03-01 00:00:00"]),
+    })
+    spec = FilterSpec().date_range("date", (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29)))
+
+    assert df["id"][spec.mask(df)].tolist() == [1, 2]
+    assert sql_ids(df, spec) == [1, 2]
+
+
+def test_empty_selections_and_all_add_no_predicate():
+    spec = FilterSpec().isin("region", []).eq("category", "All").eq("product", None)
+
+    assert spec == FilterSpec()
+    assert spec.to_sql() == ("1=1", [])
+
+
+def test_key_does_not_depend_on_predicate_order():
+    one = FilterSpec().isin("region", ["South", "North"]).between("sales", 0, 10)
+    other = FilterSpec().between("sales", 0.0, np.float64(10)).isin("region", ["North", "South", "North"])
+
+    assert one.key == other.key
+    assert hash(one.key) == hash(other.key)
+
+
+CATALOG = {
+    "region": {"values": REGIONS},
+    "sales": {"min": 0.0, "max": 1000.0},
+    "date": {"min": datetime.datetime(2024, 1, 1, 0, 0), "max": datetime.datetime(2024, 3, 31, 18, 30)},
+}
+
+
+def test_normalize_drops_full_domain_predicates():
+    spec = (
+        FilterSpec()
+        .isin("region", REGIONS)
+        .between("sales", 0, 1000)
+        .date_range("date", (datetime.date(2024, 1, 1), datetime.date(2024, 3, 31)))
+    )
+    assert spec.normalize(CATALOG) == FilterSpec()
+
+
+def test_normalize_keeps_partial_predicates():
+    spec = (
+        FilterSpec()
+        .isin("region", REGIONS[:3])
+        .between("sales", 0, 999.99)
+        # Ends the day before the last row
+        .date_range("date", (datetime.date(2024, 1, 1), datetime.date(2024, 3, 30)))
+    )
+    assert spec.normalize(CATALOG) == spec
+
+    # Columns the catalog doesn't describe are always kept
+    other = FilterSpec().isin("category", ["Books"])
+    assert other.normalize(CATALOG) == other
+
+
+def test_equivalent_filter_states_share_a_key():
+    defaults = FilterSpec().isin("region", REGIONS).between("sales", 0.0, 1000.0)
+    wider = FilterSpec().isin("region", reversed(REGIONS)).between("sales", -5, 2000)
+    untouched = FilterSpec()
+    assert defaults.normalize(CATALOG).key == wider.normalize(CATALOG).key == untouched.normalize(CATALOG).key
+
+    north = FilterSpec().isin("region", ["North"]).between("sales", 0, 1000)
+    assert north.normalize(CATALOG).key == FilterSpec().isin("region", ["North"]).key
+
+
+def test_bitmap_mask_matches_filter_mask_on_any_slice():
+    rng = np.random.default_rng(1)
+    for _ in range(30):
+        # Row counts and slice bounds that aren't multiples of 8
+        df = random_frame(rng, rows=int(rng.integers(1, 300)))
+        bitmaps = BitmapIndex(df, ["region"])
+        spec = FilterSpec().isin("region", rng.choice(REGIONS + ["Nowhere"], rng.integers(1, 4), replace=False))
+        start, stop = sorted(rng.integers(0, len(df) + 1, 2))
+
+        expected = spec.mask(df)
+        assert bitmaps.mask(spec).tolist() == expected.tolist()
+        assert bitmaps.mask(spec, start, stop).tolist() == expected[start:stop].tolist()
+        assert bitmaps.count(spec) == expected.sum()
+        assert bitmaps.apply(spec)["id"].tolist() == spec.apply(df)["id"].tolist()
+
+
+def test_date_index_with_bitmaps_matches_filter_apply():
+    rng = np.random.default_rng(2)
+    for _ in range(30):
+        df = random_frame(rng, rows=int(rng.integers(1, 500)))
+        index = DateIndex(df, "date")
+        bitmaps = BitmapIndex(index.frame, ["region"])
+        spec = random_spec(rng, df)
+
+        expected = sorted(spec.apply(df)["id"])
+        assert sorted(index.apply(spec)["id"]) == expected
+        assert sorted(index.apply(spec, bitmaps)["id"]) == expected
+
+
+def unsorted_days():
+    # Several rows per day at different times, shuffled
+    dates = pd.to_datetime([
+        "2024-01-03 12:00:00", "2024-01-01 00:00:00", "2024-01-02 23:59:59", "2024-01-02 00:00:00",
+        "2024-01-04 08:00:00", "2024-01-01 18:00:00", "2024-01-03 00:00:00", "2024-01-02 09:30:00",
+    ])
+    return pd.DataFrame({"id": np.arange(len(dates)), "date": dates})
+
+
+def test_date_index_sorts_unsorted_input():
+    df = unsorted_days()
+    index = DateIndex(df, "date")
+
+    assert index.frame["date"].is_monotonic_increasing
+    assert sorted(index.frame["id"]) == list(range(len(df)))
+    # The caller's frame is left alone
+    assert df["id"].tolist() == list(range(len(df)))
+
+
+def test_date_index_positions_include_the_whole_end_day():
+    index = DateIndex(unsorted_days(), "date")
+
+    start, stop = index.positions(datetime.date(2024, 1, 2), datetime.date(2024, 1, 3))
+    assert sorted(index.frame["id"][start:stop]) == [0, 2, 3, 6, 7]
+
+    # A single day, including its last second
+    start, stop = index.positions(datetime.date(2024, 1, 2), datetime.date(2024, 1, 2))
+    assert sorted(index.frame["id"][start:stop]) == [2, 3, 7]
+
+    # Timestamp bounds are exact
+    start, stop = index.positions(pd.Timestamp("2024-01-02 00:00:00"), pd.Timestamp("2024-01-02 09:30:00"))
+    assert sorted(index.frame["id"][start:stop]) == [3, 7]
+
+    # Ranges outside the data are empty, never negative
+    assert index.positions(datetime.date(2023, 1, 1), datetime.date(2023, 12, 31)) == (0, 0)
+    start, stop = index.positions(datetime.date(2024, 1, 5), datetime.date(2024, 1, 1))
+    assert start == stop
+
+
+def test_date_index_with_only_one_end_picked():
+    df = unsorted_days()
+    index = DateIndex(df, "date")
+
+    # st.date_input returns a 1-tuple while the end day is still being picked
+    half_picked = FilterSpec().date_range("date", (datetime.date(2024, 1, 3),))
+    assert len(index.apply(half_picked)) == len(df)
+
+    # Open-ended ranges: everything from a day on, or up to a day
+    start, stop = index.positions(datetime.date(2024, 1, 3), df["date"].max())
+    assert sorted(index.frame["id"][start:stop]) == [0, 4, 6]
+    start, stop = index.positions(df["date"].min(), datetime.date(2024, 1, 1))
+    assert sorted(index.frame["id"][start:stop]) == [1, 5]
+
+    # FilterSpec gives the same rows for a mixed timestamp/date range
+    spec = FilterSpec().between("date", df["date"].min(), datetime.date(2024, 1, 1))
+    assert df["id"][spec.mask(df)].tolist() == [1, 5]
+    assert sql_ids(df, spec) == [1, 5]
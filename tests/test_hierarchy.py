@@ -0,0 +1,89 @@
+"""Sunburst/treemap nodes aggregated in DuckDB"""
+from collections import defaultdict
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.hierarchy import NULL_LABEL, OTHER_LABEL, hierarchy_arrays
+
+
+@pytest.fixture
+def conn():
+    rng = np.random.default_rng(0)
+    rows = 5000
+    df = pd.DataFrame({
+        "region": rng.choice(["North", "South", "East", "West", None], rows),
+        "product": [f"P{i}" for i in rng.integers(0, 40, rows)],
+        "sales": rng.integers(1, 100, rows),
+    })
+    conn = duckdb.connect()
+    conn.register("sales", df)
+    yield conn
+    conn.close()
+
+
+def children_by_parent(nodes):
+    children = defaultdict(list)
+    for node_id, label, parent, value in zip(nodes["ids"], nodes["labels"], nodes["parents"], nodes["values"]):
+        children[parent].append((node_id, label, value))
+    return children
+
+
+@pytest.mark.parametrize("top", [None, 5])
+def test_parents_equal_the_sum_of_their_children(conn, top):
+    nodes = hierarchy_arrays(conn, "sales", ["region", "product"], "sales", top=top)
+    values = dict(zip(nodes["ids"], nodes["values"]))
+    children = children_by_parent(nodes)
+
+    assert len(set(nodes["ids"])) == len(nodes["ids"])
+    assert sum(value for _, _, value in children[""]) == conn.execute("SELECT SUM(sales) FROM sales").fetchone()[0]
+    for parent, kids in children.items():
+        if parent:
+            assert values[parent] == sum(value for _, _, value in kids)
+
+
+def test_top_n_keeps_the_largest_children_and_buckets_the_rest(conn):
+    df = conn.execute("SELECT * FROM sales").fetchdf()
+    nodes = hierarchy_arrays(conn, "sales", ["region", "product"], "sales", top=5)
+    labels = dict(zip(nodes["ids"], nodes["labels"]))
+    children = children_by_parent(nodes)
+
+    for region_id, region, _ in children[""]:
+        rows = df[df["region"].isna()] if region == NULL_LABEL else df[df["region"] == region]
+        totals = rows.groupby("product")["sales"].sum().sort_values(ascending=False)
+        kids = {label: value for _, label, value in children[region_id]}
+
+        assert len(kids) == 6
+        assert kids.pop(OTHER_LABEL) == totals.iloc[5:].sum()
+        assert kids == totals.iloc[:5].to_dict()
+
+    # Other buckets have no children of their own
+    other_ids = {node_id for node_id, label in labels.items() if label == OTHER_LABEL}
+    assert other_ids and not other_ids & set(children)
+
+
+def test_null_members_and_awkward_labels_are_kept_apart():
+    df = pd.DataFrame({
+        "region": ["North"] * 6 + ["a/b", "a", None, None],
+        "product": ["Other", "X", "Y", "W", "V", "U", "c", "b/c", "Z", None],
+        "sales": [50, 2, 4, 5, 6, 1, 8, 16, 32, 64],
+    })
+    conn = duckdb.connect()
+    conn.register("sales", df)
+    nodes = hierarchy_arrays(conn, "sales", ["region", "product"], "sales", top=4)
+    labels = dict(zip(nodes["ids"], nodes["labels"]))
+    children = children_by_parent(nodes)
+
+    # "a/b" > "c" and "a" > "b/c" get different ids
+    assert len(set(nodes["ids"])) == len(nodes["ids"])
+    assert {label: value for _, label, value in children[""]} == {"North": 68, "a/b": 8, "a": 16, NULL_LABEL: 96}
+
+    def kids(region):
+        region_id = next(node_id for node_id, label in labels.items() if label == region)
+        return sorted((label, value) for _, label, value in children[region_id])
+
+    # The real "Other" product is kept next to the bucket of X and U
+    assert kids("North") == [(OTHER_LABEL, 3), (OTHER_LABEL, 50), ("V", 6), ("W", 5), ("Y", 4)]
+    assert kids(NULL_LABEL) == [(NULL_LABEL, 64), ("Z", 32)]
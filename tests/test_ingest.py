@@ -0,0 +1,81 @@
+"""Uploads loaded into per-session tables"""
+import io
+import time
+
+import duckdb
+import streamlit as st
+
+from utils.ingest import (
+    TABLE_KEY,
+    UPLOAD_SCHEMA,
+    cleanup_uploads,
+    drop_session_table,
+    new_session_table,
+    preview_page,
+    start_ingest,
+    table_columns,
+)
+from utils.jobs import JobRunner
+
+
+class Upload(io.BytesIO):
+    name = "upload.csv"
+
+    @property
+    def size(self):
+        return len(self.getbuffer())
+
+
+def tables(conn):
+    return {f"{schema}.{name}" for schema, name in conn.execute("SELECT schema_name, table_name FROM duckdb_tables()").fetchall()}
+
+
+def test_reupload_and_clear_drop_the_previous_table():
+    conn = duckdb.connect()
+    runner = JobRunner(max_workers=1)
+    st.session_state.pop(TABLE_KEY, None)
+
+    first = start_ingest(runner, conn, Upload(b"region,sales\nNorth,1\n"), new_session_table(conn))
+    first._future.result()
+    assert tables(conn) == {first.info["table"]}
+    assert first.info["table"].startswith(UPLOAD_SCHEMA + ".")
+
+    second = start_ingest(runner, conn, Upload(b"region,sales\nSouth,2\n"), new_session_table(conn))
+    assert second._future.result() == 1
+    assert tables(conn) == {second.info["table"]}
+
+    drop_session_table(conn)
+    assert tables(conn) == set()
+    assert TABLE_KEY not in st.session_state
+
+
+def test_pages_follow_file_order_without_insertion_order():
+    conn = duckdb.connect(config={"preserve_insertion_order": False, "threads": 4})
+    csv = "i,s\n" + "".join(f"{i},{i % 7}\n" for i in range(300_000))
+    job = start_ingest(JobRunner(max_workers=1), conn, Upload(csv.encode()), new_session_table(conn))
+    assert job._future.result() == 300_000
+
+    page = preview_page(conn, job.info["table"], 1234, page_size=100)
+    assert list(page.columns) == ["i", "s"]
+    assert page["i"].tolist() == list(range(123_400, 123_500))
+
+
+def test_cleanup_drops_only_old_upload_tables():
+    conn = duckdb.connect()
+    conn.execute(f"CREATE SCHEMA {UPLOAD_SCHEMA}")
+    old, new = f"upload_{int(time.time()) - 100}_a", f"upload_{int(time.time())}_b"
+    for name in (old, new):
+        conn.execute(f"CREATE TABLE {UPLOAD_SCHEMA}.{name} (x INTEGER)")
+
+    cleanup_uploads(conn, max_age=50)
+    assert tables(conn) == {f"{UPLOAD_SCHEMA}.{new}"}
+
+
+def test_table_columns_lists_filterable_columns():
+    conn = duckdb.connect()
+    conn.execute(f"CREATE SCHEMA {UPLOAD_SCHEMA}")
+    conn.execute(
+        f'CREATE TABLE {UPLOAD_SCHEMA}.t (__upload_row BIGINT, region VARCHAR, sales DOUBLE, '
+        f'"unit price" DOUBLE, quantity INTEGER, day DATE)'
+    )
+    assert table_columns(conn, f"{UPLOAD_SCHEMA}.t") == (["region"], ["sales", "quantity"])
@@ -0,0 +1,38 @@
+"""Job results for finished, failed and cancelled work"""
+import threading
+
+from utils.jobs import JobRunner
+
+
+def _wait(job, event):
+    event.wait()
+    return "ran"
+
+
+def test_result_of_finished_job():
+    runner = JobRunner(max_workers=1)
+    job = runner.submit(lambda job: 42)
+    job._future.result()
+    assert job.done and job.result == 42 and job.error is None
+
+
+def test_result_of_failed_job():
+    runner = JobRunner(max_workers=1)
+    job = runner.submit(lambda job: 1 / 0)
+    job._future.exception()
+    assert job.result is None
+    assert isinstance(job.error, ZeroDivisionError)
+
+
+def test_result_of_job_cancelled_before_it_started():
+    runner = JobRunner(max_workers=1)
+    release = threading.Event()
+    blocker = runner.submit(_wait, release)
+    queued = runner.submit(_wait, release)
+
+    queued.cancel()
+    release.set()
+    blocker._future.result()
+
+    assert queued.done and queued.cancelled
+    assert queued.result is None and queued.error is None
@@ -0,0 +1,43 @@
+"""Speculative warming and when a warmed call is warmed again"""
+import threading
+import time
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.prefetch import Prefetcher
+
+
+def test_warmed_calls_are_warmed_again_once_forgotten():
+    calls = []
+
+    def view(path):
+        calls.append(path)
+
+    prefetcher = Prefetcher(remember=0.2)
+    prefetcher.schedule(view, [("North",), ("South",)])._future.result()
+    assert calls == ["North", "South"]
+
+    # Still remembered: nothing to do
+    assert prefetcher.schedule(view, [("North",)]) is None
+
+    # The cache may have evicted it since, so it is warmed again
+    time.sleep(0.25)
+    prefetcher.schedule(view, [("North",)])._future.result()
+    assert calls == ["North", "South", "North"]
+
+
+def test_worker_runs_under_the_scheduling_script_context():
+    # Stands in for the ScriptRunContext of a script run
+    ctx = object()
+    contexts = []
+
+    def view(path):
+        contexts.append(get_script_run_ctx(suppress_warning=True))
+
+    prefetcher = Prefetcher()
+    jobs = []
+    script = add_script_run_ctx(threading.Thread(target=lambda: jobs.append(prefetcher.schedule(view, [("North",)]))), ctx)
+    script.start()
+    script.join()
+    jobs[0]._future.result()
+    assert contexts == [ctx]
@@ -0,0 +1,61 @@
+"""Sample previews and their exact results"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+import pytest
+
+from utils.profiling import ProfiledConnection, clear_result_cache
+from utils.progressive import _failed, _jobs, _submit, fetch_progressive, is_pending
+
+QUERY = "SELECT COUNT(*) AS n FROM sales WHERE id >= ?"
+
+
+@pytest.fixture
+def conn():
+    raw = duckdb.connect()
+    raw.execute("CREATE TABLE sales AS SELECT i AS id FROM range(200000) t(i)")
+    clear_result_cache()
+    yield ProfiledConnection(raw)
+    raw.close()
+
+
+def _wait(sql, params):
+    while is_pending(sql, params):
+        time.sleep(0.01)
+
+
+def test_preview_then_exact(conn):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        first, _ = fetch_progressive(conn, executor, QUERY, [0], scale=['n'], rate=0.1, source="Count")
+        _wait(QUERY, [0])
+        exact, preview = fetch_progressive(conn, executor, QUERY, [0], scale=['n'], rate=0.1)
+
+    assert not preview and exact['n'][0] == 200000
+    assert first['n'][0] == pytest.approx(200000, rel=0.01)
+    assert any(entry.source == "Count" for entry in conn.entries)
+
+
+def test_failed_background_query_is_raised_in_the_foreground(conn):
+    sql = "SELECT COUNT(*) AS n FROM sales WHERE no_such_column > ?"
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(duckdb.Error):
+            fetch_progressive(conn, executor, sql, [0], rate=0.1)
+        _wait(sql, [0])
+        with pytest.raises(duckdb.Error):
+            fetch_progressive(conn, executor, sql, [0], rate=0.1)
+
+
+def test_failed_background_query_is_not_kept(conn):
+    sql = "SELECT COUNT(*) AS n FROM sales WHERE no_such_column > ?"
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert _submit(executor, conn, sql, [0]).result() is None
+        # Dropped by the done callback, which may run just after result()
+        deadline = time.monotonic() + 5
+        while (sql, (0,)) in _jobs and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert (sql, (0,)) not in _jobs
+        with pytest.raises(duckdb.Error):
+            fetch_progressive(conn, executor, sql, [0], rate=0.1)
+        # Rerun in the foreground once, then forgotten
+        assert (sql, (0,)) not in _failed
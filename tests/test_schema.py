@@ -0,0 +1,89 @@
+"""optimize_frame() and the pages that group its categorical columns
+
+Run under the locked dependencies with: uv run --with pytest pytest
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from utils.comprehensive_data import compute_aggregates, generate
+from utils.drilldown_data import _synthetic, build_hierarchy
+from utils.schema import memory_report, optimize_frame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# pandas 2.x warns when a categorical groupby leaves observed unset
+pytestmark = pytest.mark.filterwarnings("error::FutureWarning")
+
+
+def test_optimize_frame_is_lossless():
+    df = pd.DataFrame({
+        'Region': ['North', 'South'] * 50,
+        'Id': [f"id-{i}" for i in range(100)],
+        'Small': np.arange(100, dtype=np.int64),
+        'Exact': np.arange(100) / 2,
+        'Inexact': np.arange(100) / 10,
+        'Missing': [np.nan] + [0.5] * 99,
+    })
+    optimized = optimize_frame(df, "test.lossless")
+
+    assert isinstance(optimized['Region'].dtype, pd.CategoricalDtype)
+    assert optimized['Id'].dtype == df['Id'].dtype
+    assert optimized['Small'].dtype == np.int8
+    assert optimized['Exact'].dtype == np.float32
+    assert optimized['Inexact'].dtype == np.float64
+    assert optimized['Missing'].dtype == np.float32
+    pd.testing.assert_frame_equal(optimized.astype(df.dtypes), df)
+
+    report = memory_report("test.lossless").iloc[0]
+    assert report["After"] < report["Before"]
+
+
+def test_hierarchy_has_only_observed_paths():
+    raw = build_hierarchy(_synthetic())
+    optimized = build_hierarchy(optimize_frame(_synthetic()))
+
+    assert optimized.keys() == raw.keys()
+    for path, node in raw.items():
+        assert optimized[path].totals == node.totals
+        children = optimized[path].children
+        if node.children is None:
+            assert children is None
+        else:
+            assert len(children) == len(node.children)
+
+
+def test_hierarchy_counts_distinct_products():
+    df = _synthetic()
+    hierarchy = build_hierarchy(df)
+
+    assert hierarchy[()].totals['Products'] == df['Product'].nunique()
+    north = df[df['Region'] == 'North']
+    assert hierarchy[('North',)].totals['Products'] == north['Product'].nunique()
+
+
+def test_aggregates_match_string_columns():
+    sales = generate().sales
+    assert isinstance(sales['Region'].dtype, pd.CategoricalDtype)
+
+    raw = compute_aggregates(sales.astype({'Region': object, 'Category': object}))
+    optimized = compute_aggregates(sales)
+    assert optimized['kpis'] == raw['kpis']
+    for name in ('region', 'category', 'regional'):
+        pd.testing.assert_frame_equal(optimized[name], raw[name], check_dtype=False, check_categorical=False)
+
+
+def test_drilldown_demo_charts_observed_products():
+    at = AppTest.from_file(os.path.join(ROOT, "drilldown_demo.py"), default_timeout=60)
+    at.run()
+    at.selectbox[0].set_value('North').run()
+    at.selectbox[1].set_value('Electronics').run()
+    assert not at.exception
+
+    charts = {json.loads(chart.proto.spec)['layout']['title']['text']: json.loads(chart.proto.spec)
+              for chart in at.get('plotly_chart')}
+    assert len(charts["Products in Electronics"]['data'][0]['x']) == 3
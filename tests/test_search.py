@@ -0,0 +1,74 @@
+"""Prefix lookups and DuckDB substring top-up for the product picker"""
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.search import PrefixIndex, build_index, search
+
+CATEGORIES = ["Books", "Garden", "Toys"]
+
+
+@pytest.fixture
+def products():
+    rng = np.random.default_rng(0)
+    words = ["apple", "Apricot", "banana", "Blueberry", "cherry", "grape", "pineapple", "Crab apple"]
+    rows = 3000
+    return pd.DataFrame({
+        "product": [f"{rng.choice(words)} {i % 700}" for i in range(rows)],
+        "category": rng.choice(CATEGORIES, rows),
+    })
+
+
+@pytest.fixture
+def conn(products):
+    conn = duckdb.connect()
+    conn.register("sales", products)
+    yield conn
+    conn.close()
+
+
+def expected_prefix(products, text, limit, groups=None):
+    rows = products if groups is None else products[products["category"].isin(groups)]
+    values = sorted({value for value in rows["product"] if value.lower().startswith(text.lower())}, key=str.lower)
+    return values[:limit]
+
+
+@pytest.mark.parametrize("text", ["", "a", "AP", "apple 1", "crab", "zzz"])
+@pytest.mark.parametrize("groups", [None, [], ["Books"], ["Garden", "Toys"], CATEGORIES + ["Missing"]])
+def test_prefix_matches_a_brute_force_scan(conn, products, text, groups):
+    index = build_index(conn, "sales", "product", group_column="category")
+    for limit in (1, 7, 50, 10_000):
+        assert index.prefix(text, limit, groups) == expected_prefix(products, text, limit, groups)
+
+
+def test_prefix_without_groups_returns_distinct_values():
+    index = PrefixIndex(["b", "A", "a", "B", "a", "c"])
+    assert index.prefix("a") == ["A", "a"]
+    assert index.prefix("", limit=3) == ["A", "a", "b"]
+    assert len(index) == 6
+
+
+def test_search_tops_up_prefix_matches_with_substrings(conn, products):
+    index = build_index(conn, "sales", "product", group_column="category")
+    matches = search(conn, index, "sales", "product", "apple", limit=1000)
+
+    prefix = expected_prefix(products, "apple", 1000)
+    assert matches[:len(prefix)] == prefix
+    assert len(matches) == len(set(matches))
+    assert set(matches) == {value for value in products["product"] if "apple" in value.lower()}
+
+
+def test_search_respects_groups_and_limit(conn, products):
+    index = build_index(conn, "sales", "product", group_column="category")
+    matches = search(conn, index, "sales", "product", "apple", "category IN (?)", ["Books"], groups=["Books"], limit=20)
+
+    books = set(products[products["category"] == "Books"]["product"])
+    assert len(matches) == 20
+    assert set(matches) <= books
+    # Enough prefix matches: DuckDB isn't asked for substrings
+    assert all(value.lower().startswith("apple") for value in matches)
+
+    topped_up = search(conn, index, "sales", "product", "berry", "category IN (?)", ["Books"], groups=["Books"], limit=20)
+    assert topped_up and set(topped_up) <= books
+    assert all("berry" in value.lower() for value in topped_up)
@@ -0,0 +1,92 @@
+"""Trend bucket choice and downsampling within a point budget"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.trend import choose_granularity, downsample, lttb, max_points_for_width, minmax_indices
+
+
+def noisy_series(rng, n):
+    dates = pd.date_range("2020-01-01", periods=n, freq="h")
+    values = np.cumsum(rng.normal(0, 1, n))
+    # One spike each way, away from the ends
+    values[n // 3] += 500
+    values[2 * n // 3] -= 500
+    return pd.DataFrame({"date": dates, "value": values})
+
+
+@pytest.mark.parametrize("n_out", [3, 4, 10, 99, 500])
+def test_lttb_stays_within_budget_and_keeps_the_ends(n_out):
+    rng = np.random.default_rng(n_out)
+    y = rng.normal(0, 1, 1000)
+    idx = lttb(np.arange(1000), y, n_out)
+
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == 999
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_a_lone_spike():
+    y = np.zeros(1000)
+    y[400] = 100
+    assert 400 in lttb(np.arange(1000), y, 20)
+
+
+def test_lttb_and_minmax_return_everything_when_under_budget():
+    y = np.arange(10.0)
+    assert lttb(np.arange(10), y, 10).tolist() == list(range(10))
+    assert minmax_indices(y, 50).tolist() == list(range(10))
+
+
+@pytest.mark.parametrize("n_out", [2, 3, 4, 5, 10, 101, 500])
+def test_minmax_stays_within_budget_and_keeps_the_extremes(n_out):
+    rng = np.random.default_rng(n_out)
+    y = rng.normal(0, 1, 1000)
+    idx = minmax_indices(y, n_out)
+
+    assert len(idx) <= n_out
+    assert np.all(np.diff(idx) > 0)
+    assert int(np.argmin(y)) in idx and int(np.argmax(y)) in idx
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+@pytest.mark.parametrize("max_points", [2, 3, 4, 5, 7, 50, 112])
+def test_downsample_stays_within_budget_and_keeps_extremes(method, max_points):
+    df = noisy_series(np.random.default_rng(max_points), 5000)
+    result = downsample(df, "date", "value", max_points, method=method)
+
+    assert len(result) <= max_points
+    assert result["value"].max() == df["value"].max()
+    assert result["value"].min() == df["value"].min()
+    assert result["date"].is_monotonic_increasing
+
+
+def test_downsample_leaves_short_series_alone():
+    df = noisy_series(np.random.default_rng(0), 50)
+    assert downsample(df, "date", "value", 50) is df
+
+
+def test_granularity_switches_exactly_at_the_point_budget():
+    max_points = max_points_for_width()
+    start = pd.Timestamp("2024-01-01")
+
+    def span(days):
+        # choose_granularity counts both end days
+        return choose_granularity(start, start + pd.Timedelta(days=days - 1))
+
+    assert span(1) == "day"
+    assert span(max_points) == "day"
+    assert span(max_points + 1) == "week"
+    assert span(7 * max_points) == "week"
+    assert span(7 * max_points + 1) == "month"
+    assert span(int(30.44 * max_points)) == "month"
+    assert span(int(30.44 * max_points) + 1) == "quarter"
+    assert span(100 * 365) == "quarter"
+
+
+def test_granularity_follows_chart_width():
+    start, end = pd.Timestamp("2024-01-01"), pd.Timestamp("2024-12-31")
+    assert choose_granularity(start, end, width_px=8 * 366) == "day"
+    assert choose_granularity(start, end, width_px=8 * 365) == "week"
+    # Swapped or equal bounds still count as one day
+    assert choose_granularity(end, start) == "day"
@@ -0,0 +1,162 @@
+"""Sample-based KPI estimates with confidence intervals"""
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+
+# Prefix of the per-rate sample tables
+SAMPLE_TABLE = "sales_sample"
+
+# Serialises sample table creation across sessions
+_sample_lock = threading.Lock()
+
+# Two-sided 95% normal quantile
+Z_95 = 1.96
+
+# Aggregates are filtered rather than the rows so the same scan also counts
+# how many rows the sample actually drew; that realised fraction is the
+# scale-up factor (a ratio estimator), which matters for block sampling
+# where the drawn fraction can drift far from the requested rate
+KPI_SQL = """
+    SELECT 
+        COUNT(*) as sampled_rows,
+        (SELECT COUNT(*) FROM sales) as population_rows,
+        COUNT(*) FILTER (WHERE matched) as n,
+        SUM(sales_amount) FILTER (WHERE matched) as sales_sum,
+        SUM(sales_amount * sales_amount) FILTER (WHERE matched) as sales_sq_sum,
+        STDDEV_SAMP(sales_amount) FILTER (WHERE matched) as sales_std,
+        SUM(quantity) FILTER (WHERE matched) as qty_sum,
+        SUM(quantity * quantity) FILTER (WHERE matched) as qty_sq_sum,
+        AVG(discount) FILTER (WHERE matched) * 100 as discount_avg,
+        STDDEV_SAMP(discount) FILTER (WHERE matched) * 100 as discount_std
+    FROM (
+        SELECT *, ({where_clause}) as matched
+        FROM {source}
+    ) sampled
+"""
+
+EXACT_KPI_SQL = """
+    SELECT 
+        COUNT(*) as total_transactions,
+        SUM(sales_amount) as total_sales,
+        AVG(sales_amount) as avg_sale,
+        SUM(quantity) as total_quantity,
+        AVG(discount) * 100 as avg_discount_pct
+    FROM sales
+    WHERE {where_clause}
+"""
+
+
+def sample_table_name(rate):
+    """Sample table of a rate, named by percent: sales_sample_1, sales_sample_0_5"""
+    return f"{SAMPLE_TABLE}_{rate * 100:g}".replace(".", "_")
+
+
+def ensure_sample_table(conn, rate):
+    """Name of the Bernoulli sample table for rate, created on first use
+
+    Each rate has its own table, built once and never replaced, so
+    sessions on different rates don't rebuild each other's sample and no
+    session reads a table while it is being rebuilt.
+    """
+    table = sample_table_name(rate)
+    with _sample_lock:
+        exists = conn.execute(
+            "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [table]
+        ).fetchone()[0]
+        if not exists:
+            # Bernoulli keeps each row independently, which is what the variance
+            # formulas below assume; fixed seed keeps estimates stable across reruns
+            conn.execute(f"""
+                CREATE TABLE {table} AS
+                SELECT * FROM sales USING SAMPLE {rate * 100:.4f} PERCENT (bernoulli, 42)
+            """)
+    return table
+
+
+def sample_fraction(conn, table):
+    """Share of the sales rows a sample table holds (1.0 for empty tables)"""
+    sampled, population = conn.execute(
+        f"SELECT (SELECT COUNT(*) FROM {table}), (SELECT COUNT(*) FROM sales)"
+    ).fetchone()
+    return sampled / population if sampled and population else 1.0
+
+
+def _total_ci(total, sq_sum, rate):
+    """Horvitz-Thompson estimate of a total and its 95% half-width"""
+    estimate = (total or 0) / rate
+    half_width = Z_95 * math.sqrt(max((1 - rate) * (sq_sum or 0), 0)) / rate
+    return estimate, half_width
+
+
+def _mean_ci(mean, std, n, rate):
+    """Sample mean and its 95% half-width with finite population correction"""
+    if not n or mean is None:
+        return None, None
+    if n < 2 or std is None:
+        return mean, float('nan')
+    return mean, Z_95 * std / math.sqrt(n) * math.sqrt(1 - rate)
+
+
+def approximate_kpis(conn, where_clause, params, rate, method="sample"):
+    """Estimate the KPI row from a sample, returning (estimate, ±95% CI) pairs
+
+    method="sample" reads the prebuilt Bernoulli sample table, method="block"
+    samples row groups of the base table at query time (faster, but rows in
+    a block are correlated so the intervals are optimistic).
+    """
+    if method == "block":
+        source = f"sales TABLESAMPLE {rate * 100:.4f}% (system)"
+    else:
+        source = ensure_sample_table(conn, rate)
+
+    row = conn.execute(
+        KPI_SQL.format(source=source, where_clause=where_clause), params
+    ).fetchone()
+    sampled_rows, population_rows, n, sales_sum, sales_sq_sum, sales_std, qty_sum, qty_sq_sum, discount_avg, discount_std = row
+
+    if sampled_rows and population_rows:
+        rate = min(sampled_rows / population_rows, 1.0)
+
+    sales_mean = sales_sum / n if n else None
+
+    return {
+        "total_transactions": _total_ci(n, n, rate),
+        "total_sales": _total_ci(sales_sum, sales_sq_sum, rate),
+        "avg_sale": _mean_ci(sales_mean, sales_std, n, rate),
+        "total_quantity": _total_ci(qty_sum, qty_sq_sum, rate),
+        "avg_discount_pct": _mean_ci(discount_avg, discount_std, n, rate),
+    }
+
+
+def exact_kpis(conn, where_clause, params):
+    """Exact KPI row as a dict keyed like approximate_kpis"""
+    cursor = conn.execute(EXACT_KPI_SQL.format(where_clause=where_clause), params)
+    columns = [d[0] for d in cursor.description]
+    return dict(zip(columns, cursor.fetchone()))
+
+
+def _background_exact_kpis(conn, where_clause, params):
+    # Failures are caught here rather than re-raised in the page; None
+    # tells it to keep showing the estimates
+    try:
+        return exact_kpis(conn, where_clause, params)
+    except duckdb.Error:
+        return None
+
+
+def submit_exact_kpis(executor, conn, where_clause, params):
+    """Compute exact KPIs on a background thread with its own cursor
+
+    The future's result is None when the query failed.
+    """
+    # DuckDB connections are not thread-safe; a cursor is a separate
+    # connection to the same database
+    cursor = conn.cursor()
+    return executor.submit(_background_exact_kpis, cursor, where_clause, list(params))
+
+
+def make_executor():
+    """Small pool so background refinement never floods DuckDB"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="exact-kpis")
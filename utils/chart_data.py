@@ -0,0 +1,52 @@
+"""Chart frames queried from DuckDB, exact or as progressive sample previews"""
+import streamlit as st
+
+from utils.approx import make_executor
+from utils.profiling import caller_source
+from utils.progressive import PREVIEW_RATE, fetch_progressive, is_pending
+
+
+@st.cache_resource
+def get_kpi_executor():
+    """Background pool computing exact KPIs and chart data behind estimates"""
+    return make_executor()
+
+
+def preview_rate():
+    """Sample rate for previews, shared with approximate KPIs when those are on"""
+    if st.session_state.get("approx_mode"):
+        return st.session_state.get("approx_rate", PREVIEW_RATE)
+    return PREVIEW_RATE
+
+
+def chart_data(conn, query, params, label, scale=(), progressive=True):
+    """Frame for a chart; a sample preview while progressive loading computes the exact one
+
+    conn is a ProfiledConnection and the result goes through its shared
+    result cache. label names the chart in the query profile; scale names
+    the sum/count columns that are scaled up in a preview. Previews need
+    the query to read the sales table, so pass progressive=False for any
+    other table.
+    """
+    source = f"{label} ({caller_source()})"
+    if not (progressive and st.session_state.get("progressive_mode")):
+        return conn.execute(query, params, cache=True, source=source).fetchdf()
+
+    data, preview = fetch_progressive(
+        conn, get_kpi_executor(), query, params, scale, rate=preview_rate(), source=source
+    )
+    if preview:
+        st.caption(f"🔍 Preview from a {preview_rate():.0%} sample, exact results loading...")
+        await_exact(query, params)
+    return data
+
+
+@st.fragment(run_every="0.5s")
+def await_exact(query, params):
+    """Rerun the page once a previewed query has its exact result
+
+    Only rendered next to a preview, so nothing polls once every chart
+    is exact.
+    """
+    if not is_pending(query, params):
+        st.rerun()
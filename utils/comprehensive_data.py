@@ -0,0 +1,134 @@
+"""Dataset and aggregates of the comprehensive dashboard, cached per dataset version"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.filters import BitmapIndex, DateIndex
+from utils.schema import optimize_frame
+
+# Bump when the generator changes so cached copies are replaced
+DATA_VERSION = 1
+
+REGIONS = ['North', 'South', 'East', 'West', 'Central']
+CATEGORIES = ['Electronics', 'Clothing', 'Food', 'Books', 'Sports']
+SEGMENTS = ['New', 'Returning', 'VIP', 'Inactive']
+
+DAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+class Dataset:
+    """Sales rows plus the customer segment and geographic tables
+
+    Every table goes through optimize_frame() first. date_index keeps the
+    sales rows sorted by Date so date-range filters are a binary search
+    rather than a scan; filter_index holds a bitmap per Region and
+    Category value of those sorted rows.
+    """
+
+    def __init__(self, sales, segments, geo):
+        self.date_index = DateIndex(optimize_frame(sales, "comprehensive.sales"), 'Date')
+        self.sales = self.date_index.frame
+        self.filter_index = BitmapIndex(self.sales, ['Region', 'Category'])
+        self.segments = optimize_frame(segments, "comprehensive.segments")
+        self.geo = optimize_frame(geo, "comprehensive.geo")
+
+
+def generate(seed=42):
+    """The dashboard's sample data; same draws as the original module-level code"""
+    rng = np.random.RandomState(seed)
+    dates = pd.date_range('2024-01-01', periods=365, freq='D')
+
+    sales = pd.DataFrame({
+        'Date': dates,
+        'Sales': rng.normal(1000, 200, 365),
+        'Region': rng.choice(REGIONS, 365),
+        'Category': rng.choice(CATEGORIES, 365),
+        'Profit': rng.normal(150, 50, 365),
+        'Customers': rng.randint(50, 200, 365)
+    })
+
+    segments = pd.DataFrame({
+        'Segment': SEGMENTS,
+        'Count': [rng.randint(100, 500), rng.randint(200, 600),
+                  rng.randint(50, 200), rng.randint(80, 300)],
+        'Revenue': [rng.randint(10000, 50000), rng.randint(20000, 80000),
+                    rng.randint(5000, 30000), rng.randint(8000, 25000)]
+    })
+
+    geo = pd.DataFrame({
+        'Region': REGIONS,
+        'Latitude': [40.7128, 34.0522, 41.8781, 37.7749, 39.9526],
+        'Longitude': [-74.0060, -118.2437, -87.6298, -122.4194, -75.1652],
+        'Sales': rng.randint(50000, 200000, len(REGIONS)),
+        'Customers': rng.randint(500, 2000, len(REGIONS))
+    })
+
+    return Dataset(sales, segments, geo)
+
+
+def compute_aggregates(sales):
+    """Every summary the dashboard charts, keyed by name"""
+    monthly = sales.groupby(sales['Date'].dt.to_period('M')).agg({
+        'Sales': 'sum',
+        'Profit': 'sum'
+    }).reset_index()
+    monthly['Date'] = monthly['Date'].dt.to_timestamp()
+
+    regional = sales.groupby('Region', observed=True).agg({
+        'Sales': 'sum',
+        'Profit': 'sum',
+        'Customers': 'sum'
+    }).reset_index()
+    regional['Profit Margin'] = (regional['Profit'] / regional['Sales'] * 100).round(1)
+
+    daily = sales.groupby(sales['Date'].dt.dayofweek)['Sales'].mean().reset_index()
+    daily['Day'] = [DAY_NAMES[day] for day in daily['Date']]
+
+    month_of_year = sales.groupby(sales['Date'].dt.month).agg({
+        'Sales': 'sum',
+        'Profit': 'sum'
+    }).reset_index()
+    month_of_year['Month'] = [MONTH_NAMES[month - 1] for month in month_of_year['Date']]
+
+    return {
+        'kpis': {
+            'total_sales': sales['Sales'].sum(),
+            'total_profit': sales['Profit'].sum(),
+            'total_customers': sales['Customers'].sum(),
+            'avg_order_value': sales['Sales'].mean(),
+            'rows': len(sales),
+        },
+        'monthly': monthly,
+        'region': sales.groupby('Region', observed=True)['Sales'].sum().reset_index(),
+        'category': sales.groupby('Category', observed=True).agg({
+            'Sales': 'sum',
+            'Profit': 'sum',
+            'Customers': 'sum'
+        }).reset_index(),
+        'regional': regional,
+        'daily': daily,
+        'month_of_year': month_of_year,
+    }
+
+
+# Shared read-only object rather than a copy per rerun: pages must not
+# mutate it (FilterSpec.apply returns new frames)
+@st.cache_resource(show_spinner="Loading dashboard data...")
+def _dataset(version):
+    return generate()
+
+
+@st.cache_data(show_spinner=False)
+def _aggregates(version):
+    return compute_aggregates(_dataset(version).sales)
+
+
+def load_dataset():
+    """The dashboard's Dataset, built once per version for every session"""
+    return _dataset(DATA_VERSION)
+
+
+def load_aggregates():
+    """compute_aggregates() of the dataset, computed once per version"""
+    return _aggregates(DATA_VERSION)
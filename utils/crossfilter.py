@@ -0,0 +1,99 @@
+"""Cross-filtering between charts driven by Plotly selection events"""
+import streamlit as st
+
+# Session state keys: column -> selected values, the sidebar filter the
+# selections were made under, a counter that resets chart widgets and the
+# last selection seen from each chart widget
+STATE_KEY = "cross_filters"
+BASE_KEY = "cross_filter_base"
+VERSION_KEY = "cross_filter_version"
+SEEN_KEY = "cross_filter_seen"
+
+
+def active_cross_filters():
+    """Column -> selected values for every chart with an active selection"""
+    return st.session_state.get(STATE_KEY, {})
+
+
+def with_cross_filters(filter_spec, cross_filters, exclude=None):
+    """filter_spec narrowed by every cross-filter except the one on exclude
+
+    A selection only narrows the sidebar filter on its column, never
+    widens or replaces it. A chart skips its own selection so it keeps
+    showing every mark, with the selected ones highlighted, and its query
+    stays a cache hit.
+    """
+    for column, values in sorted(cross_filters.items()):
+        if column != exclude:
+            filter_spec = filter_spec.narrow(column, values)
+    return filter_spec
+
+
+def chart_key(column):
+    """Widget key for the chart selecting on column; changes on reset"""
+    return f"{column}_chart_{st.session_state.get(VERSION_KEY, 0)}"
+
+
+def clear_cross_filters():
+    """Drop every selection and reset the charts' selection state"""
+    st.session_state[STATE_KEY] = {}
+    st.session_state[SEEN_KEY] = {}
+    st.session_state[VERSION_KEY] = st.session_state.get(VERSION_KEY, 0) + 1
+
+
+def reset_on_filter_change(filter_spec):
+    """Clear selections made under a different sidebar filter
+
+    Selections are always a subset of what the charts showed, so they only
+    stay valid while the sidebar filter they were made under is applied.
+    """
+    if st.session_state.get(BASE_KEY) != filter_spec.key:
+        if active_cross_filters():
+            clear_cross_filters()
+        st.session_state[BASE_KEY] = filter_spec.key
+
+
+def selected_values(event):
+    """Values picked in a st.plotly_chart selection event
+
+    Charts put the filtered column in custom_data; label/x/y are fallbacks
+    for traces that don't report it.
+    """
+    if not event:
+        return ()
+    values = set()
+    for point in event.selection.get("points", []):
+        custom = point.get("customdata")
+        if custom:
+            values.add(custom[0] if isinstance(custom, (list, tuple)) else custom)
+        elif "label" in point:
+            values.add(point["label"])
+    return tuple(sorted(values, key=str))
+
+
+def sync_selection(column, event):
+    """Store a chart's selection and rerun the whole page if it changed
+
+    Called from inside a fragment, where a selection only reruns that
+    fragment; the full rerun lets every other chart pick it up, and charts
+    whose effective filter did not change are served from the result cache.
+    Only a change in what the chart reports counts, so selections cleared
+    or set elsewhere are not overwritten by a stale chart state.
+    """
+    values = selected_values(event)
+    seen = st.session_state.setdefault(SEEN_KEY, {})
+    key = chart_key(column)
+    if seen.get(key, ()) == values:
+        return
+    seen[key] = values
+
+    cross_filters = dict(active_cross_filters())
+    if values == cross_filters.get(column, ()):
+        return
+
+    if values:
+        cross_filters[column] = values
+    else:
+        cross_filters.pop(column, None)
+    st.session_state[STATE_KEY] = cross_filters
+    st.rerun()
@@ -0,0 +1,97 @@
+"""DuckDB connection with resource settings from config.toml and the environment"""
+import os
+import tomllib
+
+import duckdb
+import streamlit as st
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.toml")
+
+# Setting name -> (environment variable, parser)
+SETTINGS = {
+    "threads": ("DUCKDB_THREADS", int),
+    "memory_limit": ("DUCKDB_MEMORY_LIMIT", str),
+    "temp_directory": ("DUCKDB_TEMP_DIRECTORY", str),
+    "preserve_insertion_order": ("DUCKDB_PRESERVE_INSERTION_ORDER", lambda v: str(v).lower() in ("1", "true", "yes", "on")),
+    "max_temp_directory_size": ("DUCKDB_MAX_TEMP_DIRECTORY_SIZE", str),
+}
+
+
+def load_settings(config_path=CONFIG_PATH):
+    """Resource settings from the [duckdb] section, overridden by DUCKDB_* env vars
+
+    Missing or empty values are left out so DuckDB keeps its own default.
+    """
+    settings = {}
+
+    if os.path.exists(config_path):
+        with open(config_path, "rb") as f:
+            section = tomllib.load(f).get("duckdb", {})
+        for name, (_, parse) in SETTINGS.items():
+            if section.get(name) not in (None, ""):
+                settings[name] = parse(section[name])
+
+    for name, (env_var, parse) in SETTINGS.items():
+        value = os.environ.get(env_var)
+        if value not in (None, ""):
+            settings[name] = parse(value)
+
+    # Relative spill paths are resolved against the project, not the cwd
+    if "temp_directory" in settings and not os.path.isabs(settings["temp_directory"]):
+        settings["temp_directory"] = os.path.join(os.path.dirname(config_path), settings["temp_directory"])
+
+    return settings
+
+
+def connect(database=":memory:", settings=None):
+    """Open a DuckDB connection with the configured resource limits applied"""
+    settings = load_settings() if settings is None else settings
+
+    if "temp_directory" in settings:
+        os.makedirs(settings["temp_directory"], exist_ok=True)
+
+    return duckdb.connect(database, config=settings)
+
+
+def effective_settings(conn):
+    """Values DuckDB is actually running with for the configurable settings"""
+    names = list(SETTINGS)
+    rows = conn.execute(
+        f"SELECT name, value FROM duckdb_settings() WHERE name IN ({','.join(['?' for _ in names])})",
+        names,
+    ).fetchall()
+    values = dict(rows)
+    return {name: values.get(name) for name in names}
+
+
+def progress_cursor(conn):
+    """New cursor for a worker thread that reports query_progress()
+
+    A cursor is a separate connection to the same database, so it is safe
+    to use from another thread while the page keeps using conn.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SET enable_progress_bar = true")
+    cursor.execute("SET enable_progress_bar_print = false")
+    return cursor
+
+
+def query_progress(cursor):
+    """Fraction of the cursor's running query done, or None before DuckDB has an estimate
+
+    Also None once the worker has closed the cursor.
+    """
+    try:
+        percent = cursor.query_progress()
+    except duckdb.Error:
+        return None
+    return percent / 100 if percent >= 0 else None
+
+
+@st.cache_resource
+def get_duckdb_connection():
+    """Initialize DuckDB connection with extensions"""
+    conn = connect()
+    conn.execute("INSTALL httpfs")
+    conn.execute("LOAD httpfs")
+    return conn
@@ -0,0 +1,315 @@
+"""Dataset shared by the drilldown pages, cached per source and version"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.db import connect
+from utils.hierarchy import hierarchy_arrays
+from utils.schema import optimize_frame
+
+PARQUET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sales_data.parquet")
+
+SOURCES = ["synthetic", "parquet"]
+SOURCE_LABELS = {"synthetic": "Demo data (48 rows)", "parquet": "Sales Parquet (DuckDB)"}
+
+# Selected source, kept across the drilldown pages
+SOURCE_KEY = "drilldown_source"
+
+# Counter bumped on every navigation; part of the level tables' widget
+# keys so a table shown again starts with nothing selected
+NAV_KEY = "drilldown_nav"
+
+# Bump when the synthetic generator changes so cached copies are replaced
+SYNTHETIC_VERSION = 1
+
+REGIONS = ['North', 'South', 'East', 'West']
+CATEGORIES = ['Electronics', 'Clothing', 'Food', 'Books']
+PRODUCTS = ['Laptop', 'Phone', 'Tablet', 'Shirt', 'Pants', 'Dress', 'Pizza', 'Burger', 'Novel', 'Textbook']
+
+LEVELS = ['Region', 'Category', 'Product']
+
+# Query parameters holding the drilldown path, outermost level first
+PATH_PARAMS = ['region', 'category']
+MEASURES = ['Sales', 'Quantity', 'Profit']
+
+# The Parquet file has no cost column; profit is estimated as sales minus
+# an assumed 70% cost of goods at list price
+COST_RATIO = 0.7
+
+PARQUET_SQL = f"""
+    SELECT
+        region AS Region,
+        category AS Category,
+        product AS Product,
+        ROUND(SUM(sales_amount))::BIGINT AS Sales,
+        SUM(quantity)::BIGINT AS Quantity,
+        ROUND(SUM(sales_amount - quantity * unit_price * {COST_RATIO}))::BIGINT AS Profit
+    FROM read_parquet(?)
+    GROUP BY ALL
+    ORDER BY Region, Category, Product
+"""
+
+
+# Every level of the hierarchy in one scan; depth counts the levels kept
+ROLLUP_SQL = """
+    SELECT
+        Region,
+        Category,
+        Product,
+        SUM(Sales)::BIGINT AS Sales,
+        SUM(Quantity)::BIGINT AS Quantity,
+        SUM(Profit)::BIGINT AS Profit,
+        COUNT(DISTINCT Product) AS Products,
+        3 - (GROUPING(Region) + GROUPING(Category) + GROUPING(Product)) AS depth
+    FROM drilldown
+    GROUP BY ROLLUP(Region, Category, Product)
+    ORDER BY depth, Region, Category, Product
+"""
+
+
+class HierarchyNode:
+    """One drilldown level: totals for path and a row per child"""
+
+    def __init__(self, path, totals):
+        self.path = path
+        self.totals = totals
+        self.children = None
+
+
+def _synthetic():
+    # Same draws as the original per-page generator, without touching the
+    # global numpy seed
+    rng = np.random.RandomState(42)
+    data = []
+    for region in REGIONS:
+        for category in CATEGORIES:
+            for product in rng.choice(PRODUCTS, 3):
+                data.append({
+                    'Region': region,
+                    'Category': category,
+                    'Product': product,
+                    'Sales': rng.randint(1000, 50000),
+                    'Quantity': rng.randint(10, 500),
+                    'Profit': rng.randint(100, 10000)
+                })
+    return pd.DataFrame(data)
+
+
+def _parquet(path):
+    # Aggregated to one row per region/category/product in DuckDB, so the
+    # pages get the same shape whatever the size of the file
+    conn = connect()
+    try:
+        return conn.execute(PARQUET_SQL, [path]).fetchdf()
+    finally:
+        conn.close()
+
+
+def build_hierarchy(df):
+    """Path-keyed index of every region/category/product aggregate
+
+    index[()] is the whole dataset, index[(region,)] a region and
+    index[(region, category)] a category. Each node has totals (Sales,
+    Quantity, Profit and Products, the row count) and children, a frame
+    with one row per next-level value. Navigating a level is then a
+    dictionary lookup instead of a filter and a groupby.
+    """
+    conn = connect()
+    try:
+        conn.register("drilldown", df)
+        rows = conn.execute(ROLLUP_SQL).fetchdf()
+    finally:
+        conn.close()
+
+    index = {}
+    for row in rows.itertuples(index=False):
+        path = tuple(getattr(row, level) for level in LEVELS[:row.depth])
+        index[path] = HierarchyNode(path, {name: getattr(row, name) for name in MEASURES + ['Products']})
+
+    for depth in range(1, len(LEVELS) + 1):
+        level_rows = rows[rows['depth'] == depth][LEVELS[:depth] + MEASURES + ['Products']]
+        parents = LEVELS[:depth - 1]
+        groups = level_rows.groupby(parents, sort=False, observed=True) if parents else [((), level_rows)]
+        for key, children in groups:
+            key = key if isinstance(key, tuple) else (key,)
+            index[key].children = children.reset_index(drop=True)
+
+    return index
+
+
+def dataset_version(source):
+    """Changes whenever the data behind source changes"""
+    if source == "parquet":
+        stat = os.stat(PARQUET_PATH)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+    return f"synthetic-{SYNTHETIC_VERSION}"
+
+
+@st.cache_data(show_spinner="Loading drilldown data...")
+def _load(source, version):
+    df = _parquet(PARQUET_PATH) if source == "parquet" else _synthetic()
+    return optimize_frame(df, f"drilldown.{source}")
+
+
+# Shared read-only objects rather than copies: pages must not mutate them
+@st.cache_resource(show_spinner=False)
+def _hierarchy(source, version):
+    return build_hierarchy(_load(source, version))
+
+
+@st.cache_data(show_spinner=False)
+def _chart_hierarchy(source, version, levels, value, top):
+    conn = connect()
+    try:
+        conn.register("drilldown", _load(source, version))
+        return hierarchy_arrays(conn, "drilldown", list(levels), value, top=top)
+    finally:
+        conn.close()
+
+
+def available_source(source, warn=True):
+    """source, or the demo data when its file is missing"""
+    if source == "parquet" and not os.path.exists(PARQUET_PATH):
+        if warn:
+            st.warning("data/sales_data.parquet not found (open the DuckDB dashboard to create it); using demo data.")
+        return "synthetic"
+    return source
+
+
+def load_drilldown_data(source="synthetic"):
+    """Region/Category/Product rows with Sales, Quantity and Profit
+
+    Built once per source and version and shared by every page and
+    session; reruns only pay for a cache lookup.
+    """
+    source = available_source(source)
+    return _load(source, dataset_version(source))
+
+
+def load_hierarchy(source="synthetic"):
+    """build_hierarchy() of the dataset, computed once per source and version"""
+    source = available_source(source, warn=False)
+    return _hierarchy(source, dataset_version(source))
+
+
+def load_chart_hierarchy(source, levels, value='Sales', top=10):
+    """hierarchy_arrays() over the dataset for go.Sunburst / go.Treemap, cached per source and version"""
+    source = available_source(source, warn=False)
+    return _chart_hierarchy(source, dataset_version(source), tuple(levels), value, top)
+
+
+def dimension_values(df):
+    """Regions, categories and products in order of appearance"""
+    return list(df['Region'].unique()), list(df['Category'].unique()), list(df['Product'].unique())
+
+
+LEVEL_COLUMNS = {
+    'Sales': st.column_config.NumberColumn("Sales", format="dollar"),
+    'Quantity': st.column_config.NumberColumn("Quantity", format="localized"),
+    'Profit': st.column_config.NumberColumn("Profit", format="dollar"),
+    'Products': st.column_config.NumberColumn("Products", format="localized"),
+    'Margin %': st.column_config.NumberColumn("Margin %", format="%.1f%%"),
+}
+
+
+def product_rows(frame):
+    """Product rows sorted by sales, with margin and performance columns"""
+    rows = frame.sort_values('Sales', ascending=False).reset_index(drop=True)
+    rows['Margin %'] = rows['Profit'] / rows['Sales'] * 100
+    rows['Performance'] = np.where(rows['Sales'] > frame['Sales'].mean(), "🔥 Above Average", "📊 Below Average")
+    return rows
+
+
+def select_row(frame, name, columns):
+    """Row picked in a single-select table of frame, or None
+
+    One st.dataframe stands in for a widget row per item: the page sends
+    the same number of elements whatever the row count and the grid
+    scrolls the rows in the browser. Row positions refer to frame, so a
+    sort applied in the browser still maps back to the right row.
+    """
+    event = st.dataframe(
+        frame[columns],
+        column_config=LEVEL_COLUMNS,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"{name}_{st.session_state.get(NAV_KEY, 0)}",
+    )
+    rows = event.selection.rows
+    return frame.iloc[rows[0]] if rows else None
+
+
+def navigate(page=None, **state):
+    """Store the drilldown selection in session state and go to page (or rerun)"""
+    st.session_state.update(state)
+    st.session_state[NAV_KEY] = st.session_state.get(NAV_KEY, 0) + 1
+    if page:
+        st.switch_page(page)
+    st.rerun()
+
+
+def next_paths(hierarchy, path, top=2):
+    """Paths one or two clicks below path, most likely first
+
+    Every child of path (by sales), then the top children of the
+    top-selling children; used to decide what to prefetch.
+    """
+    if len(path) >= len(LEVELS) - 1:
+        return []
+    children = hierarchy[path].children.sort_values('Sales', ascending=False)
+    paths = [path + (value,) for value in children[LEVELS[len(path)]]]
+    if len(path) + 1 < len(LEVELS) - 1:
+        for child in paths[:top]:
+            paths.extend(next_paths(hierarchy, child, top)[:top])
+    return paths
+
+
+def path_from_url(hierarchy):
+    """Drilldown path in the query string, e.g. ("North", "Electronics")
+
+    The path is cut back to its deepest level that exists in hierarchy,
+    so a stale or hand-edited link opens the nearest valid level, and the
+    query string is rewritten to match.
+    """
+    path = ()
+    for param in PATH_PARAMS:
+        value = st.query_params.get(param)
+        if value is None or path + (value,) not in hierarchy:
+            break
+        path += (value,)
+    _write_path(path)
+    return path
+
+
+def _write_path(path):
+    for param in PATH_PARAMS[len(path):]:
+        st.query_params.pop(param, None)
+    for param, value in zip(PATH_PARAMS, path):
+        if st.query_params.get(param) != value:
+            st.query_params[param] = value
+
+
+def open_path(*path):
+    """Navigate to path by rewriting the query string; () is the top level"""
+    _write_path(path)
+    navigate()
+
+
+def source_picker():
+    """Sidebar choice of dataset; the default comes from DRILLDOWN_SOURCE"""
+    current = st.session_state.get(SOURCE_KEY, os.environ.get("DRILLDOWN_SOURCE", "synthetic"))
+    if current not in SOURCES:
+        current = "synthetic"
+    choice = st.sidebar.radio(
+        "📦 Data Source",
+        SOURCES,
+        index=SOURCES.index(current),
+        format_func=SOURCE_LABELS.get,
+        key="drilldown_source_picker"
+    )
+    st.session_state[SOURCE_KEY] = choice
+    return choice
@@ -0,0 +1,147 @@
+"""Filtered-data exports written by DuckDB straight to disk"""
+import os
+import secrets
+import time
+
+import streamlit as st
+
+from utils.db import progress_cursor, query_progress
+
+# Streamlit serves <project>/static/ when server.enableStaticServing is on
+# (.streamlit/config.toml), which streams the file from disk instead of
+# through Python memory
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+EXPORT_DIR = os.path.join(STATIC_DIR, "exports")
+
+# Streamlit's static file handler refuses files over 200 MB, so exports are
+# written as parts of about PART_SIZE (DuckDB closes a part once it passes
+# that size, so leave headroom)
+STATIC_MAX_BYTES = 200 * 1024 * 1024
+PART_SIZE = "150MB"
+
+# Session state key of the session's random export directory name
+SESSION_KEY = "export_session"
+
+# Exports older than this are removed when a new one starts
+MAX_AGE_SECONDS = 60 * 60
+
+EXPORT_FORMATS = {
+    "csv": {"label": "CSV", "options": "FORMAT csv, HEADER", "extension": "csv", "mime": "text/csv"},
+    "parquet": {"label": "Parquet (zstd)", "options": "FORMAT parquet, COMPRESSION zstd", "extension": "parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+
+def cleanup_exports(directory=EXPORT_DIR, max_age=MAX_AGE_SECONDS):
+    """Delete export files older than max_age seconds, and emptied session directories"""
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - max_age
+    for root, _, files in os.walk(directory, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        if root != directory and not os.listdir(root):
+            os.rmdir(root)
+
+
+def session_directory(base=EXPORT_DIR):
+    """Export directory of the current session, named by a random token
+
+    Sessions never share a directory, and neither the directory nor the
+    file names can be guessed, so a statically served export is only
+    reachable through the link shown to the session that made it.
+    """
+    token = st.session_state.setdefault(SESSION_KEY, secrets.token_urlsafe(16))
+    return os.path.join(base, token)
+
+
+def _copy(job, cursor, query, params, path, options):
+    quoted_path = path.replace("'", "''")
+    try:
+        cursor.execute(
+            f"COPY ({query}) TO '{quoted_path}' ({options}, FILE_SIZE_BYTES '{PART_SIZE}', FILENAME_PATTERN 'part_{{i}}')",
+            params,
+        )
+    finally:
+        cursor.close()
+    return path
+
+
+def start_export(runner, conn, query, params, fmt, directory=None, name="export"):
+    """Start writing the rows of query to a new export on the job runner
+
+    DuckDB streams the result to disk itself, so the rows never become a
+    DataFrame or an in-memory string. The export is a directory of parts
+    (see export_parts()) under directory, by default the session's own
+    session_directory(). The job's info holds the path, name, extension
+    and MIME type and, under static/, the URL the static file server
+    uses; its result is the path once written.
+    """
+    cleanup_exports()
+    directory = directory or session_directory()
+    os.makedirs(directory, exist_ok=True)
+
+    spec = EXPORT_FORMATS[fmt]
+    export_name = f"{name}_{secrets.token_urlsafe(16)}"
+    path = os.path.join(directory, export_name)
+
+    url = None
+    relative = os.path.relpath(path, STATIC_DIR)
+    if not relative.startswith(os.pardir):
+        url = "app/static/" + relative.replace(os.sep, "/")
+
+    cursor = progress_cursor(conn)
+
+    return runner.submit(
+        _copy, cursor, query, list(params), path, spec["options"],
+        label=f"Exporting {export_name}",
+        progress_source=lambda: query_progress(cursor),
+        info={"path": path, "name": export_name, "extension": spec["extension"], "mime": spec["mime"], "url": url},
+    )
+
+
+def _part_number(file_name):
+    return int(os.path.splitext(file_name)[0].rsplit("_", 1)[1])
+
+
+def export_parts(job):
+    """Parts of an export in row order, as dicts of file_name, path, size and url
+
+    A single part is named like the export; several are numbered. url is
+    None outside static/ and for parts too large for the static handler.
+    """
+    path = job.info["path"]
+    files = sorted(os.listdir(path), key=_part_number) if os.path.isdir(path) else []
+
+    parts = []
+    for number, file_name in enumerate(files):
+        part_path = os.path.join(path, file_name)
+        size = os.path.getsize(part_path)
+        suffix = f"_part{number + 1}" if len(files) > 1 else ""
+        url = f"{job.info['url']}/{file_name}" if job.info["url"] and size <= STATIC_MAX_BYTES else None
+        parts.append({
+            "file_name": f"{job.info['name']}{suffix}.{job.info['extension']}",
+            "path": part_path,
+            "size": size,
+            "url": url,
+        })
+    return parts
+
+
+def read_part(part):
+    """Bytes of one export part, for st.download_button(data=...)
+
+    Parts are at most about PART_SIZE, so this never holds a whole large
+    export in memory.
+    """
+    with open(part["path"], "rb") as f:
+        return f.read()
+
+
+def export_size(job):
+    """Bytes written so far by an export job"""
+    path = job.info["path"]
+    if not os.path.isdir(path):
+        return 0
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
@@ -0,0 +1,335 @@
+"""One filter model compiled to DuckDB SQL or pandas masks"""
+import datetime
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _quote(column):
+    """Double-quote a column name, rejecting anything that isn't an identifier"""
+    if not _IDENTIFIER.match(column):
+        raise ValueError(f"Invalid column name: {column!r}")
+    return f'"{column}"'
+
+
+def is_column_name(column):
+    """True for column names FilterSpec accepts: plain SQL identifiers"""
+    return bool(_IDENTIFIER.match(column))
+
+
+def _canonical(value):
+    """Normalize a bound so 0, 0.0 and numpy scalars share one key"""
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+    return str(value)
+
+
+def _is_calendar_date(value):
+    """True for datetime.date bounds (whole days), False for timestamps"""
+    return isinstance(value, datetime.date) and not isinstance(value, datetime.datetime)
+
+
+@dataclass(frozen=True)
+class InPredicate:
+    """column IN (values)"""
+    column: str
+    values: tuple
+
+    def to_sql(self):
+        # Left empty only by FilterSpec.narrow(): nothing matches
+        if not self.values:
+            return "1=0", []
+        placeholders = ",".join(["?" for _ in self.values])
+        return f"{_quote(self.column)} IN ({placeholders})", list(self.values)
+
+    def mask(self, df):
+        return df[self.column].isin(self.values).to_numpy()
+
+    def covers(self, domain):
+        """True when every value of the column's domain is selected"""
+        values = domain.get("values")
+        return values is not None and set(values) <= set(self.values)
+
+
+@dataclass(frozen=True)
+class BetweenPredicate:
+    """low <= column <= high; date bounds include the whole end day"""
+    column: str
+    low: object
+    high: object
+
+    def _bounds(self):
+        # Calendar-date bounds against a timestamp column: a date low starts
+        # at midnight and a date high compares on < high + 1 day, so rows
+        # later on the end day still match, whatever the other bound is
+        low = pd.Timestamp(self.low) if _is_calendar_date(self.low) else self.low
+        if _is_calendar_date(self.high):
+            return pd.Timestamp(low), pd.Timestamp(self.high) + pd.Timedelta(days=1), False
+        return low, self.high, True
+
+    def to_sql(self):
+        low, high, inclusive = self._bounds()
+        column = _quote(self.column)
+        if inclusive:
+            return f"{column} BETWEEN ? AND ?", [low, high]
+        return f"{column} >= ? AND {column} < ?", [low.to_pydatetime(), high.to_pydatetime()]
+
+    def mask(self, df):
+        low, high, inclusive = self._bounds()
+        values = df[self.column]
+        if inclusive:
+            return ((values >= low) & (values <= high)).to_numpy()
+        return ((values >= low) & (values < high)).to_numpy()
+
+    def covers(self, domain):
+        """True when the range contains the column's whole [min, max]"""
+        if domain.get("min") is None or domain.get("max") is None:
+            return False
+        low, high, inclusive = self._bounds()
+        if low > domain["min"]:
+            return False
+        return high >= domain["max"] if inclusive else high > domain["max"]
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """Immutable set of filter predicates shared by every dashboard
+
+    Build it with the chained helpers, then compile with to_sql() for
+    DuckDB or mask()/apply() for pandas. Empty selections add no predicate,
+    matching the "nothing selected means everything" behaviour of the
+    sidebar widgets. Two specs describing the same filter compare equal
+    and share the same key, so either can be used as a cache key.
+    """
+    predicates: tuple = field(default_factory=tuple)
+
+    def _with(self, predicate):
+        # Replace any existing predicate on the same column
+        kept = tuple(p for p in self.predicates if p.column != predicate.column)
+        return FilterSpec(tuple(sorted(kept + (predicate,), key=lambda p: p.column)))
+
+    def isin(self, column, values):
+        """Keep rows whose column is one of values (no-op when empty)"""
+        values = tuple(sorted(set(values), key=str))
+        if not values:
+            return self
+        return self._with(InPredicate(column, values))
+
+    def narrow(self, column, values):
+        """Like isin(), but intersected with an existing IN filter on column
+
+        isin() replaces the predicate on column; narrow() keeps only the
+        values both allow, and an empty intersection matches no rows.
+        """
+        values = set(values)
+        if not values:
+            return self
+        current = next((p for p in self.predicates if p.column == column), None)
+        if current is not None and not isinstance(current, InPredicate):
+            raise ValueError(f"Can only narrow an IN filter on {column!r}")
+        if current is not None:
+            values &= set(current.values)
+        return self._with(InPredicate(column, tuple(sorted(values, key=str))))
+
+    def eq(self, column, value, any_value="All"):
+        """Keep rows equal to value, unless it is the "All" choice"""
+        if value is None or value == any_value:
+            return self
+        return self.isin(column, [value])
+
+    def between(self, column, low, high):
+        """Keep rows with low <= column <= high"""
+        return self._with(BetweenPredicate(column, low, high))
+
+    def date_range(self, column, value):
+        """Apply a st.date_input range, ignoring a half-picked range"""
+        if value is None or len(value) != 2:
+            return self
+        return self.between(column, value[0], value[1])
+
+    def normalize(self, catalog):
+        """Drop predicates that match every row according to the catalog
+
+        catalog maps a column to its domain: {"values": [...]} for
+        categorical columns or {"min": x, "max": y} for ranges. The sidebar
+        defaults (all regions, full slider ranges) then compile to no
+        predicate at all, and equivalent filter states share one key.
+        """
+        kept = tuple(
+            p for p in self.predicates
+            if p.column not in catalog or not p.covers(catalog[p.column])
+        )
+        return FilterSpec(kept)
+
+    def only(self, columns):
+        """Same spec keeping just the predicates on columns"""
+        return FilterSpec(tuple(p for p in self.predicates if p.column in columns))
+
+    def without(self, column):
+        """Same spec with the predicate on column removed"""
+        return FilterSpec(tuple(p for p in self.predicates if p.column != column))
+
+    @property
+    def columns(self):
+        return tuple(p.column for p in self.predicates)
+
+    @property
+    def key(self):
+        """Canonical hashable form, stable across reruns and sessions"""
+        return tuple(
+            (type(p).__name__, p.column, p.values if isinstance(p, InPredicate) else (_canonical(p.low), _canonical(p.high)))
+            for p in self.predicates
+        )
+
+    def to_sql(self):
+        """Parameterized WHERE clause and its parameters"""
+        conditions = []
+        params = []
+        for predicate in self.predicates:
+            condition, values = predicate.to_sql()
+            conditions.append(condition)
+            params.extend(values)
+        return (" AND ".join(conditions) if conditions else "1=1"), params
+
+    def mask(self, df):
+        """Vectorized boolean mask over df"""
+        result = np.ones(len(df), dtype=bool)
+        for predicate in self.predicates:
+            result &= predicate.mask(df)
+        return result
+
+    def apply(self, df):
+        """Rows of df matching every predicate, without copying when unfiltered"""
+        if not self.predicates:
+            return df
+        return df[self.mask(df)]
+
+
+class DateIndex:
+    """Rows kept sorted by a datetime column, sliced by range with binary search
+
+    A date range over sorted rows is one contiguous block, found with two
+    numpy.searchsorted calls in O(log n) instead of comparing every row.
+    Sorting happens once when the index is built; build it where the data
+    is cached and reuse it across reruns.
+    """
+
+    def __init__(self, df, column):
+        self.column = column
+        values = df[column]
+        self.frame = df if values.is_monotonic_increasing else df.sort_values(column, kind="stable").reset_index(drop=True)
+        self._values = self.frame[column].to_numpy()
+
+    def __len__(self):
+        return len(self._values)
+
+    def _position(self, bound, side):
+        value = pd.Timestamp(bound).to_datetime64().astype(self._values.dtype)
+        return int(np.searchsorted(self._values, value, side=side))
+
+    def positions(self, low, high):
+        """[start, stop) row positions of low <= column <= high
+
+        Same bound semantics as FilterSpec.between: calendar-date bounds
+        include the whole end day.
+        """
+        low, high, inclusive = BetweenPredicate(self.column, low, high)._bounds()
+        start = self._position(low, "left")
+        stop = self._position(high, "right" if inclusive else "left")
+        return start, max(start, stop)
+
+    def slice(self, low, high):
+        """Rows with low <= column <= high, as a view of the sorted frame"""
+        start, stop = self.positions(low, high)
+        return self.frame.iloc[start:stop]
+
+    def apply(self, filter_spec, bitmaps=None):
+        """filter_spec.apply() over the sorted frame, slicing for the indexed column
+
+        bitmaps, a BitmapIndex built on self.frame, evaluates the
+        predicates it covers within the slice.
+        """
+        start, stop = 0, len(self)
+        for predicate in filter_spec.predicates:
+            if predicate.column == self.column and isinstance(predicate, BetweenPredicate):
+                start, stop = self.positions(predicate.low, predicate.high)
+        rows = self.frame.iloc[start:stop]
+        rest = filter_spec.without(self.column)
+        if bitmaps is not None:
+            mask = bitmaps.mask(rest, start, stop)
+            if mask is not None:
+                rows = rows[mask]
+            rest = bitmaps.unindexed(rest)
+        return rest.apply(rows)
+
+
+class BitmapIndex:
+    """Packed bitmap per value of categorical columns
+
+    Each value of an indexed column gets one bit per row (numpy.packbits,
+    n / 8 bytes), built once. An InPredicate is then the OR of its values'
+    bitmaps and a filter the AND of its predicates: byte-wise operations
+    over n / 8 bytes instead of string comparisons over every row, with
+    rows materialized once at the end. Building costs one pass per value,
+    so index low-cardinality columns.
+    """
+
+    def __init__(self, df, columns):
+        self.frame = df
+        self._rows = len(df)
+        self._bitmaps = {}
+        for column in columns:
+            codes, values = pd.factorize(df[column])
+            self._bitmaps[column] = {value: np.packbits(codes == code) for code, value in enumerate(values)}
+        self._empty = np.zeros((self._rows + 7) // 8, dtype=np.uint8)
+
+    def __len__(self):
+        return self._rows
+
+    @property
+    def columns(self):
+        return tuple(self._bitmaps)
+
+    def _indexed(self, filter_spec):
+        return [p for p in filter_spec.predicates if isinstance(p, InPredicate) and p.column in self._bitmaps]
+
+    def unindexed(self, filter_spec):
+        """filter_spec without the predicates this index evaluates"""
+        for predicate in self._indexed(filter_spec):
+            filter_spec = filter_spec.without(predicate.column)
+        return filter_spec
+
+    def bits(self, filter_spec):
+        """Packed bitmap of rows matching the indexed predicates, or None if there are none"""
+        result = None
+        for predicate in self._indexed(filter_spec):
+            bitmaps = self._bitmaps[predicate.column]
+            selected = np.bitwise_or.reduce([bitmaps.get(value, self._empty) for value in predicate.values])
+            result = selected if result is None else result & selected
+        return result
+
+    def mask(self, filter_spec, start=0, stop=None):
+        """Boolean mask of rows [start, stop) matching the indexed predicates, or None"""
+        bits = self.bits(filter_spec)
+        if bits is None:
+            return None
+        stop = self._rows if stop is None else stop
+        first = start // 8
+        unpacked = np.unpackbits(bits[first:(stop + 7) // 8])
+        offset = start - first * 8
+        return unpacked[offset:offset + stop - start].view(bool)
+
+    def count(self, filter_spec):
+        """Rows matching the indexed predicates, without materializing them"""
+        bits = self.bits(filter_spec)
+        return self._rows if bits is None else int(np.bitwise_count(bits).sum())
+
+    def apply(self, filter_spec):
+        """filter_spec.apply() with the indexed predicates evaluated on bitmaps"""
+        mask = self.mask(filter_spec)
+        rows = self.frame if mask is None else self.frame[mask]
+        return self.unindexed(filter_spec).apply(rows)
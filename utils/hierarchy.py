@@ -0,0 +1,102 @@
+"""Compact hierarchy aggregates for sunburst and treemap charts, computed in DuckDB"""
+
+# Label of the bucket holding the children cut by top-N truncation
+OTHER_LABEL = "Other"
+
+# Label of members whose value is NULL
+NULL_LABEL = "(missing)"
+
+# Joins a node's path into its id; escaped inside path members
+ID_SEPARATOR = "/"
+
+# In SQL every key carries its kind as a first character, so a real
+# "Other" member, the Other bucket and NULL members never group together,
+# and a NULL key only ever means "rolled up" or "below an Other bucket"
+VALUE_KIND, NULL_KIND, OTHER_KIND = "v", "n", "o"
+
+
+def _encoded(level):
+    return f"CASE WHEN {level} IS NULL THEN '{NULL_KIND}' ELSE '{VALUE_KIND}' || {level}::VARCHAR END"
+
+
+def _node_id(path):
+    return ID_SEPARATOR.join(key.replace("\\", "\\\\").replace(ID_SEPARATOR, "\\" + ID_SEPARATOR) for key in path)
+
+
+def _label(key, other_label, null_label):
+    if key == OTHER_KIND:
+        return other_label
+    if key == NULL_KIND:
+        return null_label
+    return key[1:]
+
+
+def hierarchy_sql(table, levels, value, where_clause="1=1", top=None):
+    """SQL returning one row per node of the levels hierarchy (root excluded)
+
+    Children past the top largest of each parent are merged into one
+    Other node with no children of its own, so every level sends at most
+    top + 1 nodes per parent whatever the cardinality. Keys come back
+    encoded with their kind (see VALUE_KIND).
+    """
+    keys = [f"k{i}" for i in range(len(levels))]
+    steps = [f"""
+        step0 AS (
+            SELECT {', '.join(f"{_encoded(level)} AS {key}" for level, key in zip(levels, keys))}, SUM({value}) AS v
+            FROM {table}
+            WHERE {where_clause}
+            GROUP BY ALL
+        )"""]
+
+    if top is not None:
+        for i, key in enumerate(keys):
+            parents = ", ".join(keys[:i])
+            partition = f"PARTITION BY {parents}" if parents else ""
+            deeper = "".join(f", CASE WHEN rank_ <= {top} THEN {k} END AS {k}" for k in keys[i + 1:])
+            steps.append(f"""
+        ranked{i} AS (
+            SELECT *, DENSE_RANK() OVER ({partition} ORDER BY total_ DESC, {key}) AS rank_
+            FROM (SELECT *, SUM(v) OVER (PARTITION BY {', '.join(keys[:i + 1])}) AS total_ FROM step{i})
+        ),
+        step{i + 1} AS (
+            SELECT
+                {', '.join(keys[:i]) + ',' if i else ''}
+                CASE WHEN {key} IS NULL OR rank_ <= {top} THEN {key} ELSE '{OTHER_KIND}' END AS {key}
+                {deeper},
+                v
+            FROM ranked{i}
+        )""")
+
+    grouping = " + ".join(f"GROUPING({key})" for key in keys)
+    return f"""
+        WITH {','.join(steps)}
+        SELECT {', '.join(keys)}, SUM(v) AS v, {len(keys)} - ({grouping}) AS depth
+        FROM step{len(steps) - 1}
+        GROUP BY ROLLUP({', '.join(keys)})
+        HAVING depth > 0
+        ORDER BY depth, v DESC
+    """
+
+
+def hierarchy_arrays(conn, table, levels, value, where_clause="1=1", params=None, top=None,
+                     other_label=OTHER_LABEL, null_label=NULL_LABEL):
+    """ids, labels, parents and values for go.Sunburst / go.Treemap
+
+    DuckDB aggregates value (a SQL expression, summed) over the levels
+    columns of table, so Plotly receives one entry per node instead of
+    every row; pass the dict straight on with branchvalues="total".
+    NULL members are kept under null_label. Ids are built from the encoded
+    path, so labels containing "/" or equal to other_label never collide.
+    """
+    sql = hierarchy_sql(table, levels, value, where_clause, top)
+    ids, labels, parents, values = [], [], [], []
+    for *keys, total, depth in conn.execute(sql, list(params or [])).fetchall():
+        path = keys[:depth]
+        # Rows for the levels below a collapsed Other node
+        if None in path:
+            continue
+        ids.append(_node_id(path))
+        labels.append(_label(path[-1], other_label, null_label))
+        parents.append(_node_id(path[:-1]))
+        values.append(total)
+    return {"ids": ids, "labels": labels, "parents": parents, "values": values}
@@ -0,0 +1,168 @@
+"""Uploaded files spooled to disk and loaded with DuckDB's parallel CSV reader"""
+import os
+import time
+import uuid
+
+import streamlit as st
+
+from utils.db import progress_cursor, query_progress
+from utils.filters import is_column_name
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".uploads")
+
+# Copy uploads in 1 MB chunks instead of one bytes object
+CHUNK_SIZE = 1024 * 1024
+
+PAGE_SIZE = 100
+
+NUMERIC_TYPES = {"TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+                 "UINTEGER", "UBIGINT", "FLOAT", "DOUBLE"}
+
+# Uploads are tables in this schema of the shared connection, so they run
+# under the same thread and memory limits as everything else
+UPLOAD_SCHEMA = "uploads"
+
+# Upload tables older than this are dropped when a new upload starts; a
+# session that closed without clearing its upload leaves its table behind
+MAX_AGE_SECONDS = 6 * 60 * 60
+
+# Column holding each row's position in the file. DuckDB runs with
+# preserve_insertion_order = false, so neither rowid nor scan order follow
+# the file
+LOAD_ORDER = "__upload_row"
+
+# Session state key of the session's upload table
+TABLE_KEY = "upload_table"
+
+
+def cleanup_uploads(conn, max_age=MAX_AGE_SECONDS):
+    """Drop upload tables created more than max_age seconds ago"""
+    cutoff = time.time() - max_age
+    tables = conn.execute(
+        "SELECT table_name FROM duckdb_tables() WHERE schema_name = ?", [UPLOAD_SCHEMA]
+    ).fetchall()
+    for (name,) in tables:
+        created = name.split("_")[1]
+        if created.isdigit() and int(created) < cutoff:
+            conn.execute(f"DROP TABLE IF EXISTS {UPLOAD_SCHEMA}.{name}")
+
+
+def new_session_table(conn, prefix="upload"):
+    """Fresh table name for an upload; the session's previous upload table is dropped
+
+    Every upload gets a new name, so results cached for an earlier upload
+    are never served for this one. Names carry their creation time for
+    cleanup_uploads().
+    """
+    drop_session_table(conn)
+    conn.execute(f"CREATE SCHEMA IF NOT EXISTS {UPLOAD_SCHEMA}")
+    cleanup_uploads(conn)
+    table = f"{UPLOAD_SCHEMA}.{prefix}_{int(time.time())}_{uuid.uuid4().hex[:12]}"
+    st.session_state[TABLE_KEY] = table
+    return table
+
+
+def drop_session_table(conn):
+    """Drop the session's upload table, e.g. once the upload is cleared"""
+    table = st.session_state.pop(TABLE_KEY, None)
+    if table:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def table_exists(conn, table):
+    schema, name = table.split(".")
+    return conn.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE schema_name = ? AND table_name = ?", [schema, name]
+    ).fetchone()[0] > 0
+
+
+def spool_upload(uploaded_file, directory=UPLOAD_DIR, report=None):
+    """Write an uploaded file to disk in chunks and return the path
+
+    report(fraction) is called after every chunk.
+    """
+    os.makedirs(directory, exist_ok=True)
+    extension = os.path.splitext(uploaded_file.name)[1] or ".csv"
+    path = os.path.join(directory, f"{uuid.uuid4().hex}{extension}")
+
+    uploaded_file.seek(0)
+    with open(path, "wb") as out:
+        while chunk := uploaded_file.read(CHUNK_SIZE):
+            out.write(chunk)
+            if report is not None:
+                report(out.tell() / max(uploaded_file.size, 1))
+    return path
+
+
+def _ingest(job, cursor, uploaded_file, table):
+    try:
+        path = spool_upload(uploaded_file, report=lambda fraction: job.report(fraction, "copying to disk"))
+        if job.cancelled:
+            os.remove(path)
+            return 0
+
+        job.report(0.0, "parsing")
+        quoted_path = path.replace("'", "''")
+        try:
+            # row_number() OVER () numbers rows in file order
+            cursor.execute(
+                f"CREATE OR REPLACE TABLE {table} AS "
+                f"SELECT row_number() OVER () - 1 AS {LOAD_ORDER}, * FROM read_csv('{quoted_path}')"
+            )
+        finally:
+            os.remove(path)
+        # Replaced by a newer upload while loading: nothing will read it
+        if job.cancelled:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            return 0
+        return cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def start_ingest(runner, conn, uploaded_file, table):
+    """Spool an upload and load it into table on the job runner
+
+    Copying to disk and parsing both run in the background with progress.
+    DuckDB sniffs the CSV dialect and types and parses it in parallel
+    straight from the spooled file; pandas never sees the whole file. The
+    job's result is the row count, its info holds the table name.
+    """
+    cursor = progress_cursor(conn)
+    return runner.submit(
+        _ingest, cursor, uploaded_file, table,
+        label=f"Loading {uploaded_file.name}",
+        progress_source=lambda: query_progress(cursor),
+        info={"table": table, "name": uploaded_file.name},
+    )
+
+
+def preview_page(conn, table, page, page_size=PAGE_SIZE):
+    """One page of rows in file order, so only page_size rows ever reach the browser"""
+    return conn.execute(
+        f"SELECT * EXCLUDE ({LOAD_ORDER}) FROM {table} "
+        f"WHERE {LOAD_ORDER} >= ? AND {LOAD_ORDER} < ? ORDER BY {LOAD_ORDER}",
+        [page * page_size, (page + 1) * page_size],
+    ).fetchdf()
+
+
+def table_summary(conn, table):
+    """Per-column type, min/max, distinct count and null share"""
+    return conn.execute(f"SUMMARIZE SELECT * EXCLUDE ({LOAD_ORDER}) FROM {table}").fetchdf()
+
+
+def table_columns(conn, table):
+    """(text columns, numeric columns) of a table, in table order
+
+    Only columns FilterSpec can filter on (plain identifiers) are listed.
+    """
+    schema, name = table.split(".")
+    rows = conn.execute(
+        "SELECT column_name, data_type FROM duckdb_columns() "
+        "WHERE schema_name = ? AND table_name = ? ORDER BY column_index",
+        [schema, name],
+    ).fetchall()
+    rows = [(column, data_type) for column, data_type in rows if column != LOAD_ORDER and is_column_name(column)]
+    text = [column for column, data_type in rows if data_type == "VARCHAR"]
+    numeric = [column for column, data_type in rows if data_type in NUMERIC_TYPES or data_type.startswith("DECIMAL")]
+    return text, numeric
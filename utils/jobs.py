@@ -0,0 +1,130 @@
+"""Background jobs with progress, polled by pages via st.fragment(run_every=...)"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+# Finished jobs are dropped from the runner after this many seconds
+KEEP_FINISHED_SECONDS = 60 * 60
+
+
+class Job:
+    """Handle for work running on a JobRunner
+
+    The worker gets the job as its first argument and calls report() to
+    publish progress; pages read progress/message/done/result without
+    blocking. Work that can stop early should check cancelled.
+    """
+
+    def __init__(self, label, progress_source=None, info=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.info = info or {}
+        self.started = time.time()
+        self.message = ""
+        self._progress = 0.0
+        self._progress_source = progress_source
+        self._cancel = threading.Event()
+        self._future = None
+
+    def report(self, progress=None, message=None):
+        """Called by the worker: progress as a 0-1 fraction, plus an optional status line"""
+        if progress is not None:
+            self._progress = min(max(progress, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    @property
+    def progress(self):
+        """Fraction done: from progress_source when it can tell, else the last report()"""
+        if self.done:
+            return 1.0
+        if self._progress_source is not None:
+            progress = self._progress_source()
+            if progress is not None:
+                return progress
+        return self._progress
+
+    @property
+    def done(self):
+        return self._future is not None and self._future.done()
+
+    @property
+    def error(self):
+        if not self.done or self._future.cancelled():
+            return None
+        return self._future.exception()
+
+    @property
+    def result(self):
+        """The worker's return value; None while running, after an error or once cancelled before it started"""
+        if not self.done or self._future.cancelled() or self.error is not None:
+            return None
+        return self._future.result()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Ask the worker to stop; jobs that haven't started never run"""
+        self._cancel.set()
+        if self._future is not None:
+            self._future.cancel()
+
+
+class JobRunner:
+    """Thread pool that runs Jobs off the Streamlit script thread"""
+
+    def __init__(self, max_workers=4, name="jobs"):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, label="", progress_source=None, info=None, **kwargs):
+        """Run fn(job, *args, **kwargs) in the background and return the Job"""
+        job = Job(label, progress_source=progress_source, info=info)
+        job._future = self._executor.submit(fn, job, *args, **kwargs)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def running(self):
+        with self._lock:
+            return [job for job in self._jobs.values() if not job.done]
+
+    def _prune(self):
+        cutoff = time.time() - KEEP_FINISHED_SECONDS
+        for job_id in [i for i, job in self._jobs.items() if job.done and job.started < cutoff]:
+            del self._jobs[job_id]
+
+
+@st.cache_resource
+def get_job_runner():
+    """Job pool shared by every page and session of the app"""
+    return JobRunner()
+
+
+@st.fragment(run_every="0.5s")
+def show_job_progress(job, text=None):
+    """Progress bar polled while job runs; reruns the page once it finishes
+
+    Only this fragment reruns while polling. Render it only for jobs that
+    are not done yet, so a finished page stops polling.
+    """
+    if job.done:
+        st.rerun()
+
+    progress = job.progress
+    status = text or job.label
+    if job.message:
+        status = f"{status}: {job.message}"
+    st.progress(progress or 0.0, text=status)
@@ -0,0 +1,113 @@
+"""Speculative background warming of cached functions for likely next views"""
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.jobs import JobRunner
+
+# Wall time one batch may spend warming before it gives up
+BUDGET_SECONDS = 2.0
+
+# Most calls warmed per batch
+MAX_ITEMS = 16
+
+# Remembered warmed calls; the least recently warmed are forgotten first
+MAX_REMEMBERED = 10_000
+
+# Seconds a warmed call is skipped by schedule(). The function's cache can
+# evict or clear the entry meanwhile, so after this the call is warmed
+# again: a cheap cache hit if the entry is still there, a rebuild if not
+REMEMBER_SECONDS = 300
+
+
+class Prefetcher:
+    """Runs a cached function ahead of time on one low-priority worker
+
+    schedule() is called after a page has rendered with the arguments the
+    next interaction will most likely need; the results land in the
+    function's own cache, so the click that needs them is a cache hit.
+    Prefetching never competes with page renders: there is a single
+    worker, each batch stops at its time and item budget, a newer batch
+    cancels the previous one, and a batch stops as soon as a render is
+    inside foreground(). The worker runs under the scheduling script's
+    context, so fn's st.cache_data and st.cache_resource calls behave as
+    they do during a rerun.
+    """
+
+    def __init__(self, budget=BUDGET_SECONDS, max_items=MAX_ITEMS, remember=REMEMBER_SECONDS):
+        self.budget = budget
+        self.max_items = max_items
+        self.remember = remember
+        self._runner = JobRunner(max_workers=1, name="prefetch")
+        # (function, args) -> monotonic time it was warmed
+        self._warmed = OrderedDict()
+        self._foreground = 0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def foreground(self):
+        """Mark work a user is waiting for; running batches stop early"""
+        with self._lock:
+            self._foreground += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._foreground -= 1
+
+    @property
+    def busy(self):
+        return self._foreground > 0
+
+    def schedule(self, fn, calls):
+        """Warm fn(*args) for each args tuple in calls, in order; returns the Job or None
+
+        Cache fn with show_spinner=False: a cache miss while warming would
+        otherwise show its spinner on the scheduling page.
+        """
+        now = time.monotonic()
+        with self._lock:
+            pending = [args for args in calls if not self._is_warm((fn.__qualname__, args), now)]
+        pending = pending[:self.max_items]
+        if not pending:
+            return None
+
+        for job in self._runner.running:
+            job.cancel()
+        return self._runner.submit(
+            self._warm, fn, pending, get_script_run_ctx(suppress_warning=True), label=f"Prefetching {fn.__qualname__}"
+        )
+
+    def _is_warm(self, key, now):
+        warmed_at = self._warmed.get(key)
+        return warmed_at is not None and now - warmed_at < self.remember
+
+    def _warm(self, job, fn, calls, ctx):
+        # The worker thread belongs to this prefetcher alone; each batch
+        # replaces the previous batch's context
+        add_script_run_ctx(threading.current_thread(), ctx)
+        deadline = time.monotonic() + self.budget
+        warmed = 0
+        for args in calls:
+            if job.cancelled or self.busy or time.monotonic() > deadline:
+                break
+            fn(*args)
+            with self._lock:
+                key = (fn.__qualname__, args)
+                self._warmed[key] = time.monotonic()
+                self._warmed.move_to_end(key)
+                while len(self._warmed) > MAX_REMEMBERED:
+                    self._warmed.popitem(last=False)
+            warmed += 1
+            job.report(warmed / len(calls), f"{warmed}/{len(calls)}")
+        return warmed
+
+
+@st.cache_resource
+def get_prefetcher():
+    """Prefetcher shared by every page and session of the app"""
+    return Prefetcher()
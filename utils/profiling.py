@@ -0,0 +1,191 @@
+"""Per-query timing for DuckDB, with an optional shared result cache"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from utils.schema import optimize_frame
+
+# Results shared across sessions for queries marked cache=True
+RESULT_CACHE_SIZE = 256
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+
+def clear_result_cache():
+    """Drop every cached result, e.g. after the underlying table is reloaded"""
+    with _result_cache_lock:
+        _result_cache.clear()
+
+
+def _cache_get(key):
+    with _result_cache_lock:
+        if key in _result_cache:
+            _result_cache.move_to_end(key)
+            return True, _result_cache[key]
+    return False, None
+
+
+def _cache_put(key, value):
+    with _result_cache_lock:
+        _result_cache[key] = value
+        _result_cache.move_to_end(key)
+        while len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+
+
+def cached_result(sql, params, method="fetchdf"):
+    """(hit, value) for a query stored by execute(..., cache=True)"""
+    return _cache_get((sql, tuple(params or []), method))
+
+
+def store_result(sql, params, value, method="fetchdf"):
+    """Put a result computed elsewhere (e.g. a background thread) in the cache"""
+    _cache_put((sql, tuple(params or []), method), value)
+
+
+def caller_source(depth=1):
+    """file:line of the code depth calls above the function calling this"""
+    frame = sys._getframe(depth + 1)
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+
+
+def _result_size(result):
+    """Rows and approximate bytes of a fetched result"""
+    if result is None:
+        return 0, 0
+    if hasattr(result, "memory_usage"):
+        return len(result), int(result.memory_usage(deep=True).sum())
+    if isinstance(result, tuple):
+        return 1, sum(sys.getsizeof(v) for v in result)
+    return len(result), sum(sys.getsizeof(v) for row in result for v in row)
+
+
+class QueryEntry:
+    """Timing and size of one executed query"""
+
+    def __init__(self, sql, params, source):
+        self.sql = sql
+        self.params = list(params or [])
+        self.source = source
+        self.seconds = 0.0
+        self.rows = None
+        self.bytes = None
+        # Bytes of a fetched frame before optimize_frame()
+        self.raw_bytes = None
+        self.cache_hit = False
+
+    @property
+    def summary(self):
+        """First 80 characters of the query on one line"""
+        text = re.sub(r"\s+", " ", self.sql).strip()
+        return text if len(text) <= 80 else text[:77] + "..."
+
+    @property
+    def explainable(self):
+        return re.match(r"\s*(SELECT|WITH)\b", self.sql, re.IGNORECASE) is not None
+
+
+class ProfiledResult:
+    """Wraps a DuckDB result so fetch time and size land in the query entry"""
+
+    def __init__(self, conn, entry, cache_key=None, measure=True):
+        self._conn = conn
+        self._entry = entry
+        self._cache_key = cache_key
+        self._measure = measure
+        self._cursor = None
+
+    def _record_size(self, value):
+        # Deep memory accounting is not free on large frames, so it only
+        # runs while the profile panel is on
+        if self._measure:
+            self._entry.rows, self._entry.bytes = _result_size(value)
+
+    def _run(self):
+        if self._cursor is None:
+            start = time.perf_counter()
+            self._cursor = self._conn.execute(self._entry.sql, self._entry.params)
+            self._entry.seconds += time.perf_counter() - start
+        return self._cursor
+
+    def _fetch(self, method):
+        key = self._cache_key + (method,) if self._cache_key else None
+        if key:
+            hit, value = _cache_get(key)
+            if hit:
+                self._entry.cache_hit = True
+                self._record_size(value)
+                return value
+
+        cursor = self._run()
+        start = time.perf_counter()
+        value = getattr(cursor, method)()
+        self._entry.seconds += time.perf_counter() - start
+        if method == "fetchdf":
+            # Frames are stored and cached with compact dtypes
+            if self._measure:
+                self._entry.raw_bytes = _result_size(value)[1]
+            value = optimize_frame(value)
+        self._record_size(value)
+
+        if key:
+            _cache_put(key, value)
+        return value
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+    def fetchdf(self):
+        return self._fetch("fetchdf")
+
+    @property
+    def description(self):
+        return self._run().description
+
+
+class ProfiledConnection:
+    """Drop-in wrapper around a DuckDB connection that records every query
+
+    Statements run through execute() are logged with wall time, rows and
+    bytes returned. Pass cache=True for queries whose result only depends on
+    the SQL text, its parameters and the loaded data; those are served from
+    a result cache shared by all sessions and logged as cache hits.
+    fetchdf() frames come back with optimize_frame()'s compact dtypes.
+    """
+
+    def __init__(self, conn, measure=True):
+        self._conn = conn
+        self.measure = measure
+        self.entries = []
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def execute(self, sql, params=None, cache=False, source=None):
+        """Run sql; source labels it in the profile and defaults to the caller's file:line"""
+        entry = QueryEntry(sql, params, source or caller_source())
+        self.entries.append(entry)
+
+        if cache:
+            return ProfiledResult(self._conn, entry, cache_key=(sql, tuple(entry.params)), measure=self.measure)
+
+        # Statements are executed eagerly like DuckDB does, so DDL that is
+        # never fetched still runs and is timed
+        result = ProfiledResult(self._conn, entry, measure=self.measure)
+        result._run()
+        return result
+
+    @property
+    def total_seconds(self):
+        return sum(entry.seconds for entry in self.entries)
+
+    def explain_analyze(self, entry):
+        """DuckDB's EXPLAIN ANALYZE tree for a logged query"""
+        rows = self._conn.execute("EXPLAIN ANALYZE " + entry.sql, entry.params).fetchall()
+        return "\n".join(row[1] for row in rows)
@@ -0,0 +1,103 @@
+"""Sample previews that are replaced by exact results computed in the background"""
+import re
+import threading
+from collections import OrderedDict
+
+import duckdb
+
+from utils.approx import ensure_sample_table, sample_fraction
+from utils.profiling import cached_result, store_result
+from utils.schema import optimize_frame
+
+# Rate of the preview sample when approximate KPIs don't set one
+PREVIEW_RATE = 0.01
+
+# Exact queries in flight, shared by all sessions: (sql, params) -> Future
+_jobs = {}
+_jobs_lock = threading.RLock()
+
+# Queries whose background run failed, to rerun once in the foreground
+_failed = OrderedDict()
+MAX_FAILED = 256
+
+_BASE_TABLE = re.compile(r"\bFROM sales\b")
+
+
+def _run_exact(cursor, sql, params):
+    # A failed query returns None; the page reruns it in the foreground,
+    # where the error is raised and shown like any other query's
+    try:
+        return optimize_frame(cursor.execute(sql, params).fetchdf())
+    except duckdb.Error:
+        return None
+
+
+def _finish(key, future):
+    # Successful results go to the shared result cache; failed queries are
+    # remembered so the next request reruns them in the foreground
+    failed = future.cancelled() or future.exception() is not None or future.result() is None
+    if not failed:
+        store_result(key[0], key[1], future.result())
+    with _jobs_lock:
+        _jobs.pop(key, None)
+        if failed:
+            _failed[key] = True
+            while len(_failed) > MAX_FAILED:
+                _failed.popitem(last=False)
+
+
+def _submit(executor, conn, sql, params):
+    key = (sql, tuple(params))
+    with _jobs_lock:
+        future = _jobs.get(key)
+        if future is None:
+            # DuckDB connections are not thread-safe; give the job a cursor
+            future = executor.submit(_run_exact, conn.cursor(), sql, params)
+            _jobs[key] = future
+            future.add_done_callback(lambda f: _finish(key, f))
+    return future
+
+
+def is_pending(sql, params):
+    """True while the exact result of a query is still being computed"""
+    with _jobs_lock:
+        future = _jobs.get((sql, tuple(params or [])))
+    return future is not None and not future.done()
+
+
+def fetch_progressive(conn, executor, sql, params=None, scale=(), rate=PREVIEW_RATE, source=None):
+    """Exact result if it is ready, otherwise a sample preview
+
+    Returns (frame, preview). On a miss the exact query is started on the
+    executor and the same query is answered from the rate's sample table,
+    with the columns in scale (sums and counts) scaled up by the realised
+    fraction of that same table. Once the job finishes the exact frame is
+    in the result cache, so the next run returns it directly. The query
+    must read the base table as "FROM sales". conn is a
+    ProfiledConnection; source labels its queries in the profile.
+    """
+    params = list(params or [])
+    hit, value = cached_result(sql, params)
+    if hit:
+        return value, False
+
+    with _jobs_lock:
+        failed = _failed.pop((sql, tuple(params)), None)
+    if failed:
+        # The background run failed: rerun here, where the error is shown
+        return conn.execute(sql, params, cache=True, source=source).fetchdf(), False
+
+    future = _submit(executor, conn, sql, params)
+    if future.done() and not future.cancelled() and future.exception() is None and future.result() is not None:
+        store_result(sql, params, future.result())
+        return future.result(), False
+
+    # Sample tables are never rebuilt, so the fraction read here is the
+    # one of the rows the preview reads
+    table = ensure_sample_table(conn, rate)
+    fraction = sample_fraction(conn, table)
+
+    preview = conn.execute(_BASE_TABLE.sub(f"FROM {table}", sql), params, source=source).fetchdf()
+    for column in scale:
+        preview[column] = preview[column] / fraction
+    return preview, True
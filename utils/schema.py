@@ -0,0 +1,106 @@
+"""Memory-optimized dtypes for in-memory DataFrames, with a per-frame memory report"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# A string column becomes categorical when it has at most this many
+# distinct values per row
+CATEGORY_RATIO = 0.5
+
+# Frames remembered by memory_report()
+MAX_REPORTS = 64
+
+_reports = OrderedDict()
+_reports_lock = threading.Lock()
+
+
+def _is_string(series):
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def _optimize_column(series):
+    """series with the smallest dtype holding exactly the same values, or None"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return None
+
+    if _is_string(series):
+        if len(series) and series.nunique(dropna=True) <= CATEGORY_RATIO * len(series):
+            return series.astype('category')
+        return None
+
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        return None
+
+    if pd.api.types.is_integer_dtype(series):
+        # Nullable and unsigned columns keep their kind; only the width shrinks
+        downcast = 'unsigned' if pd.api.types.is_unsigned_integer_dtype(series) else 'integer'
+        smaller = pd.to_numeric(series, downcast=downcast)
+        return smaller if smaller.dtype != series.dtype else None
+
+    if series.dtype == np.float64:
+        smaller = series.astype(np.float32)
+        # Only when every value survives the round trip, NaN included
+        if np.array_equal(smaller.to_numpy(np.float64), series.to_numpy(), equal_nan=True):
+            return smaller
+    return None
+
+
+def optimize_frame(df, name=None):
+    """Copy of df with low-cardinality strings as category and numbers downcast
+
+    Downcasting is lossless: integers move to the narrowest type holding
+    their range and float64 columns to float32 only when every value is
+    exactly representable. Datetimes, booleans and high-cardinality
+    strings are left alone. With a name ("page.table" by convention), the
+    memory before and after is recorded for memory_report().
+    """
+    before = int(df.memory_usage(deep=True).sum()) if name else None
+
+    optimized = df.copy(deep=False)
+    for column in df.columns:
+        smaller = _optimize_column(df[column])
+        if smaller is not None:
+            optimized[column] = smaller
+
+    if name:
+        record(name, df, before, int(optimized.memory_usage(deep=True).sum()))
+    return optimized
+
+
+def record(name, df, before, after):
+    """Remember the memory of frame name before and after optimization"""
+    with _reports_lock:
+        _reports[name] = {"Frame": name, "Rows": len(df), "Before": before, "After": after}
+        _reports.move_to_end(name)
+        while len(_reports) > MAX_REPORTS:
+            _reports.popitem(last=False)
+
+
+def memory_report(prefix=""):
+    """Before/after memory of the recorded frames whose name starts with prefix"""
+    with _reports_lock:
+        rows = [row for name, row in _reports.items() if name.startswith(prefix)]
+    report = pd.DataFrame(rows, columns=["Frame", "Rows", "Before", "After"])
+    report["Saved %"] = (100 * (1 - report["After"] / report["Before"])).round(1)
+    return report
+
+
+def show_memory_report(prefix=""):
+    """Sidebar expander with memory_report(prefix) in MB"""
+    report = memory_report(prefix)
+    if report.empty:
+        return
+    with st.sidebar.expander("🧠 Memory"):
+        st.caption(f"{report['Before'].sum() / 1e6:.2f} MB → {report['After'].sum() / 1e6:.2f} MB after dtype optimization")
+        st.dataframe(
+            report.assign(Before=report["Before"] / 1e6, After=report["After"] / 1e6),
+            hide_index=True,
+            column_config={
+                "Before": st.column_config.NumberColumn("Before (MB)", format="%.3f"),
+                "After": st.column_config.NumberColumn("After (MB)", format="%.3f"),
+            },
+            use_container_width=True
+        )
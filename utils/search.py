@@ -0,0 +1,106 @@
+"""Search-as-you-type lookups for high-cardinality text columns"""
+import bisect
+import heapq
+
+# Most options a picker ever sends to the browser
+DEFAULT_LIMIT = 50
+
+
+class PrefixIndex:
+    """Sorted-array index answering case-insensitive prefix queries
+
+    Values are kept sorted by their lowercased text, so every value starting
+    with a prefix sits in one contiguous slice found with two binary
+    searches. An optional group per value (e.g. the product's category)
+    lets a lookup be restricted to some groups; each group keeps its own
+    sorted arrays, so a restricted lookup never walks other groups' values.
+    """
+
+    def __init__(self, values, groups=None):
+        groups = list(groups) if groups is not None else [None] * len(values)
+        rows = sorted(zip((str(v).lower() for v in values), values, groups), key=lambda r: r[0])
+        self._keys = [r[0] for r in rows]
+        self._values = [r[1] for r in rows]
+        self._by_group = {}
+        seen = set()
+        for key, value, group in rows:
+            if (group, value) in seen:
+                continue
+            seen.add((group, value))
+            keys, group_values = self._by_group.setdefault(group, ([], []))
+            keys.append(key)
+            group_values.append(value)
+
+    def __len__(self):
+        return len(self._keys)
+
+    @staticmethod
+    def _matches(keys, values, text, limit=None):
+        # (key, value) pairs of the sorted slice starting with text
+        start = bisect.bisect_left(keys, text)
+        end = bisect.bisect_left(keys, text + "\uffff", lo=start)
+        if limit is not None:
+            end = min(end, start + limit)
+        return ((keys[i], values[i]) for i in range(start, end))
+
+    def prefix(self, text, limit=DEFAULT_LIMIT, groups=None):
+        """Distinct values starting with text, in sorted order"""
+        text = text.lower()
+        if groups is None:
+            pairs = self._matches(self._keys, self._values, text)
+        else:
+            # Values are distinct within a group, so its first limit matches
+            # are all it can contribute: at most limit rows read per group
+            pairs = heapq.merge(
+                *(self._matches(*self._by_group[group], text, limit) for group in set(groups) if group in self._by_group),
+                key=lambda pair: pair[0],
+            )
+
+        matches = []
+        seen = set()
+        for _, value in pairs:
+            if value not in seen:
+                seen.add(value)
+                matches.append(value)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+
+def build_index(conn, table, column, group_column=None):
+    """PrefixIndex over the distinct values (and groups) of a column"""
+    if group_column:
+        rows = conn.execute(f"SELECT DISTINCT {column}, {group_column} FROM {table}").fetchall()
+        return PrefixIndex([r[0] for r in rows], [r[1] for r in rows])
+    rows = conn.execute(f"SELECT DISTINCT {column} FROM {table}").fetchall()
+    return PrefixIndex([r[0] for r in rows])
+
+
+def search(conn, index, table, column, text, where_clause="1=1", params=None, groups=None, limit=DEFAULT_LIMIT):
+    """Prefix matches from the index, topped up with substring matches from DuckDB
+
+    Only the first limit matches are returned, so the caller never ships
+    the whole domain to the browser. Substring matches go to DuckDB, which
+    scans the column without materializing it in Python.
+    """
+    text = text.strip()
+    matches = index.prefix(text, limit, groups)
+    if not text or len(matches) >= limit:
+        return matches
+
+    substring_query = f"""
+        SELECT DISTINCT {column}
+        FROM {table}
+        WHERE {where_clause} AND contains(lower({column}), ?)
+        ORDER BY {column}
+        LIMIT ?
+    """
+    rows = conn.execute(substring_query, list(params or []) + [text.lower(), limit + len(matches)]).fetchall()
+    seen = set(matches)
+    for (value,) in rows:
+        if value not in seen:
+            seen.add(value)
+            matches.append(value)
+            if len(matches) >= limit:
+                break
+    return matches
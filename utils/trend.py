@@ -0,0 +1,123 @@
+"""Time-bucket selection and downsampling for trend charts"""
+import numpy as np
+import pandas as pd
+
+# Bucket name -> approximate length in days, finest first
+GRANULARITIES = {
+    'day': 1,
+    'week': 7,
+    'month': 30.44,
+    'quarter': 91.31,
+}
+
+GRANULARITY_LABELS = {
+    'day': 'Daily',
+    'week': 'Weekly',
+    'month': 'Monthly',
+    'quarter': 'Quarterly',
+}
+
+# Roughly the width of the 2/3 trend column in wide layout
+DEFAULT_CHART_WIDTH_PX = 900
+
+# Leave enough room between markers for hover to stay usable
+MIN_PX_PER_POINT = 8
+
+
+def max_points_for_width(width_px=DEFAULT_CHART_WIDTH_PX, px_per_point=MIN_PX_PER_POINT):
+    """Largest number of points a chart of the given width can show legibly"""
+    return max(2, int(width_px // px_per_point))
+
+
+def choose_granularity(start_date, end_date, width_px=DEFAULT_CHART_WIDTH_PX):
+    """Pick the finest bucket whose point count fits the chart width"""
+    span_days = max((pd.Timestamp(end_date) - pd.Timestamp(start_date)).days + 1, 1)
+    max_points = max_points_for_width(width_px)
+
+    for granularity, bucket_days in GRANULARITIES.items():
+        if span_days / bucket_days <= max_points:
+            return granularity
+
+    return 'quarter'
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling, returns selected indices"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    # First and last points are always kept; the rest is split into buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Average of the next bucket is the third triangle vertex
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """Keep the min and max of each bucket so peaks survive downsampling"""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(int)
+
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = y[start:end]
+        selected.append(start + int(np.argmin(bucket)))
+        selected.append(start + int(np.argmax(bucket)))
+
+    return np.unique(selected)
+
+
+def downsample(df, x_col, y_col, max_points, method='lttb'):
+    """Reduce a sorted series to at most max_points rows"""
+    if len(df) <= max_points:
+        return df
+
+    y = df[y_col].to_numpy()
+    extremes = [int(np.argmin(y)), int(np.argmax(y))]
+
+    if method == 'minmax':
+        idx = minmax_indices(y, max_points)
+    elif max_points < 5:
+        # No room for LTTB buckets: the ends and the extremes, or only the
+        # extremes when even the ends don't fit
+        idx = np.unique([0, len(y) - 1] + extremes if max_points == 4 else extremes)
+    else:
+        x = df[x_col]
+        if pd.api.types.is_datetime64_any_dtype(x):
+            x = x.astype('int64')
+
+        # LTTB keeps one point per bucket; reserve two slots so the global
+        # extremes are never dropped
+        idx = lttb(x.to_numpy(), y, max_points - 2)
+        idx = np.union1d(idx, extremes)
+
+    return df.iloc[idx].reset_index(drop=True)